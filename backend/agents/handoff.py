@@ -0,0 +1,164 @@
+"""Compact views of each agent's output for the agents downstream of it.
+
+Instead of re-injecting an agent's raw markdown/JSON text, the orchestrator
+hands the next agent a canonical, whitespace-free JSON projection holding only
+the fields that agent uses, under short keys explained by a one-line legend.
+"""
+import json
+import logging
+
+from backend.services.signal_dedup import signal_tokens
+
+logger = logging.getLogger("ewa.handoff")
+
+# Rough chars-per-token ratio for English/JSON text, used for savings reports
+CHARS_PER_TOKEN = 4
+
+SCORE_KEYS = ("impact", "lead_time", "reliability")
+
+# long field name -> short key, per consumer
+SIGNAL_BRIEF_FIELDS = {"id": "id", "name": "n", "domain": "d", "description": "desc", "evidence": "ev", "data_source": "src"}
+SIGNAL_FULL_FIELDS = {
+    **SIGNAL_BRIEF_FIELDS,
+    "why_looks_like_noise": "noise",
+    "why_actually_meaningful": "meaning",
+    "signal_tier": "t",
+}
+CORROBORATION_FIELDS = {
+    "signal_id": "id",
+    "corroboration_strength": "str",
+    "updated_reliability_score": "rel",
+    "modalities_checked": "mods",
+    "corroboration_summary": "sum",
+    "gaps": "gaps",
+}
+DEBUNKING_FIELDS = {
+    "signal_id": "id",
+    "verdict": "v",
+    "verdict_reasoning": "why",
+    "best_mundane_explanation": "expl",
+    "mundane_plausibility": "plaus",
+}
+# What-If reads the finished analysis: synthesis output only, no raw agent text
+SCORED_SIGNAL_FIELDS = {
+    "signal_id": "id",
+    "name": "n",
+    "domain": "d",
+    "description": "desc",
+    "risk_band": "band",
+    "constellation_id": "c",
+    "monitoring_triggers": "trig",
+}
+SCORED_KEYS = (*SCORE_KEYS, "overall")
+CONSTELLATION_FIELDS = {"id": "id", "name": "n", "signal_ids": "sig", "category": "cat", "description": "desc"}
+ASSESSMENT_FIELDS = ("headline", "risk_level", "key_concern", "confidence", "what_to_watch", "timeline_estimate")
+
+
+def dump(data) -> str:
+    """Canonical compact JSON: no whitespace, stable key order, unicode kept."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _legend(fields: dict, scores: str | None = None, score_keys: tuple = SCORE_KEYS) -> str:
+    parts = [f"{short}={long}" for long, short in fields.items() if short != long]
+    if scores:
+        parts.append(f"{scores}=[{','.join(score_keys)}]")
+    return ", ".join(parts)
+
+
+def _project(item: dict, fields: dict) -> dict:
+    return {short: item[long] for long, short in fields.items() if item.get(long) not in (None, "", [])}
+
+
+def _scores(scores, keys: tuple = SCORE_KEYS) -> list | None:
+    if not isinstance(scores, dict):
+        return None
+    return [scores.get(key) for key in keys]
+
+
+def _section(title: str, legend: str, rows: list) -> str:
+    return f"{title} (compact JSON; {legend}):\n{dump(rows)}"
+
+
+def signals_section(title: str, signals: list, brief: bool = False) -> str:
+    """Signal Hunter output; `brief` keeps only what Corroboration searches on."""
+    fields = SIGNAL_BRIEF_FIELDS if brief else SIGNAL_FULL_FIELDS
+    rows = []
+    for signal in signals:
+        row = _project(signal, fields)
+        if not brief and _scores(signal.get("preliminary_scores")):
+            row["s"] = _scores(signal.get("preliminary_scores"))
+        rows.append(row)
+    return _section(title, _legend(fields, None if brief else "s"), rows)
+
+
+def corroboration_section(title: str, corroborated: list) -> str:
+    return _section(title, _legend(CORROBORATION_FIELDS), [_project(c, CORROBORATION_FIELDS) for c in corroborated])
+
+
+def debunking_section(title: str, results: list) -> str:
+    rows = []
+    for result in results:
+        row = _project(result, DEBUNKING_FIELDS)
+        if _scores(result.get("adjusted_scores")):
+            row["adj"] = _scores(result.get("adjusted_scores"))
+        rows.append(row)
+    return _section(title, _legend(DEBUNKING_FIELDS, "adj"), rows)
+
+
+def context_section(title: str, context_json: dict) -> str:
+    return f"{title}:\n{dump(context_json)}"
+
+
+def what_if_context_section(country: str, final_data: dict) -> str:
+    """The finished analysis as What-If needs it, independent of the scenario
+    so it can be a cached prompt prefix shared by every scenario."""
+    synthesis = (final_data.get("agents") or {}).get("synthesis") or {}
+    signals = []
+    for signal in synthesis.get("scored_signals") or []:
+        row = _project(signal, SCORED_SIGNAL_FIELDS)
+        if _scores(signal.get("scores"), SCORED_KEYS):
+            row["s"] = _scores(signal.get("scores"), SCORED_KEYS)
+        signals.append(row)
+    constellations = []
+    for constellation in synthesis.get("constellations") or []:
+        row = _project(constellation, CONSTELLATION_FIELDS)
+        fingerprint = constellation.get("fingerprint_match") or {}
+        if fingerprint.get("historical_case"):
+            row["fp"] = {k: fingerprint.get(k) for k in ("historical_case", "match_strength", "current_stage_estimate")}
+        constellations.append(row)
+    assessment = synthesis.get("overall_assessment") or {}
+
+    sections = [f"COUNTRY: {country}"]
+    if isinstance(final_data.get("country_context"), dict):
+        sections.append(context_section("COUNTRY CONTEXT", final_data["country_context"]))
+    sections += [
+        f"OVERALL ASSESSMENT:\n{dump({k: assessment[k] for k in ASSESSMENT_FIELDS if k in assessment})}",
+        _section("SCORED SIGNALS", _legend(SCORED_SIGNAL_FIELDS, "s", SCORED_KEYS), signals),
+        _section("CONSTELLATIONS", _legend(CONSTELLATION_FIELDS) + ", fp=fingerprint_match", constellations),
+    ]
+    return "\n\n".join(sections)
+
+
+def scenario_focus(scenario: str, final_data: dict, limit: int = 8) -> str:
+    """Scored signals whose wording overlaps the scenario most, as a hint for What-If."""
+    synthesis = (final_data.get("agents") or {}).get("synthesis") or {}
+    words = signal_tokens({"name": scenario})
+    ranked = []
+    for signal in synthesis.get("scored_signals") or []:
+        overlap = len(words & (signal_tokens(signal) | {str(signal.get("domain", "")).lower()}))
+        if overlap:
+            ranked.append((overlap, (signal.get("scores") or {}).get("overall") or 0, signal.get("signal_id")))
+    ranked.sort(reverse=True)
+    if not ranked:
+        return ""
+    return "SIGNALS MOST RELATED TO THE SCENARIO (start here): " + ", ".join(str(r[2]) for r in ranked[:limit])
+
+
+def log_savings(stage: str, raw: str, compact: str) -> dict:
+    """Log and return the estimated input tokens saved by handing off `compact` instead of `raw`."""
+    raw_tokens, compact_tokens = len(raw) // CHARS_PER_TOKEN, len(compact) // CHARS_PER_TOKEN
+    saved = raw_tokens - compact_tokens
+    logger.info("[Handoff] %-16s | raw ~%6d tokens | compact ~%6d tokens | saved ~%6d (%.0f%%)",
+                stage, raw_tokens, compact_tokens, saved, 100 * saved / raw_tokens if raw_tokens else 0)
+    return {"raw_tokens": raw_tokens, "compact_tokens": compact_tokens, "saved_tokens": saved}
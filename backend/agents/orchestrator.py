@@ -1,8 +1,9 @@
+import os
 import json
 import time
 import logging
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable
 
 from backend.agents.prompts import (
     COUNTRY_CONTEXT_SYSTEM,
@@ -13,16 +14,422 @@ from backend.agents.prompts import (
     WHAT_IF_SYSTEM,
 )
 from backend.agents.schemas import SSEEvent
+from backend.agents.streaming import coalesce_chunks
+from backend.agents import handoff
 from backend.services.claude_client import stream_agent_response, extract_json_from_response
 from backend.services.scoring import compute_scores
-from backend.models.analysis import AnalysisConfig
+from backend.services.signal_dedup import deduplicate_signals, LeaderClusters
+from backend.services import fingerprints
+from backend.services.baseline_store import baseline_store
+from backend.services.budget_planner import budget_planner
+from backend.services.json_stream import IncrementalJSONExtractor
+from backend.models.analysis import AnalysisConfig, AgentBudget
 
 logger = logging.getLogger("ewa.orchestrator")
 
-
-async def run_analysis_pipeline(config: AnalysisConfig) -> AsyncGenerator[str, None]:
-    """Run the full 5-agent pipeline, yielding SSE events."""
-
+# Persists one finished agent's output: (agent name, {raw, data, usage, completed_at})
+Checkpoint = Callable[[str, dict], Awaitable[None]]
+
+# Domain-sharded Signal Hunter: number of domain groups hunted by concurrent
+# calls, each with its share of the signal budget (0 or 1 = one call).
+SIGNAL_HUNTER_DOMAIN_GROUPS = int(os.getenv("SIGNAL_HUNTER_DOMAIN_GROUPS", "0"))
+SIGNAL_HUNTER_FAN_OUT = int(os.getenv("SIGNAL_HUNTER_FAN_OUT", "4"))
+
+# Hand downstream agents compact JSON views of earlier outputs instead of the
+# raw response text (see handoff.py). Falls back to raw text when a stage's
+# JSON could not be extracted.
+COMPACT_HANDOFF = os.getenv("COMPACT_HANDOFF", "1") == "1"
+
+# Merge near-identical Signal Hunter signals before corroboration, so each
+# anomaly is corroborated, challenged and scored once (see signal_dedup.py).
+SIGNAL_DEDUP = os.getenv("SIGNAL_DEDUP", "1") == "1"
+
+# Match surviving signals against the historical fingerprint library locally
+# and hand the best matches to Synthesis as hints (see fingerprints.py).
+FINGERPRINT_HINTS = os.getenv("FINGERPRINT_HINTS", "1") == "1"
+
+# Sharded corroboration: signals per Corroboration call (0 = one call for all
+# signals) and how many of those calls may run at the same time.
+CORROBORATION_SHARD_SIZE = int(os.getenv("CORROBORATION_SHARD_SIZE", "0"))
+CORROBORATION_FAN_OUT = int(os.getenv("CORROBORATION_FAN_OUT", "4"))
+
+# Batched Devil's Advocate: verdicts are independent per signal and need no web
+# search, so batches can be challenged concurrently (0 = one call).
+DEVILS_ADVOCATE_BATCH_SIZE = int(os.getenv("DEVILS_ADVOCATE_BATCH_SIZE", "0"))
+DEVILS_ADVOCATE_FAN_OUT = int(os.getenv("DEVILS_ADVOCATE_FAN_OUT", "4"))
+
+# Pipelined stages: corroborate hunted signals in batches while the Signal
+# Hunter is still writing, and challenge each batch as soon as its
+# corroboration is in, so Synthesis is the only stage that waits for all
+# signals. Batch size and concurrent calls per stage.
+PIPELINED_STAGES = os.getenv("PIPELINED_STAGES", "0") == "1"
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "5"))
+PIPELINE_FAN_OUT = int(os.getenv("PIPELINE_FAN_OUT", "4"))
+
+
+# Arrays whose elements are streamed as agent_partial events while each agent writes
+PARTIAL_KEYS = {
+    "signal_hunter": ("signals",),
+    "corroboration": ("corroborated_signals",),
+    "devils_advocate": ("debunking_results",),
+    "synthesis": ("scored_signals",),
+}
+
+
+def _apply_code_scores(signal: dict):
+    """Recompute derived scores and the risk band in code for consistency."""
+    scores = signal.get("scores") or {}
+    computed = compute_scores(
+        scores.get("impact", 50),
+        scores.get("lead_time", 50),
+        scores.get("reliability", 50),
+    )
+    signal["scores"] = scores
+    signal["scores"]["near_term"] = computed.near_term
+    signal["scores"]["structural"] = computed.structural
+    signal["scores"]["overall"] = computed.overall
+    signal["risk_band"] = computed.risk_band.value
+
+
+def _partial_events(agent: str, extractor: IncrementalJSONExtractor, chunk: str, shard: int | None = None) -> list[SSEEvent]:
+    """Feed a chunk to the agent's extractor and build agent_partial events for completed elements."""
+    events = []
+    for key, index, item in extractor.feed(chunk):
+        if key == "scored_signals":
+            _apply_code_scores(item)
+        events.append(SSEEvent(type="agent_partial", agent=agent, shard=shard,
+                               data={"key": key, "index": index, "item": item}))
+    return events
+
+
+def _restore_events(agent: str, checkpointed: dict, token_usage: dict) -> list[SSEEvent]:
+    """Replay a checkpointed agent's output to subscribers instead of calling it again."""
+    token_usage[agent] = dict(checkpointed.get("usage") or {})
+    logger.info("[Resume] Restoring %s from checkpoint (%d chars)", agent, len(checkpointed.get("raw") or ""))
+    return [
+        SSEEvent(type="agent_progress", agent=agent, status="resumed", message="Restored from checkpoint"),
+        SSEEvent(type="agent_chunk", agent=agent, content=checkpointed.get("raw") or ""),
+    ]
+
+
+async def _save_checkpoint(checkpoint: Checkpoint | None, agent: str, raw: str, data, token_usage: dict):
+    if checkpoint is None:
+        return
+    try:
+        await checkpoint(agent, {"raw": raw, "data": data, "usage": token_usage.get(agent, {}), "completed_at": time.time()})
+    except Exception as e:
+        logger.warning("[Checkpoint] Failed to save %s: %s: %s", agent, type(e).__name__, e)
+
+
+def _batches(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _split_evenly(items: list, groups: int) -> list[list]:
+    """Split items into `groups` contiguous groups whose sizes differ by at most one."""
+    size, extra = divmod(len(items), groups)
+    result, start = [], 0
+    for i in range(groups):
+        end = start + size + (1 if i < extra else 0)
+        result.append(items[start:end])
+        start = end
+    return result
+
+
+def _as_json_block(data) -> str:
+    """Render merged shard output the way agents write it, for downstream prompts."""
+    return "```json\n" + json.dumps(data, indent=2, default=str) + "\n```"
+
+
+async def _merge_streams(streams: list[AsyncIterator[dict]]) -> AsyncGenerator[tuple[int, dict], None]:
+    """Interleave several agent streams, yielding (stream index, event) as events arrive."""
+    queue = asyncio.Queue()
+    done = object()
+
+    async def pump(index: int, stream: AsyncIterator[dict]):
+        try:
+            async for event in stream:
+                await queue.put((index, event))
+            await queue.put((index, done))
+        except Exception as e:
+            await queue.put((index, e))
+
+    tasks = [asyncio.create_task(pump(i, s)) for i, s in enumerate(streams)]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            index, event = await queue.get()
+            if event is done:
+                remaining -= 1
+            elif isinstance(event, Exception):
+                raise event
+            else:
+                yield index, event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _record_usage(token_usage: dict, agent: str, usage: dict | None):
+    """Add one call's token usage to the per-agent totals."""
+    totals = token_usage.setdefault(agent, {})
+    for key, value in (usage or {}).items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def _dedup_report(hunted: list[dict], kept: list[dict], merges: list[dict]) -> dict:
+    """Record an in-run dedup pass with the downstream input tokens it saves (estimated)."""
+    def tokens(signals: list[dict], brief: bool) -> int:
+        if COMPACT_HANDOFF:
+            return len(handoff.signals_section("SIGNAL HUNTER FINDINGS", signals, brief=brief)) // handoff.CHARS_PER_TOKEN
+        return len(_as_json_block({"signals": signals})) // handoff.CHARS_PER_TOKEN
+
+    # Corroboration reads the brief hunter findings, Devil's Advocate and Synthesis the full ones.
+    saved = tokens(hunted, True) - tokens(kept, True) + 2 * (tokens(hunted, False) - tokens(kept, False))
+    logger.info("[Dedup] %d signals -> %d (%d merged into %d clusters), ~%d input tokens saved downstream",
+                len(hunted), len(kept), len(hunted) - len(kept), len(merges), saved)
+    return {"signals_in": len(hunted), "signals_out": len(kept), "merges": merges, "input_tokens_saved": saved}
+
+
+def _dedup_savings(report: dict, token_usage: dict) -> dict:
+    """Complete a dedup report with the output tokens the merged signals would have cost downstream.
+
+    Each merged signal is assumed to cost what an average kept signal did in
+    Corroboration, Devil's Advocate and Synthesis output.
+    """
+    merged = report["signals_in"] - report["signals_out"]
+    per_signal = sum((token_usage.get(agent) or {}).get("output_tokens", 0)
+                     for agent in ("corroboration", "devils_advocate", "synthesis")) / max(report["signals_out"], 1)
+    output_saved = round(per_signal * merged)
+    logger.info("[Dedup] Saved ~%d input + ~%d output tokens by merging %d signals",
+                report["input_tokens_saved"], output_saved, merged)
+    return {**report, "output_tokens_saved": output_saved, "tokens_saved": report["input_tokens_saved"] + output_saved}
+
+
+def _plan_budget(planned: dict, agent: str, signals: int = 0, domains: int = 0) -> AgentBudget:
+    """Plan one call's budget and note it in `planned` (agent -> list of budgets) for final_data."""
+    budget = budget_planner.plan(agent, signals, domains)
+    planned.setdefault(agent, []).append(budget.model_dump(include={"max_tokens", "max_searches", "signals"}))
+    return budget
+
+
+def _merge_shard_lists(outputs: list[str], key: str, label: str) -> list:
+    """Concatenate the `key` list from every shard's JSON output."""
+    merged = []
+    for i, output in enumerate(outputs):
+        shard_json = extract_json_from_response(output)
+        if isinstance(shard_json, dict) and isinstance(shard_json.get(key), list):
+            merged.extend(shard_json[key])
+        else:
+            logger.warning("%s — Shard %d/%d returned no usable JSON", label, i + 1, len(outputs))
+    return merged
+
+
+async def _stream_shards(
+    agent: str,
+    calls: list[tuple[str, list[str], str]],
+    use_web_search: bool,
+    fan_out: int,
+    outputs: list[str],
+    token_usage: dict,
+    budgets: list[AgentBudget] | None = None,
+) -> AsyncGenerator[SSEEvent, None]:
+    """Run one agent call per (system, cache prefix, user) prompt concurrently, streaming chunks tagged by shard.
+
+    At most `fan_out` calls are in flight at once. Each shard's full text is
+    written to `outputs[shard]` as it completes. `budgets`, if given, holds
+    each call's budget.
+    """
+    slots = asyncio.Semaphore(max(1, fan_out))
+    outputs[:] = [""] * len(calls)
+    budgets = budgets or [None] * len(calls)
+
+    async def shard_stream(system_prompt: str, cache_prefix: list[str], prompt: str, budget: AgentBudget | None):
+        async with slots:
+            async for event in stream_agent_response(system_prompt, prompt, use_web_search=use_web_search,
+                                                     cache_prefix=cache_prefix, budget=budget):
+                yield event
+
+    extractors = [IncrementalJSONExtractor(watch=PARTIAL_KEYS.get(agent, ())) for _ in calls]
+    async for shard, event in _merge_streams([shard_stream(*call, budget) for call, budget in zip(calls, budgets)]):
+        if event["type"] == "chunk":
+            yield SSEEvent(type="agent_chunk", agent=agent, shard=shard, content=event["content"])
+            for sse in _partial_events(agent, extractors[shard], event["content"], shard):
+                yield sse
+        elif event["type"] == "complete":
+            outputs[shard] = event["content"]
+            _record_usage(token_usage, agent, event.get("usage"))
+            yield SSEEvent(type="agent_progress", agent=agent, shard=shard, status="shard_complete",
+                           message=f"Shard {shard + 1}/{len(calls)} complete")
+
+
+# A batch prompt: (system prompt, cache prefix, user prompt)
+BatchCall = tuple[str, list[str], str]
+
+
+def _signal_key(signal: dict) -> tuple:
+    return signal.get("name"), signal.get("description")
+
+
+async def _overlap_stages(
+    hunter: AsyncIterator[SSEEvent],
+    hunted: Callable[[], list | None],
+    corroboration_call: Callable[[int, list[dict]], BatchCall],
+    devils_call: Callable[[int, list[dict], list[dict]], BatchCall],
+    planned: dict,
+    token_usage: dict,
+    result: dict,
+) -> AsyncGenerator[SSEEvent, None]:
+    """Run the Signal Hunter, Corroboration and Devil's Advocate stages overlapped.
+
+    Relays `hunter`'s events and, as each complete signal streams out of it,
+    queues it for corroboration; every PIPELINE_BATCH_SIZE signals start a
+    Corroboration call, and each batch goes on to a Devil's Advocate call as
+    soon as its corroboration completes. Near-duplicates of signals already
+    queued are skipped when SIGNAL_DEDUP is on. Once `hunter` is exhausted,
+    `hunted()` must return its final signal list: signals the stream did not
+    yield are batched then, and results for signals that did not make the
+    final list are dropped.
+
+    Batches are sent with signals numbered in arrival order; results are
+    mapped back to the final list's ids. Fills `result` with the merged
+    "corroborated" and "debunked" lists, "started" (agent -> start time) and
+    "overlap" stats.
+    """
+    queue = asyncio.Queue()
+    done = object()
+    slots = {agent: asyncio.Semaphore(max(1, PIPELINE_FAN_OUT)) for agent in ("corroboration", "devils_advocate")}
+    status = {"corroboration": "cross-validating", "devils_advocate": "challenging"}
+    started = result.setdefault("started", {})
+    clusters = LeaderClusters() if SIGNAL_DEDUP else None
+    dispatched = {}  # signal key -> id it was sent with
+    pending, tasks = [], []
+    corroborated, debunked = [], []  # per batch
+    hunter_done = None
+
+    async def call(agent: str, batch: int, prompts: BatchCall, use_web_search: bool, budget: AgentBudget) -> list:
+        if agent not in started:
+            started[agent] = time.time()
+            await queue.put(SSEEvent(type="agent_start", agent=agent, status=status[agent]))
+        key = PARTIAL_KEYS[agent][0]
+        extractor = IncrementalJSONExtractor(watch=PARTIAL_KEYS[agent])
+        output = ""
+        async with slots[agent]:
+            system_prompt, cache_prefix, prompt = prompts
+            async for event in stream_agent_response(system_prompt, prompt, use_web_search=use_web_search,
+                                                     cache_prefix=cache_prefix, budget=budget):
+                if event["type"] == "chunk":
+                    await queue.put(SSEEvent(type="agent_chunk", agent=agent, shard=batch, content=event["content"]))
+                    for sse in _partial_events(agent, extractor, event["content"], batch):
+                        await queue.put(sse)
+                elif event["type"] == "complete":
+                    output = event["content"]
+                    _record_usage(token_usage, agent, event.get("usage"))
+        await queue.put(SSEEvent(type="agent_progress", agent=agent, shard=batch, status="shard_complete",
+                                 message=f"Batch {batch + 1} complete"))
+        return _merge_shard_lists([output], key, f"[Pipeline] {agent} batch {batch + 1}")
+
+    async def process(batch: int, signals: list[dict]):
+        corroborated[batch] = await call("corroboration", batch, corroboration_call(batch, signals), True,
+                                         _plan_budget(planned, "corroboration", len(signals)))
+        debunked[batch] = await call("devils_advocate", batch, devils_call(batch, signals, corroborated[batch]), False,
+                                     _plan_budget(planned, "devils_advocate", len(signals)))
+
+    def dispatch():
+        batch = len(corroborated)
+        corroborated.append([])
+        debunked.append([])
+        logger.info("[Pipeline] Batch %d: corroborating %d signals (%s)", batch + 1, len(pending),
+                    "hunter still streaming" if hunter_done is None else "after hunter")
+        tasks.append(asyncio.create_task(process(batch, pending[:])))
+        pending.clear()
+
+    def take(signal: dict, dedup: bool = True):
+        key = _signal_key(signal)
+        if key in dispatched or (dedup and clusters is not None and not clusters.add(signal)):
+            return
+        signal = {**signal, "id": f"signal_{len(dispatched) + 1}"}
+        dispatched[key] = signal["id"]
+        pending.append(signal)
+        if len(pending) >= PIPELINE_BATCH_SIZE:
+            dispatch()
+
+    async def run():
+        nonlocal hunter_done
+        try:
+            async for sse in hunter:
+                await queue.put(sse)
+                data = sse.data if sse.type == "agent_partial" and sse.agent == "signal_hunter" else None
+                if data and data.get("key") == "signals" and isinstance(data.get("item"), dict):
+                    take(data["item"])
+            hunter_done = time.time()
+            streamed = len(dispatched)
+            final = [s for s in hunted() or [] if isinstance(s, dict)]
+            for signal in final:
+                take(signal, dedup=False)
+            if pending:
+                dispatch()
+            result["overlap"] = {"batches": len(corroborated), "signals_streamed": streamed,
+                                 "signals_after_hunter": len(dispatched) - streamed}
+            await asyncio.gather(*tasks)
+            await queue.put(done)
+        except Exception as e:
+            await queue.put(e)
+
+    runner = asyncio.create_task(run())
+    try:
+        while True:
+            event = await queue.get()
+            if event is done:
+                break
+            if isinstance(event, Exception):
+                raise event
+            yield event
+    finally:
+        for task in [runner, *tasks]:
+            task.cancel()
+
+    # Map arrival ids back to the final list's ids, in its order; drop
+    # results for signals that were dedup-merged or otherwise left out of it.
+    final_ids = {_signal_key(s): s.get("id") for s in hunted() or [] if isinstance(s, dict)}
+    id_map = {sent: final_ids.get(key) for key, sent in dispatched.items()}
+    order = {signal_id: n for n, signal_id in enumerate(final_ids.values())}
+
+    def remap(results: list) -> list:
+        mapped = []
+        for r in results:
+            if not isinstance(r, dict):
+                continue
+            if r.get("signal_id") in id_map:
+                if id_map[r["signal_id"]] is None:
+                    continue
+                r = {**r, "signal_id": id_map[r["signal_id"]]}
+            mapped.append(r)
+        return sorted(mapped, key=lambda r: order.get(r.get("signal_id"), len(order)))
+
+    result["corroborated"] = remap([r for batch in corroborated for r in batch])
+    result["debunked"] = remap([r for batch in debunked for r in batch])
+    if started and hunter_done:
+        result["overlap"]["head_start_s"] = round(max(0.0, hunter_done - min(started.values())), 2)
+
+
+async def run_analysis_pipeline(
+    config: AnalysisConfig,
+    checkpoint: Checkpoint | None = None,
+    resume_from: dict | None = None,
+) -> AsyncGenerator[SSEEvent, None]:
+    """Run the full 5-agent pipeline, yielding SSE events.
+
+    Each agent's raw text and parsed JSON are passed to `checkpoint` as soon
+    as it finishes. Agents present in `resume_from` (agent name -> checkpoint)
+    are not called again: their checkpointed output is replayed to
+    subscribers and the run continues from the first incomplete agent.
+    """
+    resume_from = resume_from or {}
+    if resume_from:
+        logger.info("[Pipeline] Resuming with checkpoints for: %s", ", ".join(resume_from))
+
+    await budget_planner.ready()
     pipeline_start = time.time()
     logger.info("=" * 60)
     logger.info(f"[Pipeline] Starting analysis for {config.country}")
@@ -43,107 +450,309 @@ async def run_analysis_pipeline(config: AnalysisConfig) -> AsyncGenerator[str, N
     signal_hunter_output = ""
     corroboration_output = ""
     devils_advocate_output = ""
+    token_usage = {}
+    planned = {}  # agent -> budgets of its calls this run
 
     # ── Agent 0: Country Context Discovery ──
     agent_start = time.time()
     logger.info("[Agent 0/4] CONTEXT DISCOVERY — Starting for %s", config.country)
-    yield SSEEvent(type="agent_start", agent="context", status="searching").to_sse()
-
-    context_prompt = f"""Establish the baseline profile for {config.country} (scope: {scope_str}).
+    yield SSEEvent(type="agent_start", agent="context", status="searching")
+
+    checkpointed = resume_from.get("context")
+    baseline = None
+    if not checkpointed and not config.refresh_context:
+        baseline = await asyncio.to_thread(baseline_store.get, config.country, config.scope.value, config.department_name)
+
+    if checkpointed:
+        country_context, context_json = checkpointed.get("raw") or "", checkpointed.get("data")
+        for sse in _restore_events("context", checkpointed, token_usage):
+            yield sse
+        yield SSEEvent(type="agent_complete", agent="context", data=context_json)
+    elif baseline:
+        age_hours = (time.time() - baseline["created_at"]) / 3600
+        country_context = baseline["context_text"]
+        context_json = baseline["context_json"]
+        yield SSEEvent(type="agent_progress", agent="context", status="cached",
+                       message=f"Reusing country baseline from {age_hours:.1f}h ago")
+        yield SSEEvent(type="agent_chunk", agent="context", content=country_context)
+        yield SSEEvent(type="agent_complete", agent="context", data=context_json)
+        logger.info("[Agent 0/4] CONTEXT DISCOVERY — Reused cached baseline (%.1fh old, %d chars)",
+                    age_hours, len(country_context))
+    else:
+        context_prompt = f"""Establish the baseline profile for {config.country} (scope: {scope_str}).
 Use web search to gather current, real data. Be thorough and specific.
 Time horizon for analysis: {config.horizon} years.
 Priority domains: {domains_str}"""
 
-    async for event in stream_agent_response(COUNTRY_CONTEXT_SYSTEM, context_prompt, use_web_search=True):
-        if event["type"] == "chunk":
-            yield SSEEvent(type="agent_chunk", agent="context", content=event["content"]).to_sse()
-        elif event["type"] == "complete":
-            country_context = event["content"]
-
-    context_json = extract_json_from_response(country_context)
-    yield SSEEvent(type="agent_complete", agent="context", data=context_json).to_sse()
-    logger.info("[Agent 0/4] CONTEXT DISCOVERY — Complete (%.1fs, %d chars, JSON: %s)",
-                time.time() - agent_start, len(country_context), "OK" if context_json else "FAILED")
+        async for event in stream_agent_response(COUNTRY_CONTEXT_SYSTEM, context_prompt, use_web_search=True,
+                                                 budget=_plan_budget(planned, "context", domains=len(config.domains))):
+            if event["type"] == "chunk":
+                yield SSEEvent(type="agent_chunk", agent="context", content=event["content"])
+            elif event["type"] == "complete":
+                country_context = event["content"]
+                _record_usage(token_usage, "context", event.get("usage"))
+
+        context_json = extract_json_from_response(country_context)
+        if context_json:
+            await asyncio.to_thread(baseline_store.put, config.country, config.scope.value,
+                                    config.department_name, country_context, context_json)
+        yield SSEEvent(type="agent_complete", agent="context", data=context_json)
+        logger.info("[Agent 0/4] CONTEXT DISCOVERY — Complete (%.1fs, %d chars, JSON: %s)",
+                    time.time() - agent_start, len(country_context), "OK" if context_json else "FAILED")
+    if not checkpointed:
+        await _save_checkpoint(checkpoint, "context", country_context, context_json, token_usage)
 
     # ── Agent 1: Signal Hunter ──
-    agent_start = time.time()
-    logger.info("[Agent 1/4] SIGNAL HUNTER — Hunting %d weak signals", config.signal_count)
-    yield SSEEvent(type="agent_start", agent="signal_hunter", status="hunting").to_sse()
-
-    signal_prompt = f"""COUNTRY CONTEXT:
-{country_context}
-
-ANALYSIS CONFIGURATION:
+    # Sections shared by several downstream prompts go first, byte-identical,
+    # so they form a cacheable prompt prefix (see stream_agent_response).
+    context_section = f"COUNTRY CONTEXT:\n{country_context}"
+    handoff_savings = {}
+    if COMPACT_HANDOFF and isinstance(context_json, dict):
+        compact = handoff.context_section("COUNTRY CONTEXT", context_json)
+        handoff_savings["context"] = handoff.log_savings("context", context_section, compact)
+        context_section = compact
+
+    def hunter_prompts(count: int, domains: str) -> tuple[str, list[str], str]:
+        system = SIGNAL_HUNTER_SYSTEM.replace("{signal_count}", str(count)).replace("{domains}", domains).replace("{horizon}", str(config.horizon))
+        prompt = f"""ANALYSIS CONFIGURATION:
 - Country: {config.country}
 - Scope: {scope_str}
 - Time Horizon: {config.horizon} years
-- Number of signals to find: {config.signal_count}
-- Priority domains: {domains_str}
+- Number of signals to find: {count}
+- Priority domains: {domains}
 {custom_str}
 
-Hunt for {config.signal_count} weak signals. Use web search to find REAL, CURRENT evidence. Focus on Tier 1 (deep weak signals) and Tier 2 (intermediate signals). DO NOT report obvious/strong signals that any analyst would already know."""
-
-    hunter_system = SIGNAL_HUNTER_SYSTEM.replace("{signal_count}", str(config.signal_count)).replace("{domains}", domains_str).replace("{horizon}", str(config.horizon))
+Hunt for {count} weak signals. Use web search to find REAL, CURRENT evidence. Focus on Tier 1 (deep weak signals) and Tier 2 (intermediate signals). DO NOT report obvious/strong signals that any analyst would already know."""
+        return system, [context_section], prompt
 
-    async for event in stream_agent_response(hunter_system, signal_prompt, use_web_search=True):
-        if event["type"] == "chunk":
-            yield SSEEvent(type="agent_chunk", agent="signal_hunter", content=event["content"]).to_sse()
-        elif event["type"] == "complete":
-            signal_hunter_output = event["content"]
-
-    signals_json = extract_json_from_response(signal_hunter_output)
+    signals_json = None
     signal_count = 0
-    if signals_json and isinstance(signals_json, dict) and "signals" in signals_json:
-        signal_count = len(signals_json["signals"])
-    yield SSEEvent(type="agent_complete", agent="signal_hunter", data=signals_json).to_sse()
-    logger.info("[Agent 1/4] SIGNAL HUNTER — Complete (%.1fs, %d chars, %d signals found, JSON: %s)",
-                time.time() - agent_start, len(signal_hunter_output), signal_count, "OK" if signals_json else "FAILED")
+
+    async def hunt() -> AsyncGenerator[SSEEvent, None]:
+        nonlocal signal_hunter_output, signals_json, signal_count
+        agent_start = time.time()
+        logger.info("[Agent 1/4] SIGNAL HUNTER — Hunting %d weak signals", config.signal_count)
+        yield SSEEvent(type="agent_start", agent="signal_hunter", status="hunting")
+
+        domain_groups = min(SIGNAL_HUNTER_DOMAIN_GROUPS, len(config.domains), config.signal_count)
+        checkpointed = resume_from.get("signal_hunter")
+        if checkpointed:
+            signal_hunter_output = checkpointed.get("raw") or ""
+            for sse in _restore_events("signal_hunter", checkpointed, token_usage):
+                yield sse
+        elif domain_groups > 1:
+            groups = _split_evenly(config.domains, domain_groups)
+            budgets = [len(b) for b in _split_evenly(range(config.signal_count), domain_groups)]
+            logger.info("[Agent 1/4] SIGNAL HUNTER — Hunting %d domain groups concurrently (fan-out %d): %s",
+                        domain_groups, SIGNAL_HUNTER_FAN_OUT, [f"{'/'.join(g)}={n}" for g, n in zip(groups, budgets)])
+
+            group_calls = [hunter_prompts(budget, ", ".join(group)) for group, budget in zip(groups, budgets)]
+            group_budgets = [_plan_budget(planned, "signal_hunter", n, len(group)) for group, n in zip(groups, budgets)]
+            group_outputs = []
+            async for sse in _stream_shards("signal_hunter", group_calls, True, SIGNAL_HUNTER_FAN_OUT,
+                                            group_outputs, token_usage, group_budgets):
+                yield sse
+
+            hunted = _merge_shard_lists(group_outputs, "signals", "[Agent 1/4] SIGNAL HUNTER")
+            signal_hunter_output = _as_json_block({"signals": hunted})
+        else:
+            hunter_system, hunter_prefix, signal_prompt = hunter_prompts(config.signal_count, domains_str)
+
+            partials = IncrementalJSONExtractor(watch=PARTIAL_KEYS["signal_hunter"])
+            async for event in stream_agent_response(hunter_system, signal_prompt, use_web_search=True,
+                                                     cache_prefix=hunter_prefix,
+                                                     budget=_plan_budget(planned, "signal_hunter", config.signal_count,
+                                                                         len(config.domains))):
+                if event["type"] == "chunk":
+                    yield SSEEvent(type="agent_chunk", agent="signal_hunter", content=event["content"])
+                    for sse in _partial_events("signal_hunter", partials, event["content"]):
+                        yield sse
+                elif event["type"] == "complete":
+                    signal_hunter_output = event["content"]
+                    _record_usage(token_usage, "signal_hunter", event.get("usage"))
+
+        signals_json = extract_json_from_response(signal_hunter_output)
+
+        # ── In-run dedup: one representative per cluster of near-identical signals ──
+        # Domain groups hunt independently and number their signals from 1 each,
+        # so their merge is always deduplicated and renumbered.
+        sharded = domain_groups > 1 and not checkpointed
+        if (SIGNAL_DEDUP or sharded) and isinstance(signals_json, dict) and isinstance(signals_json.get("signals"), list):
+            hunted = [s for s in signals_json["signals"] if isinstance(s, dict)]
+            kept, merges = deduplicate_signals(hunted, renumber=True)
+            if merges or sharded:
+                signals_json = {**signals_json, "signals": kept}
+                if merges:
+                    signals_json["dedup"] = _dedup_report(hunted, kept, merges)
+                signal_hunter_output = _as_json_block(signals_json)
+
+        if signals_json and isinstance(signals_json, dict) and "signals" in signals_json:
+            signal_count = len(signals_json["signals"])
+        yield SSEEvent(type="agent_complete", agent="signal_hunter", data=signals_json)
+        logger.info("[Agent 1/4] SIGNAL HUNTER — Complete (%.1fs, %d chars, %d signals found, JSON: %s)",
+                    time.time() - agent_start, len(signal_hunter_output), signal_count, "OK" if signals_json else "FAILED")
+        if not checkpointed:
+            await _save_checkpoint(checkpoint, "signal_hunter", signal_hunter_output, signals_json, token_usage)
+
+    corroboration_instructions = "For each signal above, search for INDEPENDENT cross-modal corroboration using web search. Different data types count more than multiple articles saying the same thing. Update reliability scores based on corroboration strength."
+    devils_instructions = "For each signal, construct the STRONGEST mundane explanation. Try to kill every signal. Be the smartest skeptic. But be honest — if you can't explain it away, say so."
+
+    def signals_batch_section(title: str, batch: list, brief: bool) -> str:
+        if COMPACT_HANDOFF:
+            return handoff.signals_section(title, batch, brief=brief)
+        return f"{title}:\n{_as_json_block({'signals': batch})}"
+
+    def corroboration_batch_call(title: str, batch: list) -> BatchCall:
+        return CORROBORATION_SYSTEM, [context_section], f"""{signals_batch_section(title, batch, brief=True)}
+
+{corroboration_instructions}"""
+
+    def devils_batch_call(title: str, batch: list, batch_corroboration: list | None) -> BatchCall:
+        if batch_corroboration is None:
+            batch_corroboration_section = corroboration_section
+        elif COMPACT_HANDOFF:
+            batch_corroboration_section = handoff.corroboration_section("CORROBORATION RESULTS", batch_corroboration)
+        else:
+            batch_corroboration_section = f"CORROBORATION RESULTS:\n{_as_json_block({'corroborated_signals': batch_corroboration})}"
+        return DEVILS_ADVOCATE_SYSTEM, [context_section], f"""{signals_batch_section(title, batch, brief=False)}
+
+{batch_corroboration_section}
+
+{devils_instructions}"""
+
+    # Overlap hunting, corroboration and challenge unless one of the later two
+    # stages is already checkpointed (a restored Signal Hunter just yields no
+    # streamed signals, so every batch starts once it is replayed).
+    overlapped = {}
+    overlap = PIPELINED_STAGES and not resume_from.get("corroboration") and not resume_from.get("devils_advocate")
+    if overlap:
+        logger.info("[Pipeline] Overlapping Signal Hunter, Corroboration and Devil's Advocate "
+                    "(batches of %d, fan-out %d)", PIPELINE_BATCH_SIZE, PIPELINE_FAN_OUT)
+        async for sse in _overlap_stages(
+            hunt(),
+            lambda: signals_json.get("signals") if isinstance(signals_json, dict) else None,
+            lambda i, batch: corroboration_batch_call(f"SIGNALS TO CORROBORATE (from Signal Hunter, batch {i + 1})", batch),
+            lambda i, batch, found: devils_batch_call(f"SIGNALS IDENTIFIED (Signal Hunter, batch {i + 1})", batch, found),
+            planned, token_usage, overlapped,
+        ):
+            yield sse
+    else:
+        async for sse in hunt():
+            yield sse
+
+    hunted_signals = signals_json.get("signals") if isinstance(signals_json, dict) else None
+    hunter_section = f"SIGNAL HUNTER FINDINGS:\n{signal_hunter_output}"
+    hunter_brief_section = hunter_section
+    if COMPACT_HANDOFF and isinstance(hunted_signals, list):
+        hunter_brief_section = handoff.signals_section("SIGNAL HUNTER FINDINGS", hunted_signals, brief=True)
+        compact = handoff.signals_section("SIGNAL HUNTER FINDINGS", hunted_signals)
+        handoff_savings["signal_hunter"] = handoff.log_savings("signal_hunter", hunter_section, compact)
+        hunter_section = compact
 
     # ── Agent 2: Corroboration Agent ──
-    agent_start = time.time()
+    agent_start = overlapped.get("started", {}).get("corroboration", time.time())
     logger.info("[Agent 2/4] CORROBORATION — Cross-validating %d signals", signal_count)
-    yield SSEEvent(type="agent_start", agent="corroboration", status="cross-validating").to_sse()
-
-    corroboration_prompt = f"""COUNTRY CONTEXT:
-{country_context}
-
-SIGNALS TO CORROBORATE (from Signal Hunter):
-{signal_hunter_output}
-
-For each signal above, search for INDEPENDENT cross-modal corroboration using web search. Different data types count more than multiple articles saying the same thing. Update reliability scores based on corroboration strength."""
-
-    async for event in stream_agent_response(CORROBORATION_SYSTEM, corroboration_prompt, use_web_search=True):
-        if event["type"] == "chunk":
-            yield SSEEvent(type="agent_chunk", agent="corroboration", content=event["content"]).to_sse()
-        elif event["type"] == "complete":
-            corroboration_output = event["content"]
+    if not overlap:
+        yield SSEEvent(type="agent_start", agent="corroboration", status="cross-validating")
+
+    checkpointed = resume_from.get("corroboration")
+    if overlap:
+        corroboration_output = _as_json_block({"corroborated_signals": overlapped["corroborated"]})
+    elif checkpointed:
+        corroboration_output = checkpointed.get("raw") or ""
+        for sse in _restore_events("corroboration", checkpointed, token_usage):
+            yield sse
+    elif CORROBORATION_SHARD_SIZE > 0 and isinstance(hunted_signals, list) and len(hunted_signals) > CORROBORATION_SHARD_SIZE:
+        shards = _batches(hunted_signals, CORROBORATION_SHARD_SIZE)
+        logger.info("[Agent 2/4] CORROBORATION — Sharding into %d batches of up to %d signals (fan-out %d)",
+                    len(shards), CORROBORATION_SHARD_SIZE, CORROBORATION_FAN_OUT)
+        shard_calls = [corroboration_batch_call(f"SIGNALS TO CORROBORATE (from Signal Hunter, batch {i + 1} of {len(shards)})", batch)
+                       for i, batch in enumerate(shards)]
+
+        shard_outputs = []
+        async for sse in _stream_shards("corroboration", shard_calls, True, CORROBORATION_FAN_OUT,
+                                        shard_outputs, token_usage,
+                                        [_plan_budget(planned, "corroboration", len(batch)) for batch in shards]):
+            yield sse
+
+        corroborated = _merge_shard_lists(shard_outputs, "corroborated_signals", "[Agent 2/4] CORROBORATION")
+        corroboration_output = _as_json_block({"corroborated_signals": corroborated})
+    else:
+        partials = IncrementalJSONExtractor(watch=PARTIAL_KEYS["corroboration"])
+        async for event in stream_agent_response(CORROBORATION_SYSTEM, corroboration_instructions, use_web_search=True,
+                                                 cache_prefix=[context_section, hunter_brief_section],
+                                                 budget=_plan_budget(planned, "corroboration", signal_count)):
+            if event["type"] == "chunk":
+                yield SSEEvent(type="agent_chunk", agent="corroboration", content=event["content"])
+                for sse in _partial_events("corroboration", partials, event["content"]):
+                    yield sse
+            elif event["type"] == "complete":
+                corroboration_output = event["content"]
+                _record_usage(token_usage, "corroboration", event.get("usage"))
 
     corroboration_json = extract_json_from_response(corroboration_output)
-    yield SSEEvent(type="agent_complete", agent="corroboration", data=corroboration_json).to_sse()
+    yield SSEEvent(type="agent_complete", agent="corroboration", data=corroboration_json)
     logger.info("[Agent 2/4] CORROBORATION — Complete (%.1fs, %d chars, JSON: %s)",
                 time.time() - agent_start, len(corroboration_output), "OK" if corroboration_json else "FAILED")
+    if not checkpointed:
+        await _save_checkpoint(checkpoint, "corroboration", corroboration_output, corroboration_json, token_usage)
+
+    corroboration_section = f"CORROBORATION RESULTS:\n{corroboration_output}"
+    corroborated = corroboration_json.get("corroborated_signals") if isinstance(corroboration_json, dict) else None
+    if COMPACT_HANDOFF and isinstance(corroborated, list):
+        compact = handoff.corroboration_section("CORROBORATION RESULTS", corroborated)
+        handoff_savings["corroboration"] = handoff.log_savings("corroboration", corroboration_section, compact)
+        corroboration_section = compact
 
     # ── Agent 3: Devil's Advocate ──
-    agent_start = time.time()
+    agent_start = overlapped.get("started", {}).get("devils_advocate", time.time())
     logger.info("[Agent 3/4] DEVIL'S ADVOCATE — Challenging signals")
-    yield SSEEvent(type="agent_start", agent="devils_advocate", status="challenging").to_sse()
-
-    devils_prompt = f"""COUNTRY CONTEXT:
-{country_context}
-
-SIGNALS IDENTIFIED (Signal Hunter):
-{signal_hunter_output}
-
-CORROBORATION RESULTS:
-{corroboration_output}
-
-For each signal, construct the STRONGEST mundane explanation. Try to kill every signal. Be the smartest skeptic. But be honest — if you can't explain it away, say so."""
-
-    async for event in stream_agent_response(DEVILS_ADVOCATE_SYSTEM, devils_prompt, use_web_search=False):
-        if event["type"] == "chunk":
-            yield SSEEvent(type="agent_chunk", agent="devils_advocate", content=event["content"]).to_sse()
-        elif event["type"] == "complete":
-            devils_advocate_output = event["content"]
+    if not overlap:
+        yield SSEEvent(type="agent_start", agent="devils_advocate", status="challenging")
+
+    checkpointed = resume_from.get("devils_advocate")
+    if overlap:
+        devils_advocate_output = _as_json_block({"debunking_results": overlapped["debunked"]})
+    elif checkpointed:
+        devils_advocate_output = checkpointed.get("raw") or ""
+        for sse in _restore_events("devils_advocate", checkpointed, token_usage):
+            yield sse
+    elif DEVILS_ADVOCATE_BATCH_SIZE > 0 and isinstance(hunted_signals, list) and len(hunted_signals) > DEVILS_ADVOCATE_BATCH_SIZE:
+        batches = _batches(hunted_signals, DEVILS_ADVOCATE_BATCH_SIZE)
+        logger.info("[Agent 3/4] DEVIL'S ADVOCATE — Challenging %d batches of up to %d signals (fan-out %d)",
+                    len(batches), DEVILS_ADVOCATE_BATCH_SIZE, DEVILS_ADVOCATE_FAN_OUT)
+        batch_calls = []
+        for i, batch in enumerate(batches):
+            batch_ids = {sig.get("id") for sig in batch if isinstance(sig, dict)}
+            batch_corroboration = None if corroborated is None else [
+                c for c in corroborated if isinstance(c, dict) and c.get("signal_id") in batch_ids]
+            batch_calls.append(devils_batch_call(f"SIGNALS IDENTIFIED (Signal Hunter, batch {i + 1} of {len(batches)})",
+                                                 batch, batch_corroboration))
+
+        batch_outputs = []
+        async for sse in _stream_shards("devils_advocate", batch_calls, False, DEVILS_ADVOCATE_FAN_OUT,
+                                        batch_outputs, token_usage,
+                                        [_plan_budget(planned, "devils_advocate", len(batch)) for batch in batches]):
+            yield sse
+
+        debunked = _merge_shard_lists(batch_outputs, "debunking_results", "[Agent 3/4] DEVIL'S ADVOCATE")
+        devils_advocate_output = _as_json_block({"debunking_results": debunked})
+    else:
+        devils_prompt = f"""{corroboration_section}
+
+{devils_instructions}"""
+
+        partials = IncrementalJSONExtractor(watch=PARTIAL_KEYS["devils_advocate"])
+        async for event in stream_agent_response(DEVILS_ADVOCATE_SYSTEM, devils_prompt, use_web_search=False,
+                                                 cache_prefix=[context_section, hunter_section],
+                                                 budget=_plan_budget(planned, "devils_advocate", signal_count)):
+            if event["type"] == "chunk":
+                yield SSEEvent(type="agent_chunk", agent="devils_advocate", content=event["content"])
+                for sse in _partial_events("devils_advocate", partials, event["content"]):
+                    yield sse
+            elif event["type"] == "complete":
+                devils_advocate_output = event["content"]
+                _record_usage(token_usage, "devils_advocate", event.get("usage"))
 
     devils_json = extract_json_from_response(devils_advocate_output)
     survived = 0
@@ -151,32 +760,45 @@ For each signal, construct the STRONGEST mundane explanation. Try to kill every
         survived = sum(1 for r in devils_json["debunking_results"] if r.get("verdict") == "survives")
         total = len(devils_json["debunking_results"])
         logger.info("[Agent 3/4] DEVIL'S ADVOCATE — %d/%d signals survived", survived, total)
-    yield SSEEvent(type="agent_complete", agent="devils_advocate", data=devils_json).to_sse()
+    yield SSEEvent(type="agent_complete", agent="devils_advocate", data=devils_json)
     logger.info("[Agent 3/4] DEVIL'S ADVOCATE — Complete (%.1fs, %d chars, JSON: %s)",
                 time.time() - agent_start, len(devils_advocate_output), "OK" if devils_json else "FAILED")
+    if not checkpointed:
+        await _save_checkpoint(checkpoint, "devils_advocate", devils_advocate_output, devils_json, token_usage)
+
+    devils_section = f"DEVIL'S ADVOCATE RESULTS:\n{devils_advocate_output}"
+    debunking_results = devils_json.get("debunking_results") if isinstance(devils_json, dict) else None
+    if COMPACT_HANDOFF and isinstance(debunking_results, list):
+        compact = handoff.debunking_section("DEVIL'S ADVOCATE RESULTS", debunking_results)
+        handoff_savings["devils_advocate"] = handoff.log_savings("devils_advocate", devils_section, compact)
+        devils_section = compact
 
     # ── Agent 4: Synthesis Agent ──
     agent_start = time.time()
     logger.info("[Agent 4/4] SYNTHESIS — Mapping constellations and fingerprints")
-    yield SSEEvent(type="agent_start", agent="synthesis", status="synthesizing").to_sse()
-
-    synthesis_prompt = f"""COUNTRY: {config.country}
+    yield SSEEvent(type="agent_start", agent="synthesis", status="synthesizing")
+
+    fingerprint_matches = []
+    fingerprint_section = ""
+    if FINGERPRINT_HINTS:
+        match_start = time.perf_counter()
+        fingerprint_matches = await asyncio.to_thread(
+            fingerprints.fingerprint_library.match,
+            fingerprints.surviving_signals(hunted_signals, debunking_results), fingerprints.MIN_SCORE)
+        logger.info("[Agent 4/4] SYNTHESIS — Local fingerprint matches in %.1fms: %s",
+                    (time.perf_counter() - match_start) * 1000,
+                    ", ".join(f"{m['id']}={m['score']:.2f}" for m in fingerprint_matches) or "none")
+        fingerprint_section = "\n\n" + fingerprints.hints_section(fingerprint_matches)
+        yield SSEEvent(type="agent_progress", agent="synthesis", status="fingerprint_hints",
+                       data={"matches": fingerprint_matches[:fingerprints.HINT_LIMIT]})
+
+    synthesis_prompt = f"""{devils_section}{fingerprint_section}
+
+COUNTRY: {config.country}
 SCOPE: {scope_str}
 TIME HORIZON: {config.horizon} years
 PRIORITY DOMAINS: {domains_str}
 
-COUNTRY CONTEXT:
-{country_context}
-
-SIGNAL HUNTER FINDINGS:
-{signal_hunter_output}
-
-CORROBORATION RESULTS:
-{corroboration_output}
-
-DEVIL'S ADVOCATE RESULTS:
-{devils_advocate_output}
-
 Now synthesize everything:
 1. Map surviving signals into constellations
 2. Match against historical pre-crisis fingerprints
@@ -188,11 +810,23 @@ Now synthesize everything:
 Remember: Category (c) fingerprint matches — where the current weak signal constellation matches a known pre-crisis pattern — are the HIGHEST VALUE output."""
 
     synthesis_output = ""
-    async for event in stream_agent_response(SYNTHESIS_SYSTEM, synthesis_prompt, use_web_search=False):
-        if event["type"] == "chunk":
-            yield SSEEvent(type="agent_chunk", agent="synthesis", content=event["content"]).to_sse()
-        elif event["type"] == "complete":
-            synthesis_output = event["content"]
+    checkpointed = resume_from.get("synthesis")
+    if checkpointed:
+        synthesis_output = checkpointed.get("raw") or ""
+        for sse in _restore_events("synthesis", checkpointed, token_usage):
+            yield sse
+    else:
+        partials = IncrementalJSONExtractor(watch=PARTIAL_KEYS["synthesis"])
+        async for event in stream_agent_response(SYNTHESIS_SYSTEM, synthesis_prompt, use_web_search=False,
+                                                 cache_prefix=[context_section, hunter_section, corroboration_section],
+                                                 budget=_plan_budget(planned, "synthesis", signal_count)):
+            if event["type"] == "chunk":
+                yield SSEEvent(type="agent_chunk", agent="synthesis", content=event["content"])
+                for sse in _partial_events("synthesis", partials, event["content"]):
+                    yield sse
+            elif event["type"] == "complete":
+                synthesis_output = event["content"]
+                _record_usage(token_usage, "synthesis", event.get("usage"))
 
     synthesis_json = extract_json_from_response(synthesis_output)
 
@@ -204,16 +838,7 @@ Remember: Category (c) fingerprint matches — where the current weak signal con
     # Apply scoring from code to ensure consistency
     if synthesis_json and "scored_signals" in synthesis_json:
         for signal in synthesis_json["scored_signals"]:
-            scores = signal.get("scores", {})
-            computed = compute_scores(
-                scores.get("impact", 50),
-                scores.get("lead_time", 50),
-                scores.get("reliability", 50),
-            )
-            signal["scores"]["near_term"] = computed.near_term
-            signal["scores"]["structural"] = computed.structural
-            signal["scores"]["overall"] = computed.overall
-            signal["risk_band"] = computed.risk_band.value
+            _apply_code_scores(signal)
 
         # Log final scores summary
         for s in synthesis_json["scored_signals"]:
@@ -235,9 +860,11 @@ Remember: Category (c) fingerprint matches — where the current weak signal con
         logger.info("  [Assessment] %s | Risk: %s | Confidence: %s",
                     oa.get("headline", "?"), oa.get("risk_level", "?"), oa.get("confidence", "?"))
 
-    yield SSEEvent(type="agent_complete", agent="synthesis", data=synthesis_json).to_sse()
+    yield SSEEvent(type="agent_complete", agent="synthesis", data=synthesis_json)
     logger.info("[Agent 4/4] SYNTHESIS — Complete (%.1fs, %d chars, JSON: %s)",
                 time.time() - agent_start, len(synthesis_output), "OK" if synthesis_json else "FAILED")
+    if not checkpointed:
+        await _save_checkpoint(checkpoint, "synthesis", synthesis_output, synthesis_json, token_usage)
 
     # ── Final: Complete Analysis ──
     final_data = {
@@ -249,9 +876,24 @@ Remember: Category (c) fingerprint matches — where the current weak signal con
             "devils_advocate": devils_json,
             "synthesis": synthesis_json,
         },
+        "token_usage": token_usage,
+        "handoff_savings": handoff_savings,
+        "budgets": planned,
     }
+    if FINGERPRINT_HINTS:
+        final_data["fingerprint_matches"] = fingerprint_matches
+    dedup = signals_json.get("dedup") if isinstance(signals_json, dict) else None
+    if dedup:
+        final_data["dedup"] = _dedup_savings(dedup, token_usage)
+    if overlap:
+        final_data["overlap"] = overlapped["overlap"]
+
+    yield SSEEvent(type="analysis_complete", data=final_data)
 
-    yield SSEEvent(type="analysis_complete", data=final_data).to_sse()
+    for agent, usage in token_usage.items():
+        logger.info("  [Tokens] %-16s | input: %7d | cache read: %7d | cache write: %7d | output: %6d",
+                    agent, usage.get("input_tokens", 0), usage.get("cache_read_input_tokens", 0),
+                    usage.get("cache_creation_input_tokens", 0), usage.get("output_tokens", 0))
 
     total_time = time.time() - pipeline_start
     logger.info("=" * 60)
@@ -259,27 +901,86 @@ Remember: Category (c) fingerprint matches — where the current weak signal con
     logger.info("=" * 60)
 
 
-async def run_what_if(config: AnalysisConfig, existing_analysis: dict, scenario: str) -> AsyncGenerator[str, None]:
+def what_if_prefix(config: AnalysisConfig, existing_analysis: dict) -> str:
+    """The cached prompt prefix of What-If calls on one analysis."""
+    if COMPACT_HANDOFF:
+        return handoff.what_if_context_section(config.country, existing_analysis)
+    return f"""COUNTRY: {config.country}
+
+EXISTING ANALYSIS:
+{json.dumps(existing_analysis, indent=2, default=str)}"""
+
+
+async def run_what_if(
+    config: AnalysisConfig,
+    existing_analysis: dict,
+    scenario: str,
+    analysis_section: str | None = None,
+) -> AsyncGenerator[SSEEvent, None]:
     """Run a what-if scenario on an existing analysis."""
 
     logger.info("[What-If] Starting scenario: '%s' for %s", scenario[:80], config.country)
-    yield SSEEvent(type="agent_start", agent="what_if", status="simulating").to_sse()
+    yield SSEEvent(type="agent_start", agent="what_if", status="simulating")
 
-    what_if_prompt = f"""COUNTRY: {config.country}
-SCENARIO: {scenario}
+    if analysis_section is None:
+        analysis_section = what_if_prefix(config, existing_analysis)
+    # Scenario-specific hints stay out of the shared prefix
+    focus = handoff.scenario_focus(scenario, existing_analysis) if COMPACT_HANDOFF else ""
+    focus_block = f"{focus}\n\n" if focus else ""
 
-EXISTING ANALYSIS:
-{json.dumps(existing_analysis, indent=2, default=str)}
+    what_if_prompt = f"""SCENARIO: {scenario}
 
-Evaluate how this scenario would change the risk landscape. Which existing signals get amplified or diminished? What NEW signals would emerge? Map the cascade propagation paths."""
+{focus_block}Evaluate how this scenario would change the risk landscape. Which existing signals get amplified or diminished? What NEW signals would emerge? Map the cascade propagation paths."""
 
     what_if_output = ""
-    async for event in stream_agent_response(WHAT_IF_SYSTEM, what_if_prompt, use_web_search=True):
+    usage = {}
+    await budget_planner.ready()
+    async for event in stream_agent_response(WHAT_IF_SYSTEM, what_if_prompt, use_web_search=True,
+                                             cache_prefix=[analysis_section], budget=budget_planner.plan("what_if")):
         if event["type"] == "chunk":
-            yield SSEEvent(type="agent_chunk", agent="what_if", content=event["content"]).to_sse()
+            yield SSEEvent(type="agent_chunk", agent="what_if", content=event["content"])
         elif event["type"] == "complete":
             what_if_output = event["content"]
+            usage = event.get("usage") or {}
 
     what_if_json = extract_json_from_response(what_if_output)
-    yield SSEEvent(type="agent_complete", agent="what_if", data=what_if_json).to_sse()
-    logger.info("[What-If] Complete (%d chars, JSON: %s)", len(what_if_output), "OK" if what_if_json else "FAILED")
+    yield SSEEvent(type="agent_complete", agent="what_if", data=what_if_json)
+    logger.info("[What-If] Complete (%d chars, JSON: %s, cache read: %d, cache write: %d tokens)",
+                len(what_if_output), "OK" if what_if_json else "FAILED",
+                usage.get("cache_read_input_tokens", 0), usage.get("cache_creation_input_tokens", 0))
+
+
+async def run_what_if_batch(
+    config: AnalysisConfig,
+    existing_analysis: dict,
+    scenarios: list[str],
+) -> AsyncGenerator[tuple[int, SSEEvent], None]:
+    """Run several what-if scenarios on one analysis concurrently, yielding
+    (scenario index, event) with each scenario's chunks already coalesced.
+    A failing scenario ends with an error event and does not affect the others.
+
+    All calls share one cached prefix. The first scenario starts alone and the
+    rest follow once it is streaming, by which point the prefix is in the
+    prompt cache and they read it instead of each writing it again.
+    """
+    analysis_section = what_if_prefix(config, existing_analysis)
+    primed = asyncio.Event()
+    logger.info("[What-If] Batch of %d scenarios for %s (shared prefix ~%d tokens)",
+                len(scenarios), config.country, len(analysis_section) // handoff.CHARS_PER_TOKEN)
+
+    async def scenario_stream(index: int, scenario: str) -> AsyncIterator[SSEEvent]:
+        if index:
+            await primed.wait()
+        try:
+            async for event in coalesce_chunks(run_what_if(config, existing_analysis, scenario, analysis_section)):
+                if event.type in ("agent_chunk", "agent_complete"):
+                    primed.set()
+                yield event
+        except Exception as e:
+            logger.error("[What-If] Scenario %d failed: %s: %s", index, type(e).__name__, e)
+            yield SSEEvent(type="error", agent="what_if", message=str(e))
+        finally:
+            primed.set()
+
+    async for index, event in _merge_streams([scenario_stream(i, s) for i, s in enumerate(scenarios)]):
+        yield index, event
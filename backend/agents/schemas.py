@@ -3,13 +3,14 @@ from typing import Optional, Union, List, Dict, Any
 
 
 class SSEEvent(BaseModel):
-    type: str  # agent_start, agent_chunk, agent_complete, analysis_complete, error
+    type: str  # agent_start, agent_chunk, agent_partial, agent_progress, agent_complete, analysis_complete, error
     agent: Optional[str] = None
+    shard: Optional[int] = None  # set when an agent runs as several concurrent calls
     content: Optional[str] = None
     data: Optional[Union[Dict[str, Any], List[Any]]] = None
     status: Optional[str] = None
     message: Optional[str] = None
 
     def to_sse(self) -> str:
-        import json
-        return json.dumps(self.model_dump(exclude_none=True))
+        """Serialize for the wire. Events travel as objects until here, so this runs once per event."""
+        return self.model_dump_json(exclude_none=True)
@@ -0,0 +1,74 @@
+import os
+import asyncio
+from typing import AsyncGenerator, AsyncIterator
+
+from backend.agents.schemas import SSEEvent
+
+# Consecutive text deltas from the same agent (and shard) are merged into one
+# agent_chunk event, flushed after SSE_FLUSH_INTERVAL_MS or once
+# SSE_MAX_COALESCED_CHARS are buffered. An interval of 0 disables coalescing.
+FLUSH_INTERVAL = float(os.getenv("SSE_FLUSH_INTERVAL_MS", "50")) / 1000
+MAX_COALESCED_CHARS = int(os.getenv("SSE_MAX_COALESCED_CHARS", "2048"))
+
+
+async def coalesce_chunks(
+    events: AsyncIterator[SSEEvent],
+    flush_interval: float = FLUSH_INTERVAL,
+    max_chars: int = MAX_COALESCED_CHARS,
+) -> AsyncGenerator[SSEEvent, None]:
+    """Merge runs of agent_chunk events by time and size; pass other events through in order."""
+    if flush_interval <= 0:
+        async for event in events:
+            yield event
+        return
+
+    loop = asyncio.get_running_loop()
+    source = events.__aiter__()
+    next_event = None
+    buffer, buffer_key, buffer_size, deadline = [], None, 0, 0.0
+
+    def flush() -> SSEEvent:
+        nonlocal buffer, buffer_size
+        agent, shard = buffer_key
+        event = SSEEvent(type="agent_chunk", agent=agent, shard=shard, content="".join(buffer))
+        buffer, buffer_size = [], 0
+        return event
+
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(source.__anext__())
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({next_event}, timeout=timeout)
+            if not done:
+                yield flush()
+                continue
+
+            try:
+                event = next_event.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                if done:
+                    next_event = None
+
+            if event.type == "agent_chunk":
+                key = (event.agent, event.shard)
+                if buffer and key != buffer_key:
+                    yield flush()
+                if not buffer:
+                    buffer_key, deadline = key, loop.time() + flush_interval
+                buffer.append(event.content or "")
+                buffer_size += len(event.content or "")
+                if buffer_size >= max_chars:
+                    yield flush()
+            else:
+                if buffer:
+                    yield flush()
+                yield event
+
+        if buffer:
+            yield flush()
+    finally:
+        if next_event is not None:
+            next_event.cancel()
@@ -0,0 +1,109 @@
+"""Load test: event-loop lag while N analysis pipelines stream concurrently.
+
+Runs ``run_analysis_pipeline`` N times in parallel against the fake Anthropic
+transport and samples how late a 5 ms ticker wakes up. A blocking Claude call
+anywhere in the path shows up as lag in the order of the whole stream length.
+
+The same ticker is first sampled on an idle loop, and the gates are on how much
+the pipelines add to that baseline. On a shared or virtualised host a wake-up
+is often late because the host did not run the process at all, by tens of ms
+under load. So each tick's lag is also capped at the CPU time the loop thread
+used meanwhile. That "loop" figure shows work done on the loop and is held to
+a few ms. Waits that block the loop without using CPU, such as sync I/O, only
+show in the wall-clock figure, which gets a looser gate above host noise.
+
+    python -m backend.bench.event_loop_lag --pipelines 16 --max-lag-ms 8
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+from backend.bench.fake_anthropic import FakeAnthropic, install
+from backend.agents.orchestrator import run_analysis_pipeline
+from backend.agents.streaming import coalesce_chunks
+from backend.models.analysis import AnalysisConfig
+
+TICK = 0.005
+
+
+async def _sample_lag(samples: list[tuple[float, float]], stop: asyncio.Event):
+    """Appends (wall-clock lag, lag capped at the loop thread's CPU time) per tick."""
+    while not stop.is_set():
+        start, cpu = time.perf_counter(), time.thread_time()
+        await asyncio.sleep(TICK)
+        lag = time.perf_counter() - start - TICK
+        samples.append((lag, max(0.0, min(lag, time.thread_time() - cpu))))
+
+
+async def _drain(config: AnalysisConfig) -> int:
+    count = 0
+    async for event in coalesce_chunks(run_analysis_pipeline(config)):
+        event.to_sse()
+        count += 1
+    return count
+
+
+async def _idle_lag(seconds: float) -> list[tuple[float, float]]:
+    samples, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(_sample_lag(samples, stop))
+    await asyncio.sleep(seconds)
+    stop.set()
+    await sampler
+    return samples
+
+
+async def main(pipelines: int, chunk_delay: float, idle_seconds: float) -> tuple[list, list]:
+    """Returns (idle lag samples, lag samples under load)."""
+    idle = await _idle_lag(idle_seconds)
+    install(FakeAnthropic(chunk_delay=chunk_delay))
+    samples, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(_sample_lag(samples, stop))
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(_drain(AnalysisConfig(country=f"Fakeland-{i}")) for i in range(pipelines)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    print(f"{pipelines} pipelines, {sum(counts)} events in {elapsed:.2f}s")
+    return idle, samples
+
+
+def _report(label: str, lags: list[float]) -> float:
+    """Print lag percentiles and return p99 in ms."""
+    lags = sorted(lags)
+    p50 = statistics.median(lags) * 1000
+    p99 = lags[int(len(lags) * 0.99) - 1] * 1000
+    print(f"{label} event-loop lag over {len(lags)} ticks: p50={p50:.2f}ms p99={p99:.2f}ms max={lags[-1] * 1000:.2f}ms")
+    return p99
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pipelines", type=int, default=8)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    # The loop's own work under load, mostly the SDK parsing streamed events,
+    # adds about 4.5ms at p99.
+    parser.add_argument("--max-lag-ms", type=float, default=8.0,
+                        help="allowed p99 loop lag over the idle baseline")
+    # Host scheduling alone adds 10-20ms of wall-clock p99 under load; a
+    # blocking wait adds its whole duration on top.
+    parser.add_argument("--max-wall-lag-ms", type=float, default=50.0,
+                        help="allowed p99 wall-clock lag over the idle baseline")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    idle, loaded = asyncio.run(main(args.pipelines, args.chunk_delay, args.idle_seconds))
+    failed = False
+    for column, label, limit in ((1, "loop", args.max_lag_ms), (0, "wall-clock", args.max_wall_lag_ms)):
+        added = (_report(f"loaded {label}", [s[column] for s in loaded])
+                 - _report(f"idle {label}", [s[column] for s in idle]))
+        print(f"p99 {label} lag added by the pipelines: {added:.2f}ms")
+        if added > limit:
+            print(f"FAIL: p99 {label} lag over idle above {limit}ms")
+            failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,167 @@
+"""Fake Anthropic Messages API for load tests and benchmarks.
+
+Serves the real streaming wire format through an ``httpx.MockTransport`` so the
+whole client stack (SDK stream parsing, connection pool, semaphore) is
+exercised without network access or an API key. Response bodies are small but
+schema-correct JSON for whichever agent the system prompt belongs to.
+"""
+import asyncio
+import json
+import random
+import re
+
+import httpx
+
+from backend.services import claude_client
+from backend.services.response_cache import response_cache
+from backend.services.baseline_store import baseline_store
+from backend.services.budget_planner import budget_planner
+
+DOMAINS = ["economy", "infrastructure", "health", "climate", "food_water", "social_cohesion", "security", "energy"]
+VOCABULARY = (
+    "tender pharmacy port remittance diesel fertilizer teacher nurse microfinance bond reserve outage "
+    "procurement visa grain tariff subsidy pension rainfall aquifer generator freight ferry clinic "
+    "wage arrears municipal crypto premium payroll ambulance shipping dwell coolant transformer"
+).split()
+
+
+def _system_text(system) -> str:
+    if isinstance(system, list):
+        return "".join(block.get("text", "") for block in system)
+    return system or ""
+
+
+def _user_text(messages) -> str:
+    content = messages[0]["content"] if messages else ""
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content)
+    return content
+
+
+def _signal_ids(text: str) -> list[str]:
+    ids = list(dict.fromkeys(re.findall(r"signal_\d+", text)))
+    return ids or [f"signal_{i}" for i in range(1, 21)]
+
+
+def fake_agent_output(system: str, user: str) -> dict:
+    """Build a plausible agent JSON payload for the given prompts."""
+    rng = random.Random(hash((system[:64], user[:256])))
+    if system.startswith("You are the Signal Hunter"):
+        match = re.search(r"Hunt for (\d+) weak signals", user)
+        count = int(match.group(1)) if match else 20
+        return {"signals": [
+            {
+                "id": f"signal_{i}",
+                "name": " ".join(rng.sample(VOCABULARY, 3)).capitalize() + " drift",
+                "domain": DOMAINS[i % len(DOMAINS)],
+                "description": "Shift in " + ", ".join(rng.sample(VOCABULARY, 6)) + ".",
+                "why_looks_like_noise": "Small and seasonal-looking.",
+                "why_actually_meaningful": "Persists across several reporting periods.",
+                "data_source": "bench",
+                "evidence": "n/a",
+                "signal_tier": 1,
+                "preliminary_scores": {"impact": rng.randint(20, 90), "lead_time": rng.randint(20, 90),
+                                       "reliability": rng.randint(20, 90)},
+            }
+            for i in range(1, count + 1)
+        ]}
+    if system.startswith("You are the Corroboration Agent"):
+        return {"corroborated_signals": [
+            {"signal_id": sid, "corroboration_strength": "moderate", "modalities_checked": ["news"],
+             "corroborating_evidence": [], "gaps": [], "updated_reliability_score": rng.randint(20, 90),
+             "corroboration_summary": "Synthetic corroboration."}
+            for sid in _signal_ids(user)
+        ]}
+    if system.startswith("You are the Devil's Advocate"):
+        return {"debunking_results": [
+            {"signal_id": sid, "best_mundane_explanation": "Seasonality.", "mundane_plausibility": "medium",
+             "verdict": rng.choice(["survives", "partially_debunked", "debunked"]), "verdict_reasoning": "Synthetic.",
+             "adjusted_scores": {"impact": rng.randint(20, 90), "lead_time": rng.randint(20, 90),
+                                 "reliability": rng.randint(20, 90)}}
+            for sid in _signal_ids(user)
+        ]}
+    if system.startswith("You are the Synthesis Agent"):
+        ids = _signal_ids(user)
+        return {
+            "scored_signals": [
+                {"signal_id": sid, "name": f"Fake {sid}", "domain": DOMAINS[n % len(DOMAINS)],
+                 "scores": {"impact": rng.randint(20, 90), "lead_time": rng.randint(20, 90),
+                            "reliability": rng.randint(20, 90)}}
+                for n, sid in enumerate(ids)
+            ],
+            "constellations": [{"id": "constellation_1", "name": "Fake cluster", "signal_ids": ids[:3],
+                                "category": "correlated_cluster", "cascade_paths": [], "fingerprint_match": None}],
+            "overall_assessment": {"headline": "Synthetic assessment", "risk_level": "amber",
+                                   "confidence": "low", "what_to_watch": []},
+        }
+    if system.startswith("You are the What-If"):
+        return {"scenario": "fake", "cascade": {"root": "fake", "first_order": []}, "amplified_signals": [],
+                "diminished_signals": [], "new_signals": [], "new_overall_risk_level": "amber",
+                "key_insight": "Synthetic."}
+    return {"country": "Fakeland", "baseline_normal": "Synthetic baseline profile."}
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class FakeAnthropic:
+    """Async handler for ``httpx.MockTransport`` that streams fake agent output.
+
+    ``chunk_delay`` is awaited between text deltas, so a run of ``n`` chunks
+    takes roughly ``n * chunk_delay`` seconds of wall time without holding the
+    event loop.
+    """
+
+    def __init__(self, chunk_size: int = 24, chunk_delay: float = 0.002, stop_reason: str = "end_turn"):
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.stop_reason = stop_reason
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        # Building the response is the server's work, not the client's: keep it
+        # off the event loop so lag measurements only see the client stack.
+        body, text, input_tokens = await asyncio.to_thread(self._respond, request.content)
+        self.requests.append(body)
+        return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                              content=self._stream(body.get("model", ""), text, input_tokens))
+
+    @staticmethod
+    def _respond(content: bytes) -> tuple[dict, str, int]:
+        body = json.loads(content)
+        system, user = _system_text(body.get("system")), _user_text(body.get("messages", []))
+        text = "```json\n" + json.dumps(fake_agent_output(system, user), indent=2) + "\n```"
+        return body, text, (len(system) + len(user)) // 4
+
+    async def _stream(self, model: str, text: str, input_tokens: int):
+        yield _sse("message_start", {"type": "message_start", "message": {
+            "id": "msg_fake", "type": "message", "role": "assistant", "model": model, "content": [],
+            "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": input_tokens, "output_tokens": 0}}})
+        yield _sse("content_block_start", {"type": "content_block_start", "index": 0,
+                                           "content_block": {"type": "text", "text": ""}})
+        for i in range(0, len(text), self.chunk_size):
+            await asyncio.sleep(self.chunk_delay)
+            yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                               "delta": {"type": "text_delta", "text": text[i:i + self.chunk_size]}})
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _sse("message_delta", {"type": "message_delta",
+                                     "delta": {"stop_reason": self.stop_reason, "stop_sequence": None},
+                                     "usage": {"output_tokens": len(text) // 4}})
+        yield _sse("message_stop", {"type": "message_stop"})
+
+
+def install(fake: FakeAnthropic | None = None, use_cache: bool = False) -> FakeAnthropic:
+    """Point the shared Claude client at a fake transport and return the handler.
+
+    The response cache and baseline store are switched off unless `use_cache`
+    is set, so benchmark runs neither read from nor pollute the persistent caches.
+    Likewise the budget planner's call history stays in memory.
+    """
+    fake = fake or FakeAnthropic()
+    response_cache.enabled = use_cache
+    baseline_store.enabled = use_cache
+    budget_planner.persist = use_cache
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    claude_client.client = claude_client.build_client(http_client)
+    return fake
@@ -0,0 +1,144 @@
+"""Size and fetch latency of compressed, chunked final_data storage.
+
+Compares storing final_data as one uncompressed document with the
+final_codec layout, for the full analysis and the synthesis-only view:
+stored bytes, encode/decode CPU time, local engine read latency, and a
+modelled Firestore fetch (round trips + transfer at --bandwidth-mbps).
+
+Takes recorded runs (final_data JSON as served by GET /api/analyze/{id}, or
+that document's final_data field); without arguments it generates a
+real-sized run: 40 scored signals with evidence and full agent outputs.
+
+    python -m backend.bench.final_storage_bench runs/*.json
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from backend.services import final_codec, storage
+
+WORDS = (
+    "reserve drawdown fuel import tender delayed subsidy fertilizer wheat harvest currency peg remittance "
+    "inflows port congestion diesel rationing hospital staffing vacancy migration teachers strike procurement "
+    "portal notice ministry budget arrears water table desalination plant outage grid frequency tariff bond "
+    "spread eurobond coupon rollover IMF programme review protest union wage arrears food price index bread "
+    "queue pharmacy shortage insulin satellite night lights flaring pipeline sabotage border crossing livestock "
+    "drought rainfall anomaly cereal stocks reservoir level hydropower mining royalty export ban"
+).split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def generate_run(signals: int = 40, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    ids = [f"sig_{i:03d}" for i in range(signals)]
+    evidence = lambda: [{"source": f"https://example.org/{rng.randrange(10**6)}", "modality": rng.choice(
+        ["procurement", "satellite", "social", "official", "market"]), "excerpt": _text(rng, 45)} for _ in range(3)]
+    hunted = [{"id": sid, "signal_name": _text(rng, 6), "domain": rng.choice(WORDS), "description": _text(rng, 70),
+               "evidence": evidence(), "impact": rng.randrange(100), "lead_time": rng.randrange(100),
+               "reliability": rng.randrange(100)} for sid in ids]
+    return {
+        "config": {"country": "Benchland", "scope": "national", "horizon": 5, "signal_count": signals},
+        "country_context": {"summary": _text(rng, 600), "indicators": {w: rng.random() for w in WORDS}},
+        "agents": {
+            "signal_hunter": {"signals": hunted},
+            "corroboration": {"corroborated_signals": [
+                {"signal_id": sid, "corroboration_level": rng.choice(["strong", "moderate", "weak"]),
+                 "independent_sources": evidence(), "analysis": _text(rng, 90)} for sid in ids]},
+            "devils_advocate": {"debunking_results": [
+                {"signal_id": sid, "verdict": rng.choice(["survives", "weakened", "killed"]),
+                 "alternative_explanations": [_text(rng, 40) for _ in range(3)], "reasoning": _text(rng, 80)}
+                for sid in ids]},
+            "synthesis": {
+                "scored_signals": [{**{k: s[k] for k in ("id", "signal_name", "domain", "description")},
+                                    "scores": {"impact": s["impact"], "overall": rng.randrange(100)},
+                                    "why_it_matters": _text(rng, 50)} for s in hunted],
+                "constellations": [{"name": _text(rng, 4), "signals": rng.sample(ids, 5), "narrative": _text(rng, 120)}
+                                   for _ in range(5)],
+                "overall_assessment": {"headline": _text(rng, 15), "risk_level": "amber", "key_concern": _text(rng, 30)},
+            },
+        },
+        "token_usage": {"synthesis": {"input_tokens": 40000, "output_tokens": 12000}},
+    }
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench(final_data: dict, repeat: int, bandwidth_mbps: float, rtt_ms: float) -> list[tuple]:
+    raw = json.dumps(final_data, default=str).encode()
+    manifest, chunks = final_codec.pack(final_data)
+    final_codec.place(manifest, chunks)
+    parts = manifest["parts"]
+    stored = sum(p["stored_bytes"] for p in parts.values())
+    synth = parts["synthesis"]["stored_bytes"]
+
+    engine = storage.LocalEngine(tempfile.mkdtemp(prefix="ewa-final-bench-"))
+    engine.save_analysis("bench", final_data["config"], "running")
+    engine.save_final_analysis("bench", final_data)
+    legacy_path = engine.root / "legacy.json"
+    legacy_path.write_bytes(raw)
+
+    # Firestore: one round trip for the document (with the inlined first
+    # chunks), one more only if a part has chunks in the subcollection.
+    transfer = lambda n: n * 8 / (bandwidth_mbps * 1e6) * 1000
+    extra_trip = lambda names: rtt_ms if any(final_codec.stored_apart(manifest, p) for p in names) else 0
+    decode_full = _median_ms(lambda: final_codec.unpack(manifest, chunks), repeat)
+    decode_synth = _median_ms(lambda: final_codec.unpack(manifest, {"synthesis": chunks["synthesis"]}), repeat)
+    return [
+        ("stored bytes", len(raw), stored, synth),
+        ("compression ratio", 1.0, len(raw) / stored, len(raw) / synth),
+        ("encode ms", _median_ms(lambda: json.dumps(final_data, default=str), repeat),
+         _median_ms(lambda: final_codec.pack(final_data), repeat), None),
+        ("decode ms", _median_ms(lambda: json.loads(raw), repeat), decode_full, decode_synth),
+        ("local read ms", _median_ms(lambda: json.loads(legacy_path.read_bytes()), repeat),
+         _median_ms(lambda: engine.get_analysis("bench"), repeat),
+         _median_ms(lambda: engine.get_synthesis("bench"), repeat)),
+        ("firestore fetch ms*", rtt_ms + transfer(len(raw)) + _median_ms(lambda: json.loads(raw), repeat),
+         rtt_ms + extra_trip(parts) + transfer(stored) + decode_full,
+         rtt_ms + extra_trip(["synthesis"]) + transfer(synth) + decode_synth),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--signals", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--bandwidth-mbps", type=float, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    runs = []
+    for path in args.paths:
+        with open(path) as f:
+            data = json.load(f)
+        runs.append((path, data.get("final_data", data)))
+    if not runs:
+        runs.append((f"generated {args.signals}-signal run", generate_run(args.signals)))
+
+    for name, final_data in runs:
+        print(f"\n{name}")
+        print(f"{'':<22}{'uncompressed':>14}{'compressed':>14}{'synthesis only':>16}")
+        for label, legacy, full, synth in bench(final_data, args.repeat, args.bandwidth_mbps, args.rtt_ms):
+            cells = [f"{v:>14.2f}" if isinstance(v, float) else f"{v:>14}" if v is not None else f"{'-':>14}"
+                     for v in (legacy, full, synth)]
+            print(f"{label:<22}{cells[0]}{cells[1]}  {cells[2]}")
+    print(f"\n* modelled: {args.rtt_ms:.0f}ms round trips, {args.bandwidth_mbps:.0f} Mbit/s transfer, plus decode time",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
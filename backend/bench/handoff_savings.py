@@ -0,0 +1,74 @@
+"""Input tokens saved per stage by the compact inter-agent handoff.
+
+Takes recorded runs — ``final_data`` JSON as served by
+``GET /api/analyze/{id}`` (or the ``final_data`` field of that document) — and
+compares each stage's raw re-injected text with its compact handoff view.
+Raw text is rebuilt the way agents write it: an indented JSON code block.
+Without arguments a run is generated with the fake Anthropic transport.
+
+    python -m backend.bench.handoff_savings runs/*.json
+"""
+import sys
+import json
+import asyncio
+
+from backend.agents import handoff
+from backend.agents.orchestrator import _as_json_block
+
+# stage -> (list key in the agent's JSON, compact section builder)
+STAGES = {
+    "signal_hunter": ("signals", lambda rows: handoff.signals_section("SIGNAL HUNTER FINDINGS", rows)),
+    "corroboration": ("corroborated_signals", lambda rows: handoff.corroboration_section("CORROBORATION RESULTS", rows)),
+    "devils_advocate": ("debunking_results", lambda rows: handoff.debunking_section("DEVIL'S ADVOCATE RESULTS", rows)),
+}
+# how many downstream prompts each stage's output is pasted into
+CONSUMERS = {"context": 4, "signal_hunter": 3, "corroboration": 2, "devils_advocate": 1}
+
+
+def measure(final_data: dict) -> dict:
+    results = {}
+    context = final_data.get("country_context")
+    if isinstance(context, dict):
+        results["context"] = (len(_as_json_block(context)), len(handoff.context_section("COUNTRY CONTEXT", context)))
+    agents = final_data.get("agents") or {}
+    for stage, (key, build) in STAGES.items():
+        data = agents.get(stage)
+        if isinstance(data, dict) and isinstance(data.get(key), list):
+            results[stage] = (len(_as_json_block(data)), len(build(data[key])))
+    return results
+
+
+async def _fake_run() -> dict:
+    from backend.bench.fake_anthropic import install
+    from backend.agents.orchestrator import run_analysis_pipeline
+    from backend.models.analysis import AnalysisConfig
+
+    install()
+    async for event in run_analysis_pipeline(AnalysisConfig(country="Fakeland", signal_count=40)):
+        if event.type == "analysis_complete":
+            return event.data
+
+
+def main(paths: list[str]):
+    runs = []
+    for path in paths:
+        with open(path) as f:
+            doc = json.load(f)
+        runs.append((path, doc.get("final_data", doc)))
+    if not runs:
+        runs.append(("fake 40-signal run", asyncio.run(_fake_run())))
+
+    for name, final_data in runs:
+        print(f"\n{name}")
+        print(f"  {'stage':<16} {'raw tok':>9} {'compact tok':>12} {'saved/prompt':>13} {'x prompts':>10} {'saved/run':>10}")
+        total = 0
+        for stage, (raw_chars, compact_chars) in measure(final_data).items():
+            raw, compact = raw_chars // handoff.CHARS_PER_TOKEN, compact_chars // handoff.CHARS_PER_TOKEN
+            saved = (raw - compact) * CONSUMERS[stage]
+            total += saved
+            print(f"  {stage:<16} {raw:>9} {compact:>12} {raw - compact:>13} {CONSUMERS[stage]:>10} {saved:>10}")
+        print(f"  estimated input tokens saved per run: ~{total}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,73 @@
+"""Time-to-assessment with and without pipelined stages.
+
+Runs ``run_analysis_pipeline`` for a --signals run against the fake Anthropic
+transport, once stage by stage and once with PIPELINED_STAGES (corroboration
+and challenge of each batch of hunted signals overlapping the Signal Hunter),
+and reports when each agent started and finished and when the final
+assessment arrived. The fake streams at a fixed rate, so a call's duration is
+proportional to its output length, as with the real API.
+
+    python -m backend.bench.pipeline_overlap_bench --signals 40 --batch-size 5
+"""
+import time
+import asyncio
+import logging
+import argparse
+
+from backend.agents import orchestrator
+from backend.bench.fake_anthropic import FakeAnthropic, install
+from backend.models.analysis import AnalysisConfig
+
+AGENTS = ["context", "signal_hunter", "corroboration", "devils_advocate", "synthesis"]
+
+
+async def run(signals: int) -> tuple[float, dict, dict]:
+    """Returns (seconds to analysis_complete, agent -> (start, end) offsets, final data)."""
+    start = time.perf_counter()
+    spans, final = {}, None
+    async for event in orchestrator.run_analysis_pipeline(AnalysisConfig(country="Fakeland", signal_count=signals)):
+        offset = time.perf_counter() - start
+        if event.type == "agent_start":
+            spans[event.agent] = [offset, None]
+        elif event.type == "agent_complete":
+            spans[event.agent][1] = offset
+        elif event.type == "analysis_complete":
+            final = event.data
+    return time.perf_counter() - start, spans, final
+
+
+def report(label: str, elapsed: float, spans: dict, final: dict):
+    print(f"{label}: assessment after {elapsed:.2f}s")
+    for agent in AGENTS:
+        begin, end = spans.get(agent, (0.0, 0.0))
+        print(f"  {agent:<16} {begin:6.2f}s -> {end:6.2f}s")
+    agents = final["agents"]
+    print(f"  {len(agents['signal_hunter']['signals'])} signals, "
+          f"{len(agents['corroboration']['corroborated_signals'])} corroborated, "
+          f"{len(agents['devils_advocate']['debunking_results'])} challenged"
+          + (f", overlap {final['overlap']}" if "overlap" in final else ""))
+
+
+async def main(args):
+    install(FakeAnthropic(chunk_delay=args.chunk_delay))
+    orchestrator.PIPELINE_BATCH_SIZE = args.batch_size
+    orchestrator.PIPELINE_FAN_OUT = args.fan_out
+
+    orchestrator.PIPELINED_STAGES = False
+    sequential, spans, final = await run(args.signals)
+    report("stage by stage", sequential, spans, final)
+
+    orchestrator.PIPELINED_STAGES = True
+    pipelined, spans, final = await run(args.signals)
+    report("pipelined", pipelined, spans, final)
+    print(f"time-to-assessment {sequential:.2f}s -> {pipelined:.2f}s ({1 - pipelined / sequential:.0%} less)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signals", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--fan-out", type=int, default=4)
+    parser.add_argument("--chunk-delay", type=float, default=0.002)
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
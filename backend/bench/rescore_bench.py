@@ -0,0 +1,75 @@
+"""Batch rescoring throughput: score_batch() vs a compute_scores() loop.
+
+Generates N scored signals, checks that score_batch() with the default
+weights matches compute_scores() exactly, then times both with custom
+weights and thresholds. Also times signal_inputs(), the extraction of the
+inputs from stored signal dicts that POST /api/rescore does first.
+
+    python -m backend.bench.rescore_bench --signals 100000
+"""
+import time
+import random
+import argparse
+import statistics
+
+from backend.models.analysis import ScoringConfig
+from backend.services.scoring import BANDS, compute_scores, score_batch, signal_inputs
+
+CUSTOM = ScoringConfig.model_validate({
+    "weights": {"near_term": [0.30, 0.50, 0.20], "structural": [0.60, 0.15, 0.25], "overall": [0.30, 0.40, 0.30]},
+    "thresholds": {"amber": 35, "red_watch": 55, "red_action": 70},
+})
+
+
+def generate_signals(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    return [{"id": f"sig_{i:06d}", "scores": {"impact": rng.randrange(101), "lead_time": rng.randrange(101),
+                                              "reliability": round(rng.uniform(0, 100), 1)}}
+            for i in range(n)]
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def check_parity(signals: list[dict], inputs) -> int:
+    """Number of signals whose batch scores differ from compute_scores() (default weights)."""
+    batch = score_batch(*inputs)
+    mismatches = 0
+    for i, signal in enumerate(signals):
+        s = signal["scores"]
+        scalar = compute_scores(s["impact"], s["lead_time"], s["reliability"])
+        if (scalar.near_term, scalar.structural, scalar.overall, scalar.risk_band) != (
+                batch["near_term"][i], batch["structural"][i], batch["overall"][i], BANDS[batch["band"][i]]):
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signals", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    signals = generate_signals(args.signals)
+    inputs = signal_inputs(signals)
+    print(f"{args.signals} signals, parity mismatches vs compute_scores: {check_parity(signals, inputs)}")
+
+    loop = lambda: [compute_scores(s["scores"]["impact"], s["scores"]["lead_time"], s["scores"]["reliability"], CUSTOM)
+                    for s in signals]
+    rows = [
+        ("signal_inputs", _median_ms(lambda: signal_inputs(signals), args.repeat)),
+        ("score_batch", _median_ms(lambda: score_batch(*inputs, config=CUSTOM), args.repeat)),
+        ("compute_scores loop", _median_ms(loop, max(1, args.repeat // 5))),
+    ]
+    for label, ms in rows:
+        print(f"{label:<22}{ms:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Signal index: incremental indexing cost, LSH lookup latency and recall.
+
+Indexes --runs synthetic runs of --signals scored signals each. A share of
+the signals are reworded copies of a pool of recurring anomalies (a few
+words swapped or dropped), the rest are unique, drawn from a vocabulary of
+--vocabulary words. Then for random indexed signals, compares
+SignalIndex.similar() with an exact scan of every indexed signal's word set:
+latency of each, and the share of the scan's matches (exact Jaccard >=
+--threshold) that the LSH lookup also returned.
+
+    python -m backend.bench.signal_index_bench --runs 2000 --signals 20
+"""
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from backend.services.signal_dedup import signal_tokens, jaccard
+from backend.services.signal_index import SignalIndex
+from backend.bench.final_storage_bench import WORDS
+
+COUNTRIES = ["Chile", "Peru", "Kenya", "Egypt", "Vietnam", "Ghana", "Pakistan", "Colombia", "Tunisia", "Nepal"]
+
+
+def reword(rng: random.Random, text: str, edits: int) -> str:
+    words = text.split()
+    for _ in range(edits):
+        i = rng.randrange(len(words))
+        if rng.random() < 0.5 and len(words) > 6:
+            del words[i]
+        else:
+            words[i] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def generate(runs: int, signals: int, recurring_share: float, vocabulary: int, seed: int = 11):
+    rng = random.Random(seed)
+    words = WORDS + [f"{rng.choice(WORDS)}{i}" for i in range(vocabulary - len(WORDS))]
+    sentence = lambda n: " ".join(rng.choice(words) for _ in range(n))
+    pool = [(sentence(6), sentence(30)) for _ in range(200)]
+    for r in range(runs):
+        scored = []
+        for j in range(signals):
+            if rng.random() < recurring_share:
+                name, description = rng.choice(pool)
+                name, description = reword(rng, name, 1), reword(rng, description, 3)
+            else:
+                name, description = sentence(6), sentence(30)
+            scored.append({"id": f"sig_{j:03d}", "name": name, "domain": rng.choice(["economy", "energy", "health"]),
+                           "description": description, "risk_band": "amber",
+                           "scores": {"impact": rng.randrange(101), "lead_time": rng.randrange(101),
+                                      "reliability": rng.randrange(101), "overall": rng.randrange(101)}})
+        yield f"run{r:05d}", {"config": {"country": COUNTRIES[r % len(COUNTRIES)]},
+                              "agents": {"synthesis": {"scored_signals": scored}}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--signals", type=int, default=20)
+    parser.add_argument("--recurring-share", type=float, default=0.3)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    index = SignalIndex(tempfile.mkdtemp(prefix="ewa-index-bench-") + "/index.sqlite3")
+    corpus, add_ms = [], []
+    for analysis_id, final_data in generate(args.runs, args.signals, args.recurring_share, args.vocabulary):
+        start = time.perf_counter()
+        index.add_run(analysis_id, final_data)
+        add_ms.append((time.perf_counter() - start) * 1000)
+        corpus += [(analysis_id, s["id"], signal_tokens(s), s) for s in final_data["agents"]["synthesis"]["scored_signals"]]
+    print(f"indexed {len(corpus)} signals from {args.runs} runs; add_run p50 {statistics.median(add_ms):.2f}ms")
+
+    rng = random.Random(5)
+    lsh_ms, scan_ms, found, expected = [], [], 0, 0
+    for _ in range(args.queries):
+        _, _, tokens, query = rng.choice(corpus)
+        start = time.perf_counter()
+        matches = index.similar(query, args.threshold, limit=len(corpus))
+        lsh_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        exact = {(a, s) for a, s, other, _ in corpus if jaccard(tokens, other) >= args.threshold}
+        scan_ms.append((time.perf_counter() - start) * 1000)
+        expected += len(exact)
+        found += len(exact & {(m["analysis_id"], m["signal_id"]) for m in matches})
+
+    print(f"similar() p50 {statistics.median(lsh_ms):.2f}ms vs exact scan p50 {statistics.median(scan_ms):.2f}ms")
+    print(f"recall at Jaccard >= {args.threshold}: {found / expected:.1%} ({found}/{expected})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""List and get latency of the storage engines at 10k stored runs.
+
+Seeds each engine with synthetic completed runs (written through the same
+batched writes the API uses), then times get_analysis on random runs and
+list_run_summaries for the first page, a filtered page and deep pages.
+
+    python -m backend.bench.storage_bench                  # local engine, temp dir
+    python -m backend.bench.storage_bench --engines local firestore --runs 10000
+
+The firestore engine needs credentials (or FIRESTORE_EMULATOR_HOST) and
+writes into the configured project; use --no-seed to measure runs already
+seeded there.
+"""
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timezone
+
+from backend.services import storage
+
+COUNTRIES = ["Chile", "Peru", "Kenya", "Egypt", "Vietnam", "Ghana", "Pakistan", "Colombia", "Tunisia", "Nepal"]
+RISK_LEVELS = ["green", "amber", "red_watch", "red_action"]
+BATCH = 500
+
+
+def fake_final_data(i: int, signals: int) -> dict:
+    country = COUNTRIES[i % len(COUNTRIES)]
+    return {
+        "config": {"country": country, "scope": "national", "horizon": 5, "domains": ["economy", "energy"],
+                   "signal_count": signals},
+        "agents": {
+            "synthesis": {
+                "scored_signals": [
+                    {"id": f"sig_{j:03d}", "signal_name": f"Signal {j} in {country}", "domain": "economy",
+                     "description": "Quiet drawdown of reserves alongside delayed fuel import tenders. " * 3,
+                     "scores": {"impact": 60, "lead_time": 55, "reliability": 70, "overall": 62}}
+                    for j in range(signals)
+                ],
+                "constellations": [],
+                "overall_assessment": {"headline": f"Run {i}", "risk_level": RISK_LEVELS[i % len(RISK_LEVELS)],
+                                       "confidence": "moderate"},
+            },
+        },
+    }
+
+
+def seed(engine: storage.StorageEngine, runs: int, signals: int):
+    start = time.perf_counter()
+    writes = []
+    base = time.time() - runs
+    for i in range(runs):
+        rid = f"bench{i:05d}"
+        final_data = fake_final_data(i, signals)
+        created = storage.save_analysis_writes(rid, final_data["config"], "running")
+        created[0][3]["created_at"] = datetime.fromtimestamp(base + i, timezone.utc)
+        created[1][3]["created_at"] = base + i
+        writes += created + storage.final_analysis_writes(rid, final_data)
+        if len(writes) >= BATCH:
+            engine.commit_writes([w[1:] for w in writes])
+            writes = []
+    if writes:
+        engine.commit_writes([w[1:] for w in writes])
+    print(f"  seeded {runs} runs in {time.perf_counter() - start:.1f}s")
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[int(0.95 * (len(samples) - 1))]}
+
+
+def deep_pages(engine: storage.StorageEngine, pages: int):
+    cursor = None
+    for _ in range(pages):
+        _, cursor = engine.list_run_summaries(50, cursor)
+        if cursor is None:
+            break
+
+
+def measure(engine: storage.StorageEngine, runs: int, repeat: int) -> dict:
+    ids = [f"bench{i:05d}" for i in range(runs)]
+    return {
+        "get_analysis": timed(lambda: engine.get_analysis(random.choice(ids)), repeat),
+        "list first page": timed(lambda: engine.list_run_summaries(50), repeat),
+        "list by country": timed(lambda: engine.list_run_summaries(50, country="Kenya"), repeat),
+        "list by risk+status": timed(lambda: engine.list_run_summaries(50, status="completed", risk_level="amber"),
+                                     repeat),
+        "10 pages deep": timed(lambda: deep_pages(engine, 10), max(1, repeat // 10)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="+", default=["local"], choices=list(storage.ENGINES))
+    parser.add_argument("--runs", type=int, default=10000)
+    parser.add_argument("--signals", type=int, default=20, help="scored signals per stored run")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.engines:
+        print(f"[{name}]")
+        if name == "local":
+            engine = storage.LocalEngine(tempfile.mkdtemp(prefix="ewa-storage-bench-"))
+        else:
+            engine = storage.create_engine(name)
+        if not args.no_seed:
+            seed(engine, args.runs, args.signals)
+        results[name] = measure(engine, args.runs, args.repeat)
+
+    print(f"\n{'operation':<22}" + "".join(f"{name + ' p50/p95 ms':>28}" for name in results))
+    for op in next(iter(results.values())):
+        row = "".join(f"{r[op]['p50']:>17.2f} / {r[op]['p95']:<8.2f}" for r in results.values())
+        print(f"{op:<22}{row}")
+
+
+if __name__ == "__main__":
+    main()
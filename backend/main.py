@@ -1,10 +1,11 @@
+import os
 import uuid
 import asyncio
 import hashlib
-import json
 import logging
 import time
-from fastapi import FastAPI, BackgroundTasks
+from functools import partial
+from fastapi import FastAPI, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sse_starlette.sse import EventSourceResponse
 from dotenv import load_dotenv
@@ -19,17 +20,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ewa.api")
 
-from backend.models.analysis import AnalysisConfig, AnalysisRequest, WhatIfRequest
-from backend.agents.orchestrator import run_analysis_pipeline, run_what_if
-from backend.services.firebase_service import (
-    save_analysis,
-    update_analysis_status,
-    save_final_analysis,
-    get_analysis,
-    delete_analysis,
-    save_what_if,
-    list_analyses,
+from backend.models.analysis import (
+    AnalysisConfig, AnalysisRequest, WhatIfRequest, WhatIfBatchRequest, RunSummary, RescoreRequest,
 )
+from backend.agents.orchestrator import run_analysis_pipeline, run_what_if, run_what_if_batch
+from backend.agents.schemas import SSEEvent
+from backend.agents.streaming import coalesce_chunks
+from backend.services.persistence import persistence
+from backend.services.response_cache import response_cache
+from backend.services.budget_planner import budget_planner
+from backend.services.scoring import BANDS, score_batch, signal_inputs, band_counts
+from backend.services.signal_index import DEFAULT_THRESHOLD
+from backend.services.fingerprints import stored_run_matches
+from backend.services.broadcast import BroadcastHub, RunBroadcast, parse_last_event_id
 
 PASSWORD_HASH = "e3c0bb912273a573f5360a9ac7ed5c41fc19a7f722b32613ff2b0de3edb9cb1e"
 
@@ -43,13 +46,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory store for active analysis streams
-# Maps analysis_id -> asyncio.Queue of SSE events
-active_streams = {}  # type: dict[str, asyncio.Queue]
+# In-memory broadcasts of active (and just finished) analysis and what-if
+# streams. Each keeps a replay buffer so any number of clients can attach,
+# and reconnecting clients resume from Last-Event-ID.
+active_streams = BroadcastHub()
 
 # In-memory store for completed/running analyses (for history listing)
 # Maps analysis_id -> {id, country, scope, horizon, domains, status, created_at, assessment}
+# Finished entries beyond ANALYSIS_HISTORY_MAX are dropped oldest first; they
+# remain listed from Firebase.
 analysis_history = {}  # type: dict[str, dict]
+ANALYSIS_HISTORY_MAX = int(os.getenv("ANALYSIS_HISTORY_MAX", "200"))
+
+RUNS_PAGE_SIZE = 50
+RUNS_PAGE_MAX = 200
+RESCORE_FETCH_CONCURRENCY = 8
+
+
+def _trim_history():
+    excess = len(analysis_history) - ANALYSIS_HISTORY_MAX
+    if excess <= 0:
+        return
+    for rid in [rid for rid, run in analysis_history.items() if run["status"] != "running"][:excess]:
+        del analysis_history[rid]
+
+
+@app.on_event("startup")
+async def start_stream_gc():
+    asyncio.create_task(active_streams.run_gc())
+
+
+@app.on_event("startup")
+async def start_index_sync():
+    async def sync():
+        try:
+            await persistence.sync_index()
+        except Exception as e:
+            logger.warning("[SignalIndex] Startup sync failed: %s: %s", type(e).__name__, e)
+    asyncio.create_task(sync())
+
+
+@app.on_event("shutdown")
+async def flush_persistence():
+    # Queued status, checkpoint and what-if writes would be lost on exit.
+    await persistence.close()
 
 
 @app.get("/api/health")
@@ -58,6 +98,18 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/metrics")
+async def metrics():
+    return {
+        "response_cache": await asyncio.to_thread(response_cache.stats),
+        "streams": active_streams.gauges(),
+        "persistence": persistence.stats(),
+        "analysis_cache": persistence.cache.stats(),
+        "history_entries": len(analysis_history),
+        "budgets": budget_planner.stats(),
+    }
+
+
 @app.post("/api/analyze")
 async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundTasks):
     if hashlib.sha256(request.password.encode()).hexdigest() != PASSWORD_HASH:
@@ -70,98 +122,130 @@ async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundT
                 analysis_id, config.country, config.scope.value, config.horizon, config.signal_count)
     logger.info("[API] Domains: %s", config.domains)
 
-    # Create a queue for this analysis
-    queue = asyncio.Queue()
-    active_streams[analysis_id] = queue
+    broadcast = active_streams.create(analysis_id)
 
-    # Save initial state to Firebase (non-blocking, best effort)
-    try:
-        save_analysis(analysis_id, config.model_dump(), status="running")
-        logger.info("[Firebase] Saved initial analysis state for %s", analysis_id)
-    except Exception as e:
-        logger.warning("[Firebase] Failed to save initial state: %s", e)
+    # Save initial state to Firebase (queued, best effort)
+    await persistence.save_analysis(analysis_id, config.model_dump(), status="running")
 
     # Track in history
-    analysis_history[analysis_id] = {
-        "id": analysis_id,
-        "country": config.country,
-        "scope": config.scope.value,
-        "horizon": config.horizon,
-        "domains": config.domains,
-        "signal_count": config.signal_count,
-        "status": "running",
-        "created_at": time.time(),
-        "assessment": None,
-    }
+    analysis_history[analysis_id] = RunSummary.from_run(
+        analysis_id, config.model_dump(), "running", time.time()).model_dump()
+    _trim_history()
 
     # Run pipeline in background
-    background_tasks.add_task(run_pipeline_to_queue, analysis_id, config, queue)
+    background_tasks.add_task(run_pipeline_to_stream, analysis_id, config, broadcast)
 
     return {"analysis_id": analysis_id}
 
 
-async def run_pipeline_to_queue(analysis_id: str, config: AnalysisConfig, queue: asyncio.Queue):
-    """Run the agent pipeline and push events to the queue."""
+async def checkpoint_agent(analysis_id: str, agent: str, payload: dict):
+    """Persist one finished agent's output so an interrupted run can resume."""
+    await persistence.save_agent_output(analysis_id, agent, payload)
+
+
+async def run_pipeline_to_stream(
+    analysis_id: str,
+    config: AnalysisConfig,
+    broadcast: RunBroadcast,
+    resume_from: dict | None = None,
+):
+    """Run the agent pipeline and publish its events to the run's broadcast."""
     logger.info("[Pipeline] Background task started for %s", analysis_id)
     try:
         final_data = None
         event_count = 0
-        async for event_str in run_analysis_pipeline(config):
-            await queue.put(event_str)
+        pipeline = run_analysis_pipeline(config, checkpoint=partial(checkpoint_agent, analysis_id),
+                                         resume_from=resume_from)
+        async for event in coalesce_chunks(pipeline):
+            await broadcast.publish(event.to_sse())
             event_count += 1
-            # Parse event to check for completion and save to Firebase
-            try:
-                event = json.loads(event_str)
-                if event.get("type") == "analysis_complete":
-                    final_data = event.get("data")
-                    # Update history with assessment
-                    if analysis_id in analysis_history:
-                        synthesis = (final_data or {}).get("agents", {}).get("synthesis", {})
-                        assessment = synthesis.get("overall_assessment", {}) if synthesis else {}
-                        analysis_history[analysis_id]["status"] = "completed"
-                        analysis_history[analysis_id]["assessment"] = assessment
-            except Exception:
-                pass
+            if event.type == "analysis_complete":
+                final_data = event.data
+                # Update history with assessment
+                if analysis_id in analysis_history:
+                    run = analysis_history[analysis_id]
+                    run.update(RunSummary.from_run(analysis_id, config.model_dump(), "completed",
+                                                   run["created_at"], final_data).model_dump())
 
         logger.info("[Pipeline] Streamed %d events for %s", event_count, analysis_id)
 
         # Save final results to Firebase (best effort)
         if final_data:
             try:
-                save_final_analysis(analysis_id, final_data)
+                await persistence.save_final_analysis(analysis_id, final_data)
                 logger.info("[Firebase] Saved final analysis for %s", analysis_id)
             except Exception as e:
                 logger.warning("[Firebase] Failed to save final analysis: %s", e)
 
-        await queue.put(None)  # Signal end of stream
+        await active_streams.finish(analysis_id)
     except Exception as e:
         logger.error("[Pipeline] ERROR for %s: %s: %s", analysis_id, type(e).__name__, e)
-        error_event = json.dumps({"type": "error", "message": str(e)})
-        await queue.put(error_event)
-        await queue.put(None)
+        await broadcast.publish(SSEEvent(type="error", message=str(e)).to_sse())
+        await active_streams.finish(analysis_id)
         if analysis_id in analysis_history:
             analysis_history[analysis_id]["status"] = "failed"
-        try:
-            update_analysis_status(analysis_id, "failed")
-        except Exception:
-            pass
+        await persistence.update_analysis_status(analysis_id, "failed")
+
+
+@app.post("/api/analyze/{analysis_id}/resume")
+async def resume_analysis(analysis_id: str, body: dict, background_tasks: BackgroundTasks):
+    """Continue an interrupted run from its first incomplete agent.
+
+    Checkpointed agents are replayed to subscribers rather than re-run, so the
+    stream looks the same as an uninterrupted one.
+    """
+    logger.info("[API] POST /api/analyze/%s/resume", analysis_id)
+    password = body.get("password", "")
+    if hashlib.sha256(password.encode()).hexdigest() != PASSWORD_HASH:
+        logger.warning("[API] Invalid resume password for %s", analysis_id)
+        return {"error": "Invalid password"}, 403
+
+    broadcast = active_streams.get(analysis_id)
+    if broadcast and not broadcast.closed:
+        return {"analysis_id": analysis_id, "status": "running"}
+
+    try:
+        existing = await persistence.get_analysis(analysis_id)
+    except Exception as e:
+        logger.warning("[API] Failed to get analysis %s for resume: %s", analysis_id, e)
+        existing = None
+    if not existing or not existing.get("config"):
+        return {"error": "Analysis not found"}, 404
+    if existing.get("status") == "completed":
+        return {"analysis_id": analysis_id, "status": "completed"}
+
+    config = AnalysisConfig(**existing["config"])
+    resume_from = await persistence.get_checkpoints(analysis_id)
+    logger.info("[API] Resuming %s with %d checkpointed agents: %s",
+                analysis_id, len(resume_from), ", ".join(resume_from) or "none")
+
+    await persistence.update_analysis_status(analysis_id, "running")
+
+    active_streams.remove(analysis_id)
+    broadcast = active_streams.create(analysis_id)
+    created = existing.get("created_at")
+    analysis_history[analysis_id] = RunSummary.from_run(
+        analysis_id, config.model_dump(), "running",
+        created.timestamp() if hasattr(created, "timestamp") else time.time()).model_dump()
+    _trim_history()
+
+    background_tasks.add_task(run_pipeline_to_stream, analysis_id, config, broadcast, resume_from)
+
+    return {"analysis_id": analysis_id, "resumed_agents": list(resume_from)}
 
 
 @app.get("/api/analyze/{analysis_id}/stream")
-async def stream_analysis(analysis_id: str):
+async def stream_analysis(analysis_id: str, request: Request):
     logger.info("[API] GET /api/analyze/%s/stream", analysis_id)
-    queue = active_streams.get(analysis_id)
-    if not queue:
+    broadcast = active_streams.get(analysis_id)
+    if not broadcast:
         # Check if analysis exists in Firebase (completed previously)
         try:
-            existing = get_analysis(analysis_id)
+            existing = await persistence.get_analysis(analysis_id)
             if existing and existing.get("status") == "completed":
                 logger.info("[API] Serving cached analysis %s from Firebase", analysis_id)
                 async def completed_stream():
-                    yield json.dumps({
-                        "type": "analysis_complete",
-                        "data": existing.get("final_data", {})
-                    })
+                    yield SSEEvent(type="analysis_complete", data=existing.get("final_data", {})).to_sse()
                 return EventSourceResponse(completed_stream())
         except Exception:
             pass
@@ -169,68 +253,90 @@ async def stream_analysis(analysis_id: str):
         logger.warning("[API] Analysis %s not found", analysis_id)
         return {"error": "Analysis not found"}, 404
 
-    logger.info("[API] Connecting SSE stream for %s", analysis_id)
+    last_event_id = parse_last_event_id(request.headers.get("last-event-id"))
+    logger.info("[API] Connecting SSE stream for %s (from event %d, %d other subscribers)",
+                analysis_id, last_event_id, broadcast.subscribers)
 
     async def event_generator():
-        while True:
-            event = await queue.get()
-            if event is None:
-                # Clean up
-                active_streams.pop(analysis_id, None)
-                logger.info("[API] SSE stream ended for %s", analysis_id)
-                break
-            yield event
+        async for seq, event in broadcast.subscribe(last_event_id):
+            yield {"id": str(seq), "data": event}
+        logger.info("[API] SSE stream ended for %s", analysis_id)
 
     return EventSourceResponse(event_generator())
 
 
+def _history_matches(run: dict, country: str | None, status: str | None, risk_level: str | None) -> bool:
+    return ((not country or run["country"] == country)
+            and (not status or run["status"] == status)
+            and (not risk_level or (run.get("assessment") or {}).get("risk_level") == risk_level))
+
+
+def _parse_cursor(cursor: str):
+    """A `created_at:id` page cursor; a bare created_at (older clients) skips the whole timestamp."""
+    created_at, _, run_id = cursor.partition(":")
+    return float(created_at), run_id
+
+
+def _format_cursor(cursor) -> str | None:
+    return f"{cursor[0]!r}:{cursor[1]}" if cursor is not None else None
+
+
+def _run_key(run: dict):
+    return run["created_at"], run["id"]
+
+
 @app.get("/api/runs")
-async def list_runs():
-    """List all analysis runs (most recent first), merging in-memory + Firebase."""
-    merged = dict(analysis_history)  # start with in-memory
+async def list_runs(
+    limit: int = RUNS_PAGE_SIZE,
+    cursor: str | None = None,
+    country: str | None = None,
+    status: str | None = None,
+    risk_level: str | None = None,
+):
+    """List analysis runs, most recent first, one page at a time.
 
-    # Load from Firebase for persisted runs not in memory
+    Reads only run summaries from Firebase. Pass the returned `next_cursor`
+    to get the next page; in-memory runs are merged into the page they fall
+    in, and are the only source if Firebase is unavailable.
+    """
+    limit = max(1, min(limit, RUNS_PAGE_MAX))
+    try:
+        before = _parse_cursor(cursor) if cursor else None
+    except ValueError:
+        return {"error": "Invalid cursor"}, 400
+
+    local = sorted((run for run in analysis_history.values()
+                    if _history_matches(run, country, status, risk_level)
+                    and (before is None or _run_key(run) < before)),
+                   key=_run_key, reverse=True)
     try:
-        fb_runs = list_analyses()
-        for run in fb_runs:
-            rid = run.get("id", "")
-            if rid and rid not in merged:
-                config = run.get("config", {}) or {}
-                final_data = run.get("final_data", {}) or {}
-                if not isinstance(final_data, dict):
-                    final_data = {}
-                agents = final_data.get("agents", {}) or {}
-                if not isinstance(agents, dict):
-                    agents = {}
-                synth = agents.get("synthesis", {}) or {}
-                if not isinstance(synth, dict):
-                    synth = {}
-                assessment = synth.get("overall_assessment") if synth else None
-                created = run.get("created_at")
-                ts = created.timestamp() if hasattr(created, "timestamp") else time.time()
-                merged[rid] = {
-                    "id": rid,
-                    "country": config.get("country", "Unknown"),
-                    "scope": config.get("scope", "national"),
-                    "horizon": config.get("horizon", 5),
-                    "domains": config.get("domains", []),
-                    "signal_count": config.get("signal_count", 0),
-                    "status": run.get("status", "unknown"),
-                    "created_at": ts,
-                    "assessment": assessment,
-                }
+        runs, next_cursor = await persistence.list_run_summaries(
+            limit, before, country=country, status=status, risk_level=risk_level)
     except Exception as e:
         logger.warning("[API] Failed to load runs from Firebase: %s", e)
+        runs = local[:limit]
+        next_cursor = _run_key(runs[-1]) if len(local) > limit else None
+        return {"runs": runs, "next_cursor": _format_cursor(next_cursor)}
 
-    runs = sorted(merged.values(), key=lambda r: r["created_at"], reverse=True)
-    return {"runs": runs}
+    merged = {run["id"]: run for run in runs}
+    oldest = next_cursor if next_cursor is not None else (float("-inf"), "")
+    for run in local:
+        # Newer in-memory state wins; runs not yet persisted join their page.
+        if run["id"] in merged or _run_key(run) >= oldest:
+            merged[run["id"]] = {**merged.get(run["id"], {}), **run}
+    runs = sorted(merged.values(), key=_run_key, reverse=True)
+    return {"runs": runs, "next_cursor": _format_cursor(next_cursor)}
 
 
 @app.get("/api/analyze/{analysis_id}")
-async def get_analysis_result(analysis_id: str):
-    logger.info("[API] GET /api/analyze/%s", analysis_id)
+async def get_analysis_result(analysis_id: str, view: str = "full"):
+    """A stored analysis; view=synthesis skips the raw agent outputs."""
+    logger.info("[API] GET /api/analyze/%s (view=%s)", analysis_id, view)
     try:
-        result = get_analysis(analysis_id)
+        if view == "synthesis":
+            result = await persistence.get_synthesis(analysis_id)
+        else:
+            result = await persistence.get_analysis(analysis_id)
         if result:
             return result
     except Exception as e:
@@ -247,17 +353,201 @@ async def delete_analysis_endpoint(analysis_id: str, body: dict):
         return {"error": "Invalid password"}, 403
 
     try:
-        delete_analysis(analysis_id)
+        await persistence.delete_analysis(analysis_id)
         logger.info("[Firebase] Deleted analysis %s", analysis_id)
     except Exception as e:
         logger.warning("[Firebase] Failed to delete analysis %s: %s", analysis_id, e)
 
-    active_streams.pop(analysis_id, None)
+    active_streams.remove(analysis_id)
     analysis_history.pop(analysis_id, None)
 
     return {"ok": True}
 
 
+def _scored_signals(analysis: dict | None) -> list[dict]:
+    synthesis = (((analysis or {}).get("final_data") or {}).get("agents") or {}).get("synthesis") or {}
+    signals = synthesis.get("scored_signals") if isinstance(synthesis, dict) else None
+    return [s for s in signals if isinstance(s, dict)] if isinstance(signals, list) else []
+
+
+async def _completed_runs_with_signals(summaries: list[dict]) -> list[tuple[dict, list[dict]]]:
+    """(summary, scored signals) of each run, loaded from storage run by run."""
+    gate = asyncio.Semaphore(RESCORE_FETCH_CONCURRENCY)
+
+    async def fetch(summary: dict):
+        async with gate:
+            try:
+                return summary, _scored_signals(await persistence.get_synthesis(summary["id"]))
+            except Exception as e:
+                logger.warning("[Rescore] Failed to load %s: %s", summary["id"], e)
+                return summary, []
+
+    return await asyncio.gather(*(fetch(s) for s in summaries))
+
+
+async def _indexed_runs_with_signals(summaries: list[dict]):
+    """(summary, signals) of each run plus the score inputs of all their signals, in order.
+
+    Served by the signal index in one query; None if the index is disabled
+    or lacks any of the runs.
+    """
+    if not persistence.index.enabled:
+        return None
+    indexed = await asyncio.to_thread(persistence.index.run_ids)
+    if any(summary["id"] not in indexed for summary in summaries):
+        return None
+    rows, inputs = await asyncio.to_thread(persistence.index.score_inputs)
+    positions = {}
+    for i, row in enumerate(rows):
+        positions.setdefault(row[0], []).append(i)
+    runs, order = [], []
+    for summary in summaries:
+        at = positions.get(summary["id"], [])
+        if at:
+            summary = {**summary, "completed_at": rows[at[0]][4]}
+        runs.append((summary, [{"id": rows[i][1], "name": rows[i][2], "risk_band": rows[i][5]} for i in at]))
+        order += at
+    return runs, inputs[:, order]
+
+
+@app.post("/api/rescore")
+async def rescore(request: RescoreRequest):
+    """Rescore a stored run, or every completed run, with custom weights and band thresholds.
+
+    Only the code-computed scores change: impact, lead time and reliability
+    are taken as stored, and no agent is called. History is read from the
+    signal index once it holds every completed run (missing runs are indexed
+    first), otherwise from storage run by run.
+    """
+    inputs, source = None, "storage"
+    if request.analysis_id:
+        try:
+            runs = [({"id": request.analysis_id}, _scored_signals(await persistence.get_synthesis(request.analysis_id)))]
+        except Exception as e:
+            logger.warning("[Rescore] Failed to load %s: %s", request.analysis_id, e)
+            runs = []
+        if not runs or not runs[0][1]:
+            return {"error": "Analysis not found or has no scored signals"}, 404
+    else:
+        try:
+            summaries = await persistence.sync_index()
+            indexed = await _indexed_runs_with_signals(summaries)
+            if indexed is not None:
+                (runs, inputs), source = indexed, "index"
+            else:
+                runs = await _completed_runs_with_signals(summaries)
+        except Exception as e:
+            logger.warning("[Rescore] Failed to list runs: %s", e)
+            return {"error": "Failed to load run history"}, 500
+
+    signals = [signal for _, run_signals in runs for signal in run_signals]
+    start = time.perf_counter()
+    if request.analysis_id or inputs is None:
+        inputs = signal_inputs(signals)
+    scores = score_batch(*inputs, config=request.scoring)
+    scoring_ms = (time.perf_counter() - start) * 1000
+    logger.info("[Rescore] %d signals from %d runs scored in %.1fms", len(signals), len(runs), scoring_ms)
+
+    results, offset = [], 0
+    for summary, run_signals in runs:
+        end = offset + len(run_signals)
+        band = scores["band"][offset:end]
+        result = {
+            "id": summary["id"],
+            "signal_count": len(run_signals),
+            "band_counts": band_counts(band),
+            "previous_band_counts": {b.value: sum(s.get("risk_band") == b.value for s in run_signals) for b in BANDS},
+            "top_band": BANDS[int(band.max())].value if len(band) else None,
+            "max_overall": float(scores["overall"][offset:end].max()) if len(band) else None,
+        }
+        if request.analysis_id is None:
+            result.update({k: summary[k] for k in ("country", "created_at", "completed_at", "risk_level") if k in summary})
+        elif request.include_signals:
+            result["signals"] = sorted(({
+                "signal_id": signal.get("signal_id") or signal.get("id"),
+                "name": signal.get("name"),
+                "near_term": float(scores["near_term"][i]),
+                "structural": float(scores["structural"][i]),
+                "overall": float(scores["overall"][i]),
+                "risk_band": BANDS[int(scores["band"][i])].value,
+                "previous_risk_band": signal.get("risk_band"),
+            } for i, signal in enumerate(run_signals, start=offset)), key=lambda s: s["overall"], reverse=True)
+        results.append(result)
+        offset = end
+
+    return {
+        "scoring": request.scoring.model_dump(),
+        "source": source,
+        "signal_count": len(signals),
+        "band_counts": band_counts(scores["band"]),
+        "scoring_ms": round(scoring_ms, 2),
+        "runs": results,
+    }
+
+
+@app.get("/api/signals")
+async def search_signals(
+    q: str | None = None,
+    country: str | None = None,
+    domain: str | None = None,
+    risk_band: str | None = None,
+    since: float | None = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    limit: int = RUNS_PAGE_SIZE,
+):
+    """Scored signals across all completed runs, from the signal index.
+
+    Without `q`, the most recent signals matching the filters. With `q`,
+    signals whose name and description are near-duplicates of `q`, most
+    similar first, plus the countries they appeared in.
+    """
+    limit = max(1, min(limit, RUNS_PAGE_MAX))
+    if not persistence.index.enabled:
+        return {"error": "Signal index is disabled"}, 503
+    try:
+        if q:
+            matches = await asyncio.to_thread(persistence.index.similar, {"name": q}, threshold, RUNS_PAGE_MAX)
+            signals = [m for m in matches
+                       if (not country or m["country"] == country) and (not domain or m["domain"] == domain)
+                       and (not risk_band or m["risk_band"] == risk_band)
+                       and (since is None or (m["completed_at"] or 0) >= since)][:limit]
+        else:
+            signals = await asyncio.to_thread(persistence.index.search, country, domain, risk_band, since, limit)
+    except Exception as e:
+        logger.warning("[API] Signal index query failed: %s", e)
+        return {"error": "Signal index query failed"}, 500
+    return {"signals": signals, "countries": sorted({s["country"] for s in signals if s["country"]})}
+
+
+@app.get("/api/analyze/{analysis_id}/recurring")
+async def recurring_signals(analysis_id: str, threshold: float = DEFAULT_THRESHOLD):
+    """Each signal of a run with its near-duplicates in earlier (or later) runs."""
+    if not persistence.index.enabled:
+        return {"error": "Signal index is disabled"}, 503
+    try:
+        signals = await asyncio.to_thread(persistence.index.recurrences, analysis_id, threshold)
+    except Exception as e:
+        logger.warning("[API] Signal index query failed for %s: %s", analysis_id, e)
+        return {"error": "Signal index query failed"}, 500
+    if not signals:
+        return {"error": "Analysis not indexed"}, 404
+    return {"signals": signals}
+
+
+@app.get("/api/analyze/{analysis_id}/fingerprints")
+async def match_fingerprints(analysis_id: str):
+    """Re-match a stored run's scored signals against the current fingerprint library."""
+    try:
+        analysis = await persistence.get_synthesis(analysis_id)
+    except Exception as e:
+        logger.warning("[API] Failed to get analysis %s: %s", analysis_id, e)
+        analysis = None
+    matches = await asyncio.to_thread(stored_run_matches, analysis)
+    if matches is None:
+        return {"error": "Analysis not found or has no scored signals"}, 404
+    return {"matches": matches}
+
+
 @app.post("/api/analyze/{analysis_id}/what-if")
 async def start_what_if(
     analysis_id: str, request: WhatIfRequest, background_tasks: BackgroundTasks
@@ -268,7 +558,7 @@ async def start_what_if(
     # Get existing analysis
     existing = None
     try:
-        existing = get_analysis(analysis_id)
+        existing = await persistence.get_analysis(analysis_id)
     except Exception as e:
         logger.warning("[API] Failed to get analysis for what-if: %s", e)
 
@@ -276,71 +566,124 @@ async def start_what_if(
         logger.warning("[API] Analysis %s not found or not completed for what-if", analysis_id)
         return {"error": "Analysis not found or not completed"}, 404
 
-    queue = asyncio.Queue()
     stream_key = f"{analysis_id}_whatif_{scenario_id}"
-    active_streams[stream_key] = queue
+    broadcast = active_streams.create(stream_key)
 
     config = AnalysisConfig(**existing["config"])
 
     background_tasks.add_task(
-        run_whatif_to_queue,
+        run_whatif_to_stream,
         analysis_id,
         scenario_id,
         config,
         existing.get("final_data", {}),
         request.scenario,
-        queue,
-        stream_key,
+        broadcast,
     )
 
     return {"scenario_id": scenario_id, "stream_key": stream_key}
 
 
-async def run_whatif_to_queue(
+@app.post("/api/analyze/{analysis_id}/what-if/batch")
+async def start_what_if_batch(
+    analysis_id: str, request: WhatIfBatchRequest, background_tasks: BackgroundTasks
+):
+    """Evaluate several scenarios against one analysis at once; each streams on its own key."""
+    logger.info("[API] POST /api/analyze/%s/what-if/batch — %d scenarios", analysis_id, len(request.scenarios))
+
+    existing = None
+    try:
+        existing = await persistence.get_analysis(analysis_id)
+    except Exception as e:
+        logger.warning("[API] Failed to get analysis for what-if batch: %s", e)
+
+    if not existing or not existing.get("final_data"):
+        logger.warning("[API] Analysis %s not found or not completed for what-if batch", analysis_id)
+        return {"error": "Analysis not found or not completed"}, 404
+
+    scenarios = []
+    for scenario in request.scenarios:
+        scenario_id = str(uuid.uuid4())[:8]
+        stream_key = f"{analysis_id}_whatif_{scenario_id}"
+        scenarios.append({"scenario_id": scenario_id, "stream_key": stream_key, "scenario": scenario})
+        active_streams.create(stream_key)
+
+    background_tasks.add_task(
+        run_whatif_batch_to_stream,
+        analysis_id,
+        AnalysisConfig(**existing["config"]),
+        existing.get("final_data", {}),
+        scenarios,
+    )
+
+    return {"scenarios": scenarios}
+
+
+async def run_whatif_batch_to_stream(analysis_id: str, config: AnalysisConfig, existing_analysis: dict,
+                                     scenarios: list[dict]):
+    broadcasts = [active_streams.get(s["stream_key"]) for s in scenarios]
+    try:
+        batch = run_what_if_batch(config, existing_analysis, [s["scenario"] for s in scenarios])
+        async for index, event in batch:
+            if broadcasts[index] is None:  # deleted meanwhile
+                continue
+            await broadcasts[index].publish(event.to_sse())
+            if event.type == "agent_complete":
+                await persistence.save_what_if(analysis_id, scenarios[index]["scenario_id"], event.data or {})
+            if event.type in ("agent_complete", "error"):
+                await active_streams.finish(scenarios[index]["stream_key"])
+    except Exception as e:
+        logger.error("[What-If] Batch ERROR: %s: %s", type(e).__name__, e)
+        for broadcast in broadcasts:
+            if broadcast is not None and not broadcast.closed:
+                await broadcast.publish(SSEEvent(type="error", message=str(e)).to_sse())
+    finally:
+        for s in scenarios:
+            await active_streams.finish(s["stream_key"])
+
+
+@app.get("/api/analyze/{analysis_id}/what-if")
+async def list_what_ifs(analysis_id: str):
+    """Saved what-if scenarios of an analysis, newest first."""
+    try:
+        return {"scenarios": await persistence.list_what_ifs(analysis_id)}
+    except Exception as e:
+        logger.warning("[API] Failed to list what-ifs for %s: %s", analysis_id, e)
+        return {"error": "Failed to list what-if scenarios"}, 500
+
+
+async def run_whatif_to_stream(
     analysis_id: str,
     scenario_id: str,
     config: AnalysisConfig,
     existing_analysis: dict,
     scenario: str,
-    queue: asyncio.Queue,
-    stream_key: str,
+    broadcast: RunBroadcast,
 ):
     try:
-        async for event_str in run_what_if(config, existing_analysis, scenario):
-            await queue.put(event_str)
-            try:
-                event = json.loads(event_str)
-                if event.get("type") == "agent_complete":
-                    try:
-                        save_what_if(analysis_id, scenario_id, event.get("data", {}))
-                        logger.info("[Firebase] Saved what-if scenario %s", scenario_id)
-                    except Exception as e:
-                        logger.warning("[Firebase] Failed to save what-if: %s", e)
-            except Exception:
-                pass
-
-        await queue.put(None)
+        async for event in coalesce_chunks(run_what_if(config, existing_analysis, scenario)):
+            await broadcast.publish(event.to_sse())
+            if event.type == "agent_complete":
+                await persistence.save_what_if(analysis_id, scenario_id, event.data or {})
     except Exception as e:
         logger.error("[What-If] ERROR: %s: %s", type(e).__name__, e)
-        await queue.put(json.dumps({"type": "error", "message": str(e)}))
-        await queue.put(None)
+        await broadcast.publish(SSEEvent(type="error", message=str(e)).to_sse())
     finally:
-        active_streams.pop(stream_key, None)
+        await active_streams.finish(broadcast.run_id)
 
 
 @app.get("/api/analyze/{analysis_id}/what-if/{stream_key}/stream")
-async def stream_what_if(analysis_id: str, stream_key: str):
+async def stream_what_if(analysis_id: str, stream_key: str, request: Request):
     logger.info("[API] GET /api/analyze/%s/what-if/%s/stream", analysis_id, stream_key)
-    queue = active_streams.get(stream_key)
-    if not queue:
+    broadcast = active_streams.get(stream_key)
+    if not broadcast:
         return {"error": "What-if stream not found"}, 404
 
+    last_event_id = parse_last_event_id(request.headers.get("last-event-id"))
+
     async def event_generator():
-        while True:
-            event = await queue.get()
-            if event is None:
-                break
-            yield event
+        async for seq, event in broadcast.subscribe(last_event_id):
+            yield {"id": str(seq), "data": event}
 
     return EventSourceResponse(event_generator())
 
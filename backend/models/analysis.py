@@ -1,5 +1,5 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from enum import Enum
 
@@ -21,6 +21,7 @@ class AnalysisConfig(BaseModel):
         "food_water", "social_cohesion", "security", "energy"
     ])
     custom_indicators: list[str] = Field(default_factory=list)
+    refresh_context: bool = False  # ignore the cached country baseline and rerun Context Discovery
 
 
 class RiskBand(str, Enum):
@@ -40,6 +41,47 @@ class SignalScores(BaseModel):
     risk_band: RiskBand = RiskBand.GREEN
 
 
+class ScoringWeights(BaseModel):
+    """Linear weights of the derived scores; each list is applied to the named inputs in order."""
+    near_term: list[float] = Field(default_factory=lambda: [0.35, 0.45, 0.20], min_length=3, max_length=3)  # impact, lead_time, reliability
+    structural: list[float] = Field(default_factory=lambda: [0.55, 0.20, 0.25], min_length=3, max_length=3)  # impact, lead_time, reliability
+    overall: list[float] = Field(default_factory=lambda: [0.25, 0.50, 0.25], min_length=3, max_length=3)  # near_term, impact, structural
+
+
+class BandThresholds(BaseModel):
+    """Lowest overall score of each band above green."""
+    amber: float = 40
+    red_watch: float = 60
+    red_action: float = 75
+
+    @model_validator(mode="after")
+    def _ascending(self):
+        if not self.amber <= self.red_watch <= self.red_action:
+            raise ValueError("thresholds must satisfy amber <= red_watch <= red_action")
+        return self
+
+
+class ScoringConfig(BaseModel):
+    weights: ScoringWeights = Field(default_factory=ScoringWeights)
+    thresholds: BandThresholds = Field(default_factory=BandThresholds)
+
+
+class RescoreRequest(BaseModel):
+    """Rescore one stored run (analysis_id) or, without one, every completed run in history."""
+    analysis_id: Optional[str] = None
+    scoring: ScoringConfig = Field(default_factory=ScoringConfig)
+    include_signals: bool = True  # per-signal scores; only returned for a single run
+
+
+class AgentBudget(BaseModel):
+    """Output-token and web-search ceilings for one agent call, and the workload they were planned for."""
+    agent: str
+    max_tokens: int
+    max_searches: int = 0
+    signals: int = 0
+    domains: int = 0
+
+
 class AnalysisRequest(BaseModel):
     config: AnalysisConfig
     password: str = ""
@@ -47,3 +89,43 @@ class AnalysisRequest(BaseModel):
 
 class WhatIfRequest(BaseModel):
     scenario: str
+
+
+class WhatIfBatchRequest(BaseModel):
+    scenarios: list[str] = Field(min_length=1, max_length=8)
+
+
+class RunSummary(BaseModel):
+    """The few fields the runs sidebar needs, stored apart from the full analysis."""
+    id: str
+    country: str = "Unknown"
+    scope: str = "national"
+    horizon: int = 5
+    domains: list[str] = Field(default_factory=list)
+    signal_count: int = 0
+    status: str = "running"
+    created_at: float = 0
+    risk_level: Optional[str] = None
+    assessment: Optional[dict] = None
+
+    @classmethod
+    def from_run(cls, analysis_id: str, config: dict, status: str, created_at: float,
+                 final_data: dict | None = None) -> "RunSummary":
+        scope = config.get("scope", "national")
+        synthesis = ((final_data or {}).get("agents") or {}).get("synthesis") or {}
+        overall = synthesis.get("overall_assessment") if isinstance(synthesis, dict) else None
+        assessment = None
+        if isinstance(overall, dict):
+            assessment = {k: overall[k] for k in ("headline", "risk_level", "confidence", "key_concern") if k in overall}
+        return cls(
+            id=analysis_id,
+            country=config.get("country", "Unknown"),
+            scope=getattr(scope, "value", scope),
+            horizon=config.get("horizon", 5),
+            domains=config.get("domains", []),
+            signal_count=config.get("signal_count", 0),
+            status=status,
+            created_at=created_at,
+            risk_level=(assessment or {}).get("risk_level"),
+            assessment=assessment,
+        )
@@ -0,0 +1,114 @@
+import os
+import json
+import logging
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger("ewa.cache")
+
+
+class AnalysisCache:
+    """In-process LRU of completed analyses (full or synthesis-only) and their what-if lists.
+
+    Completed runs only change when deleted or re-finalised, so they are
+    served from memory until a write to the run invalidates them. Entries are
+    evicted least-recently-used first once their serialized size exceeds
+    `max_bytes`. Cached values are shared between callers: treat them as
+    read-only.
+
+    A read that may race an invalidation takes a token with begin_read()
+    and passes it to put(): the value is dropped if the run was invalidated
+    after the token was taken. Invalidations are remembered only while an
+    older read is still in flight, so bookkeeping stays bounded by
+    concurrent reads rather than by runs ever seen.
+    """
+
+    def __init__(self, max_bytes: int, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()  # type: OrderedDict[tuple[str, str], tuple[object, int]]
+        self._epoch = 0  # bumped by every invalidation
+        self._invalidated = {}  # type: dict[tuple[str, str], int]  # (kind, analysis_id) -> epoch of last invalidation
+        self._reads = Counter()  # epoch a read in flight started at -> number of such reads
+        self.bytes = 0
+        self.hits = {"analysis": 0, "synthesis": 0, "what_ifs": 0}
+        self.misses = {"analysis": 0, "synthesis": 0, "what_ifs": 0}
+        self.evictions = 0
+
+    def begin_read(self) -> int:
+        """Take before a read; pass to put(), and to release() once the read is over."""
+        self._reads[self._epoch] += 1
+        return self._epoch
+
+    def release(self, token: int):
+        self._reads[token] -= 1
+        if self._reads[token] <= 0:
+            del self._reads[token]
+            self._prune()
+
+    def _prune(self):
+        # An invalidation at epoch e only affects reads that started before e.
+        oldest = min(self._reads, default=self._epoch)
+        if self._invalidated:
+            self._invalidated = {key: epoch for key, epoch in self._invalidated.items() if epoch > oldest}
+
+    def sized(self, fn, *args) -> tuple[object, int]:
+        """Call fn(*args) and measure the result's serialized size; meant for the worker thread doing the read."""
+        value = fn(*args)
+        return value, len(json.dumps(value, separators=(",", ":"), default=str)) if self.enabled else 0
+
+    def get(self, kind: str, analysis_id: str):
+        if not self.enabled:
+            return None
+        entry = self._entries.get((kind, analysis_id))
+        if entry is None:
+            self.misses[kind] += 1
+            return None
+        self._entries.move_to_end((kind, analysis_id))
+        self.hits[kind] += 1
+        return entry[0]
+
+    def put(self, kind: str, analysis_id: str, value, size: int, token: int):
+        """Cache a value of `size` serialized bytes read under `token` (see begin_read)."""
+        if not self.enabled or self._invalidated.get((kind, analysis_id), -1) > token:
+            return
+        if size > self.max_bytes:
+            return
+        self._drop((kind, analysis_id))
+        self._entries[(kind, analysis_id)] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def invalidate(self, analysis_id: str, kinds: tuple[str, ...] = ("analysis", "synthesis", "what_ifs")):
+        if self._reads:
+            self._epoch += 1
+            for kind in kinds:
+                self._invalidated[(kind, analysis_id)] = self._epoch
+        for kind in kinds:
+            self._drop((kind, analysis_id))
+
+    def stats(self) -> dict:
+        ratio = lambda kind: round(self.hits[kind] / (self.hits[kind] + self.misses[kind]), 4) \
+            if self.hits[kind] + self.misses[kind] else 0.0
+        return {
+            "enabled": self.enabled,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "hit_ratio": {kind: ratio(kind) for kind in self.hits},
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+analysis_cache = AnalysisCache(
+    max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    enabled=os.getenv("ANALYSIS_CACHE_ENABLED", "1") == "1",
+)
@@ -0,0 +1,73 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+
+from backend.services.response_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger("ewa.baseline")
+
+
+class BaselineStore:
+    """Country baseline profiles from Context Discovery, keyed by country, scope and department."""
+
+    def __init__(self, path: str, max_age_seconds: float, enabled: bool = True):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(country: str, scope: str, department: str | None) -> str:
+        return "|".join([country.strip().lower(), scope, (department or "").strip().lower()])
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS baselines ("
+                "key TEXT PRIMARY KEY, context_text TEXT NOT NULL, context_json TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, country: str, scope: str, department: str | None = None) -> dict | None:
+        """Return a fresh baseline as {context_text, context_json, created_at}, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db().execute(
+                "SELECT context_text, context_json, created_at FROM baselines WHERE key = ?",
+                (self._key(country, scope, department),),
+            ).fetchone()
+        if not row:
+            return None
+        age = time.time() - row[2]
+        if age > self.max_age_seconds:
+            logger.info("[Baseline] Baseline for %s is stale (%.1fh old)", country, age / 3600)
+            return None
+        return {"context_text": row[0], "context_json": json.loads(row[1]), "created_at": row[2]}
+
+    def put(self, country: str, scope: str, department: str | None, context_text: str, context_json):
+        if not self.enabled:
+            return
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO baselines (key, context_text, context_json, created_at) VALUES (?, ?, ?, ?)",
+                (self._key(country, scope, department), context_text, json.dumps(context_json), time.time()),
+            )
+            db.commit()
+        logger.info("[Baseline] Stored baseline for %s (%s)", country, scope)
+
+
+baseline_store = BaselineStore(
+    path=os.getenv("BASELINE_STORE_PATH", str(DEFAULT_CACHE_DIR / "baselines.sqlite3")),
+    max_age_seconds=float(os.getenv("BASELINE_MAX_AGE_HOURS", "72")) * 3600,
+    enabled=os.getenv("BASELINE_STORE_ENABLED", "1") == "1",
+)
@@ -0,0 +1,166 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import AsyncGenerator
+
+logger = logging.getLogger("ewa.broadcast")
+
+# Events kept per run for late subscribers and Last-Event-ID resume (bounded
+# by count and bytes), how long a finished run's stream stays attachable, and
+# after how long without events a live run is considered abandoned.
+REPLAY_BUFFER_EVENTS = int(os.getenv("SSE_REPLAY_BUFFER_EVENTS", "10000"))
+REPLAY_BUFFER_BYTES = int(os.getenv("SSE_REPLAY_BUFFER_BYTES", str(8 * 1024 * 1024)))
+FINISHED_RETENTION_SECONDS = float(os.getenv("SSE_FINISHED_RETENTION_SECONDS", "300"))
+IDLE_TIMEOUT_SECONDS = float(os.getenv("SSE_IDLE_TIMEOUT_SECONDS", "1800"))
+GC_INTERVAL_SECONDS = float(os.getenv("SSE_GC_INTERVAL_SECONDS", "30"))
+
+
+class RunBroadcast:
+    """Fan-out of one run's serialized SSE events to any number of subscribers.
+
+    Events get consecutive sequence numbers (used as SSE ids) and are kept in
+    a ring buffer bounded by `max_events` and `max_bytes`. Overflow policy:
+    publishing never waits on subscribers; the oldest events are dropped
+    (the newest is always kept), and a subscriber that falls behind the
+    buffer skips ahead to the oldest event still buffered.
+    """
+
+    def __init__(self, run_id: str, max_events: int = REPLAY_BUFFER_EVENTS, max_bytes: int = REPLAY_BUFFER_BYTES):
+        self.run_id = run_id
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.events = deque()  # (seq, data)
+        self.buffered_bytes = 0
+        self.evicted = 0
+        self.last_seq = 0
+        self.closed = False
+        self.subscribers = 0
+        self.updated_at = time.time()
+        self._changed = asyncio.Condition()
+
+    async def publish(self, data: str):
+        async with self._changed:
+            self.last_seq += 1
+            self.events.append((self.last_seq, data))
+            self.buffered_bytes += len(data)
+            while len(self.events) > 1 and (len(self.events) > self.max_events or self.buffered_bytes > self.max_bytes):
+                self.buffered_bytes -= len(self.events.popleft()[1])
+                self.evicted += 1
+            self.updated_at = time.time()
+            self._changed.notify_all()
+
+    async def close(self):
+        async with self._changed:
+            self.closed = True
+            self.updated_at = time.time()
+            self._changed.notify_all()
+
+    def _after(self, cursor: int) -> list[tuple[int, str]]:
+        if not self.events or cursor >= self.last_seq:
+            return []
+        first_seq = self.events[0][0]
+        if cursor + 1 < first_seq:
+            logger.warning("[Broadcast] Subscriber of %s missed %d events that left the replay buffer",
+                           self.run_id, first_seq - cursor - 1)
+        start = max(0, cursor + 1 - first_seq)
+        return [self.events[i] for i in range(start, len(self.events))]
+
+    async def subscribe(self, last_event_id: int = 0) -> AsyncGenerator[tuple[int, str], None]:
+        """Yield (seq, data) for every event after `last_event_id` until the run finishes."""
+        cursor = last_event_id
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.last_seq > cursor or self.closed)
+                    pending, finished = self._after(cursor), self.closed
+                for seq, data in pending:
+                    yield seq, data
+                    cursor = seq
+                if finished and cursor >= self.last_seq:
+                    return
+        finally:
+            self.subscribers -= 1
+
+
+class BroadcastHub:
+    """Registry of live and recently finished run broadcasts.
+
+    `collect` drops finished runs after the retention window and live runs
+    that have published nothing for the idle timeout; `run_gc` calls it
+    periodically.
+    """
+
+    def __init__(self, retention_seconds: float = FINISHED_RETENTION_SECONDS,
+                 idle_timeout_seconds: float = IDLE_TIMEOUT_SECONDS):
+        self.retention_seconds = retention_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.runs = {}  # type: dict[str, RunBroadcast]
+        self.collected_runs = 0
+        self.evicted_events = 0  # from runs already dropped
+
+    def create(self, run_id: str) -> RunBroadcast:
+        broadcast = RunBroadcast(run_id)
+        self.runs[run_id] = broadcast
+        return broadcast
+
+    def get(self, run_id: str) -> RunBroadcast | None:
+        return self.runs.get(run_id)
+
+    def remove(self, run_id: str):
+        broadcast = self.runs.pop(run_id, None)
+        if broadcast is not None:
+            self.evicted_events += broadcast.evicted
+
+    async def finish(self, run_id: str):
+        """Close a run's stream; it is dropped once the retention window passes."""
+        broadcast = self.runs.get(run_id)
+        if broadcast is not None:
+            await broadcast.close()
+
+    async def collect(self, now: float | None = None) -> int:
+        now = now or time.time()
+        expired = []
+        for run_id, broadcast in list(self.runs.items()):
+            age = now - broadcast.updated_at
+            if broadcast.closed and age > self.retention_seconds:
+                expired.append(run_id)
+            elif not broadcast.closed and age > self.idle_timeout_seconds:
+                logger.warning("[Broadcast] Closing stream %s, idle for %.0fs", run_id, age)
+                await broadcast.close()
+                expired.append(run_id)
+        for run_id in expired:
+            self.remove(run_id)
+        if expired:
+            self.collected_runs += len(expired)
+            logger.info("[Broadcast] Collected %d streams, %d remaining", len(expired), len(self.runs))
+        return len(expired)
+
+    async def run_gc(self, interval: float = GC_INTERVAL_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error("[Broadcast] GC sweep failed: %s: %s", type(e).__name__, e)
+
+    def gauges(self) -> dict:
+        live = [b for b in self.runs.values() if not b.closed]
+        return {
+            "live_runs": len(live),
+            "finished_runs": len(self.runs) - len(live),
+            "subscribers": sum(b.subscribers for b in self.runs.values()),
+            "buffered_events": sum(len(b.events) for b in self.runs.values()),
+            "buffered_bytes": sum(b.buffered_bytes for b in self.runs.values()),
+            "evicted_events": self.evicted_events + sum(b.evicted for b in self.runs.values()),
+            "collected_runs": self.collected_runs,
+        }
+
+
+def parse_last_event_id(value: str | None) -> int:
+    try:
+        return max(0, int(value or 0))
+    except ValueError:
+        return 0
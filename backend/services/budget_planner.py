@@ -0,0 +1,192 @@
+"""Per-call output-token and web-search ceilings for each agent.
+
+A fixed ceiling is too small for 40-signal runs and needlessly large for
+10-signal ones. The planner starts from a linear model of each agent's
+output (base + per signal + per domain) and scales it by what the agent
+actually produced on recent calls: the 90th percentile of observed / modelled
+output, with calls that stopped at max_tokens counted as needing
+TRUNCATION_BUMP times what they produced. Every call's workload, ceilings,
+output and stop reason are recorded, so a truncation raises that agent's
+next budgets.
+
+History lives in memory; plan() only reads that snapshot, so it is safe to
+call on the event loop. The SQLite file is read once by ready() and written
+by record(), both off the loop.
+"""
+import os
+import math
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+
+from backend.models.analysis import AgentBudget
+from backend.services.response_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger("ewa.budget")
+
+ADAPTIVE_BUDGETS = os.getenv("ADAPTIVE_BUDGETS", "1") == "1"
+DEFAULT_MAX_TOKENS = 16000
+DEFAULT_MAX_SEARCHES = 5
+MAX_TOKENS_FLOOR = int(os.getenv("AGENT_MAX_TOKENS_FLOOR", "4000"))
+MAX_TOKENS_CEILING = int(os.getenv("AGENT_MAX_TOKENS_CEILING", "32000"))
+HEADROOM = 1.25  # ceiling over the expected output
+TRUNCATION_BUMP = 1.5
+HISTORY_WINDOW = 50  # recent calls per agent the planner learns from
+MIN_HISTORY = 3
+
+# agent -> (base, per signal, per domain) output tokens
+TOKEN_MODEL = {
+    "context": (3000, 0, 350),
+    "signal_hunter": (1500, 550, 0),
+    "corroboration": (800, 450, 0),
+    "devils_advocate": (800, 400, 0),
+    "synthesis": (3500, 650, 0),
+    "what_if": (6000, 0, 0),
+}
+
+# agent -> (base, signals per extra search, domains per extra search, most) web searches
+SEARCH_MODEL = {
+    "context": (3, 0, 2, 10),
+    "signal_hunter": (3, 4, 0, 15),
+    "corroboration": (2, 3, 0, 15),
+    "what_if": (5, 0, 0, 5),
+}
+
+
+def _round_up(tokens: float, step: int = 500) -> int:
+    return int(math.ceil(tokens / step) * step)
+
+
+class BudgetPlanner:
+    """Plans AgentBudgets from a per-agent output model and the agent's recent calls.
+
+    With `persist` off, calls are remembered for this process only.
+    """
+
+    def __init__(self, path: str, adaptive: bool = True, persist: bool = True):
+        self.path = path
+        self.adaptive = adaptive
+        self.persist = persist
+        self._conn = None
+        self._lock = threading.Lock()  # guards _history; never held across disk I/O
+        self._db_lock = threading.Lock()
+        self._history = None  # type: dict[str, deque] | None  # agent -> recent observations
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_calls ("
+                "agent TEXT NOT NULL, signals INTEGER, domains INTEGER, max_tokens INTEGER, output_tokens INTEGER, "
+                "max_searches INTEGER, searches INTEGER, stop_reason TEXT, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS agent_calls_recent ON agent_calls (agent, created_at DESC)")
+            self._conn.commit()
+        return self._conn
+
+    def load(self):
+        """Read recent calls from disk into memory. Blocks; use ready() from async code."""
+        rows = []
+        if self.persist:
+            with self._db_lock:
+                rows = self._db().execute(
+                    "SELECT agent, signals, domains, max_tokens, output_tokens, max_searches, searches, stop_reason "
+                    "FROM agent_calls ORDER BY created_at DESC LIMIT ?", (HISTORY_WINDOW * len(TOKEN_MODEL),)).fetchall()
+        history = {}
+        for row in reversed(rows):
+            history.setdefault(row[0], deque(maxlen=HISTORY_WINDOW)).append(row[1:])
+        with self._lock:
+            if self._history is None:
+                self._history = history
+
+    async def ready(self):
+        """Load history in a worker thread the first time it is needed."""
+        if self._history is None:
+            await asyncio.to_thread(self.load)
+
+    def _recent(self, agent: str) -> list:
+        """Snapshot of the agent's recent calls (empty until history is loaded)."""
+        with self._lock:
+            if self._history is None:
+                return []
+            return list(self._history.get(agent, ()))
+
+    @staticmethod
+    def expected_tokens(agent: str, signals: int, domains: int) -> float:
+        base, per_signal, per_domain = TOKEN_MODEL.get(agent, (DEFAULT_MAX_TOKENS / HEADROOM, 0, 0))
+        return base + per_signal * signals + per_domain * domains
+
+    def _observed_ratio(self, agent: str) -> float:
+        """90th percentile of actual / modelled output over the agent's recent calls (1.0 without history)."""
+        ratios = []
+        for signals, domains, _, output_tokens, _, _, stop_reason in self._recent(agent):
+            needed = output_tokens * (TRUNCATION_BUMP if stop_reason == "max_tokens" else 1)
+            ratios.append(needed / self.expected_tokens(agent, signals or 0, domains or 0))
+        if len(ratios) < MIN_HISTORY:
+            return 1.0
+        ratios.sort()
+        return ratios[min(len(ratios) - 1, int(0.9 * len(ratios)))]
+
+    def _searches(self, agent: str, signals: int, domains: int) -> int:
+        if agent not in SEARCH_MODEL:
+            return DEFAULT_MAX_SEARCHES
+        base, per_signals, per_domains, most = SEARCH_MODEL[agent]
+        searches = base + (math.ceil(signals / per_signals) if per_signals else 0) + (
+            math.ceil(domains / per_domains) if per_domains else 0)
+        # Calls that keep using every search they were allowed get two more.
+        recent = [(allowed, used) for *_, allowed, used, _ in self._recent(agent)[-10:] if used is not None]
+        if len(recent) >= MIN_HISTORY and sum(used >= allowed for allowed, used in recent) * 2 >= len(recent):
+            searches += 2
+        return max(1, min(searches, most))
+
+    def plan(self, agent: str, signals: int = 0, domains: int = 0) -> AgentBudget:
+        if not self.adaptive:
+            return AgentBudget(agent=agent, max_tokens=DEFAULT_MAX_TOKENS, max_searches=DEFAULT_MAX_SEARCHES,
+                               signals=signals, domains=domains)
+        expected = self.expected_tokens(agent, signals, domains) * self._observed_ratio(agent)
+        max_tokens = max(MAX_TOKENS_FLOOR, min(MAX_TOKENS_CEILING, _round_up(expected * HEADROOM)))
+        return AgentBudget(agent=agent, max_tokens=max_tokens, max_searches=self._searches(agent, signals, domains),
+                           signals=signals, domains=domains)
+
+    def record(self, budget: AgentBudget, output_tokens: int, stop_reason: str | None, searches: int | None = None):
+        """Record one finished call; a max_tokens stop is logged as a truncation."""
+        if stop_reason == "max_tokens":
+            logger.warning("[Budget] %s truncated at max_tokens=%d (%d signals, %d domains)",
+                           budget.agent, budget.max_tokens, budget.signals, budget.domains)
+        observation = (budget.signals, budget.domains, budget.max_tokens, output_tokens, budget.max_searches,
+                       searches, stop_reason)
+        with self._lock:
+            # Calls recorded before load() are read back from disk by it.
+            if self._history is not None:
+                self._history.setdefault(budget.agent, deque(maxlen=HISTORY_WINDOW)).append(observation)
+        if not self.persist:
+            return
+        with self._db_lock:
+            db = self._db()
+            db.execute("INSERT INTO agent_calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (budget.agent, *observation, time.time()))
+            db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            names = list(self._history or ())
+        agents = {}
+        for agent in names:
+            recent = self._recent(agent)
+            agents[agent] = {
+                "calls": len(recent),
+                "truncations": sum(1 for o in recent if o[6] == "max_tokens"),
+                "output_ratio_p90": round(self._observed_ratio(agent), 3),
+            }
+        return {"adaptive": self.adaptive, "agents": agents}
+
+
+budget_planner = BudgetPlanner(
+    path=os.getenv("BUDGET_HISTORY_PATH", str(DEFAULT_CACHE_DIR / "budgets.sqlite3")),
+    adaptive=ADAPTIVE_BUDGETS,
+)
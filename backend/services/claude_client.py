@@ -1,55 +1,160 @@
 import os
 import json
+import asyncio
 import logging
 import anthropic
+import httpx
 from dotenv import load_dotenv
 
+from backend.services.response_cache import response_cache
+from backend.services.json_stream import IncrementalJSONExtractor
+from backend.services.budget_planner import budget_planner, DEFAULT_MAX_TOKENS, DEFAULT_MAX_SEARCHES
+from backend.models.analysis import AgentBudget
+
 load_dotenv()
 
 logger = logging.getLogger("ewa.claude")
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
 MODEL = "claude-opus-4-6"
-MAX_TOKENS = 16000
-
-
-async def stream_agent_response(system_prompt: str, user_prompt: str, use_web_search: bool = False):
-    """Stream a Claude response, yielding text chunks and the final full text."""
+MAX_TOKENS = DEFAULT_MAX_TOKENS  # when the caller passes no budget
+
+# Concurrency limits for the shared async client. Every agent call holds one
+# slot of the semaphore for the whole stream; connections are pooled and kept
+# alive across calls so concurrent pipelines don't pay a TLS handshake each.
+MAX_CONCURRENT_CALLS = int(os.getenv("CLAUDE_MAX_CONCURRENT_CALLS", "8"))
+MAX_CONNECTIONS = int(os.getenv("CLAUDE_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("CLAUDE_MAX_KEEPALIVE_CONNECTIONS", "10"))
+
+
+def build_client(http_client: httpx.AsyncClient | None = None) -> anthropic.AsyncAnthropic:
+    """Build the async Anthropic client on top of a pooled httpx client."""
+    if http_client is None:
+        http_client = anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+    return anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), http_client=http_client)
+
+
+client = build_client()
+_call_slots = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+
+# The API allows four cache breakpoints per request: one goes on the system
+# prompt, the rest on the stable user-message prefix sections.
+MAX_PREFIX_BREAKPOINTS = 3
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _user_content(user_prompt: str, cache_prefix: list[str]) -> list[dict]:
+    """User message blocks: stable prefix sections first, each ending a cacheable prefix."""
+    blocks = []
+    for i, section in enumerate(cache_prefix):
+        block = {"type": "text", "text": section + "\n\n"}
+        if i >= len(cache_prefix) - MAX_PREFIX_BREAKPOINTS:
+            block["cache_control"] = CACHE_CONTROL
+        blocks.append(block)
+    blocks.append({"type": "text", "text": user_prompt})
+    return blocks
+
+
+USAGE_KEYS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+def _usage_dict(usage) -> dict:
+    return {key: getattr(usage, key, None) or 0 for key in USAGE_KEYS}
+
+
+async def stream_agent_response(
+    system_prompt: str,
+    user_prompt: str,
+    use_web_search: bool = False,
+    cache_prefix: list[str] | None = None,
+    budget: AgentBudget | None = None,
+):
+    """Stream a Claude response, yielding text chunks and the final full text.
+
+    `cache_prefix` holds prompt sections that repeat across calls (country
+    context, earlier agent outputs). They are sent ahead of `user_prompt` and,
+    like the system prompt, marked for provider-side prompt caching. The
+    complete event carries the call's token usage, including cache reads and
+    writes, and its stop reason.
+
+    `budget` (see budget_planner) sets max_tokens and web search max_uses;
+    the call's output and stop reason are then reported back to the planner.
+    A response cut off at max_tokens counts one "truncations" in its usage
+    and is not cached.
+    """
+    cache_prefix = cache_prefix or []
+    max_tokens = budget.max_tokens if budget else MAX_TOKENS
     tools = []
     if use_web_search:
-        tools.append({"type": "web_search_20250305", "name": "web_search", "max_uses": 5})
+        max_uses = budget.max_searches if budget and budget.max_searches else DEFAULT_MAX_SEARCHES
+        tools.append({"type": "web_search_20250305", "name": "web_search", "max_uses": max_uses})
 
     kwargs = dict(
         model=MODEL,
-        max_tokens=MAX_TOKENS,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_prompt}],
+        max_tokens=max_tokens,
+        system=[{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}],
+        messages=[{"role": "user", "content": _user_content(user_prompt, cache_prefix)}],
     )
     if tools:
         kwargs["tools"] = tools
 
-    logger.info(f"[Claude API] Calling model={MODEL}, max_tokens={MAX_TOKENS}, web_search={use_web_search}")
+    logger.info(f"[Claude API] Calling model={MODEL}, max_tokens={max_tokens}, "
+                f"web_search={tools[0]['max_uses'] if tools else False}")
     logger.debug(f"[Claude API] System prompt length: {len(system_prompt)} chars")
-    logger.debug(f"[Claude API] User prompt length: {len(user_prompt)} chars")
-
-    full_text = ""
-    chunk_count = 0
+    logger.debug(f"[Claude API] User prompt length: {sum(map(len, cache_prefix)) + len(user_prompt)} chars")
+
+    cache_key = response_cache.key(MODEL, system_prompt, [*cache_prefix, user_prompt], use_web_search)
+    cached_chunks = await asyncio.to_thread(response_cache.get, cache_key)
+    if cached_chunks is not None:
+        logger.info(f"[Claude API] Cache hit {cache_key[:12]}, replaying {len(cached_chunks)} chunks")
+        for chunk in cached_chunks:
+            yield {"type": "chunk", "content": chunk}
+        yield {"type": "complete", "content": "".join(cached_chunks), "usage": dict.fromkeys(USAGE_KEYS, 0),
+               "stop_reason": "end_turn"}
+        return
+
+    if _call_slots.locked():
+        logger.info(f"[Claude API] All {MAX_CONCURRENT_CALLS} call slots busy, waiting")
+
+    chunks = []
     try:
-        with client.messages.stream(**kwargs) as stream:
-            for event in stream:
-                if event.type == "content_block_delta":
-                    if hasattr(event.delta, "text") and event.delta.text is not None:
-                        full_text += event.delta.text
-                        chunk_count += 1
-                        yield {"type": "chunk", "content": event.delta.text}
-
-        logger.info(f"[Claude API] Response complete: {chunk_count} chunks, {len(full_text)} chars total")
+        async with _call_slots:
+            # messages.stream() validates and transforms the request params
+            # synchronously, a few ms per call once the prompt carries cached
+            # prefix blocks; build it off the loop and only send it from here.
+            request = await asyncio.to_thread(client.messages.stream, **kwargs)
+            async with request as stream:
+                async for event in stream:
+                    if event.type == "content_block_delta":
+                        if hasattr(event.delta, "text") and event.delta.text is not None:
+                            chunks.append(event.delta.text)
+                            yield {"type": "chunk", "content": event.delta.text}
+                final = await stream.get_final_message()
+                usage = _usage_dict(final.usage)
+                stop_reason = final.stop_reason
+                searches = getattr(getattr(final.usage, "server_tool_use", None), "web_search_requests", None)
+
+        full_text = "".join(chunks)
+        logger.info(f"[Claude API] Response complete: {len(chunks)} chunks, {len(full_text)} chars total, "
+                    f"input={usage['input_tokens']} cache_read={usage['cache_read_input_tokens']} "
+                    f"cache_write={usage['cache_creation_input_tokens']} output={usage['output_tokens']} "
+                    f"stop={stop_reason}")
     except Exception as e:
         logger.error(f"[Claude API] Error during streaming: {type(e).__name__}: {e}")
         raise
 
-    yield {"type": "complete", "content": full_text}
+    if budget is not None:
+        await asyncio.to_thread(budget_planner.record, budget, usage["output_tokens"], stop_reason, searches)
+    if stop_reason == "max_tokens":
+        logger.warning(f"[Claude API] Response truncated at max_tokens={max_tokens}, not caching it")
+        usage["truncations"] = 1
+    else:
+        await asyncio.to_thread(response_cache.put, cache_key, chunks)
+    yield {"type": "complete", "content": full_text, "usage": usage, "stop_reason": stop_reason}
 
 
 def extract_json_from_response(text: str):
@@ -78,24 +183,14 @@ def extract_json_from_response(text: str):
     except json.JSONDecodeError:
         pass
 
-    # Try to find any JSON object or array (prefer objects over arrays)
-    for start_char, end_char in [("{", "}"), ("[", "]")]:
-        start = text.find(start_char)
-        if start == -1:
-            continue
-        depth = 0
-        for i in range(start, len(text)):
-            if text[i] == start_char:
-                depth += 1
-            elif text[i] == end_char:
-                depth -= 1
-                if depth == 0:
-                    try:
-                        result = json.loads(text[start : i + 1])
-                        logger.info(f"[JSON Extract] Found embedded JSON ({i - start + 1} chars, starts at pos {start})")
-                        return result
-                    except json.JSONDecodeError:
-                        break
+    # Scan for embedded JSON objects, then arrays, in a single linear pass each
+    for opener in ("{", "["):
+        extractor = IncrementalJSONExtractor(opener=opener)
+        extractor.feed(text)
+        result = extractor.result()
+        if result is not None:
+            logger.info(f"[JSON Extract] Found embedded JSON ({type(result).__name__}) by scanning {len(text)} chars")
+            return result
 
     logger.error(f"[JSON Extract] Failed to extract JSON from response ({len(text)} chars). First 200 chars: {text[:200]}")
     return None
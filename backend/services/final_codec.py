@@ -0,0 +1,104 @@
+"""Compressed, chunked encoding of a run's final_data.
+
+final_data is split into two parts so the synthesis can be read without the
+raw agent outputs:
+
+- "synthesis": the synthesis agent's output plus config, token usage and
+  the other small top-level fields;
+- "sources": country_context and the signal hunter, corroboration and
+  devil's advocate outputs.
+
+Each part is compact JSON, zlib-compressed, and split into chunks of at most
+`chunk_bytes` so no stored document approaches Firestore's 1 MiB limit.
+place() decides which first chunks may ride on the parent document: at most
+`inline_bytes` in total, leaving the limit's remainder for its other fields.
+"""
+import os
+import json
+import zlib
+
+CHUNK_BYTES = int(os.getenv("FINAL_DATA_CHUNK_BYTES", str(512 * 1024)))
+INLINE_BYTES = int(os.getenv("FINAL_DATA_INLINE_BYTES", str(256 * 1024)))
+COMPRESSION_LEVEL = 6
+CODEC = "zlib"
+PARTS = ("synthesis", "sources")
+SOURCE_AGENTS = ("signal_hunter", "corroboration", "devils_advocate")
+
+
+def split(final_data: dict) -> dict[str, dict]:
+    agents = final_data.get("agents") or {}
+    synthesis = {k: v for k, v in final_data.items() if k not in ("agents", "country_context")}
+    synthesis["agents"] = {k: v for k, v in agents.items() if k not in SOURCE_AGENTS}
+    sources = {"agents": {k: v for k, v in agents.items() if k in SOURCE_AGENTS}}
+    if "country_context" in final_data:
+        sources["country_context"] = final_data["country_context"]
+    return {"synthesis": synthesis, "sources": sources}
+
+
+def join(parts: dict[str, dict]) -> dict:
+    """Inverse of split(); missing parts are simply left out."""
+    final_data = {}
+    agents = {}
+    for part in PARTS:
+        data = parts.get(part)
+        if data is None:
+            continue
+        agents.update(data.get("agents") or {})
+        final_data.update({k: v for k, v in data.items() if k != "agents"})
+    final_data["agents"] = {k: agents[k] for k in (*SOURCE_AGENTS, *agents) if k in agents}
+    return final_data
+
+
+def encode(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode(), COMPRESSION_LEVEL)
+
+
+def decode(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+def pack(final_data: dict, chunk_bytes: int = CHUNK_BYTES) -> tuple[dict, dict[str, list[bytes]]]:
+    """Return (manifest, {part: [chunk, ...]}) for final_data."""
+    manifest = {"codec": CODEC, "parts": {}}
+    chunks = {}
+    for part, data in split(final_data).items():
+        raw = json.dumps(data, separators=(",", ":"), default=str).encode()
+        blob = zlib.compress(raw, COMPRESSION_LEVEL)
+        chunks[part] = [blob[i:i + chunk_bytes] for i in range(0, len(blob), chunk_bytes)] or [b""]
+        manifest["parts"][part] = {"chunks": len(chunks[part]), "bytes": len(raw), "stored_bytes": len(blob)}
+    return manifest, chunks
+
+
+def place(manifest: dict, chunks: dict[str, list[bytes]],
+          inline_bytes: int = INLINE_BYTES) -> tuple[dict[str, bytes], list[tuple[str, int, bytes]]]:
+    """Split packed chunks into (inline first chunks by part, [(part, index, chunk), ...] stored apart).
+
+    Parts are considered in PARTS order, so the synthesis, read most often,
+    is the first to go inline. A part whose first chunk would take the inline
+    total past `inline_bytes` is stored apart entirely. Each part's manifest
+    entry records whether its first chunk is inline.
+    """
+    inline, apart, total = {}, [], 0
+    for part in PARTS:
+        blobs = chunks[part]
+        inlined = total + len(blobs[0]) <= inline_bytes
+        manifest["parts"][part]["inline"] = inlined
+        if inlined:
+            inline[part] = blobs[0]
+            total += len(blobs[0])
+        apart += [(part, i, blob) for i, blob in enumerate(blobs) if i or not inlined]
+    return inline, apart
+
+
+def stored_apart(manifest: dict, part: str) -> range:
+    """Indexes of the part's chunks stored apart from the parent document."""
+    entry = manifest["parts"][part]
+    # manifests written before place() existed always inlined the first chunk
+    return range(1 if entry.get("inline", True) else 0, entry["chunks"])
+
+
+def unpack(manifest: dict, chunks: dict[str, list[bytes]]) -> dict:
+    """Reassemble final_data from the chunks of whichever parts were fetched."""
+    if manifest.get("codec") != CODEC:
+        raise ValueError(f"Unsupported final_data codec: {manifest.get('codec')!r}")
+    return join({part: decode(b"".join(blobs)) for part, blobs in chunks.items()})
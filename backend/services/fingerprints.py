@@ -0,0 +1,262 @@
+"""Historical pre-crisis fingerprints and a local matcher.
+
+The cases Synthesis is told about in SYNTHESIS_SYSTEM, as structured data:
+each fingerprint weights a shared set of early-warning features (forex
+reserve stress, professional emigration, pharmacy stockouts, ...), and each
+feature is detected in a signal's text by keyword stems. The library is
+compiled once into a (fingerprints x features) weight matrix, so matching a
+run is one pass over its signals plus a matrix-vector product.
+
+A run's feature vector takes, per feature, the strongest signal showing it;
+a signal's strength comes from its impact and reliability, discounted if
+the Devil's Advocate weakened it, and debunked signals are left out. A
+fingerprint's score is the weighted share of its features present in the
+run (0-1).
+
+More fingerprints (and features) can be added without code changes in a
+JSON file at FINGERPRINT_LIBRARY_PATH: {"features": {id: [stem, ...]},
+"fingerprints": [{id, case, period, crisis, lead_months, markers: {feature:
+weight}}]}. To re-match stored runs after changing the library:
+
+    python -m backend.services.fingerprints [analysis_id ...]
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("ewa.fingerprints")
+
+FINGERPRINT_LIBRARY_PATH = os.getenv("FINGERPRINT_LIBRARY_PATH", "")
+HINT_LIMIT = 3  # matches handed to Synthesis
+MIN_SCORE = 0.15  # matches kept on a run
+
+# Feature id -> keyword stems, matched at word starts in a signal's text
+FEATURES = {
+    "agricultural_inputs": ["fertili", "agrochemical", "organic farming", "farm input", "pesticide", "seed suppl"],
+    "tourism_dependency": ["touris", "hotel occupanc", "visitor arrival", "cruise"],
+    "fx_reserves": ["forex reserve", "fx reserve", "foreign reserve", "reserve drawdown", "foreign exchange reserve",
+                    "import cover", "reserve adequacy"],
+    "regional_divergence": ["district", "provincial divergen", "regional divergen", "subnational"],
+    "professional_emigration": ["emigra", "brain drain", "passport", "visa appl", "doctors leav", "nurses leav",
+                                "diaspora", "exodus"],
+    "government_communication": ["censor", "statistics delay", "data release", "official communicat",
+                                 "government messag", "press freedom", "data blackout"],
+    "real_estate_volume": ["real estate", "property transaction", "housing sales", "property sales"],
+    "deposit_rates": ["deposit rate", "interest rate differential", "deposit outflow", "bank deposit",
+                      "dollar deposit"],
+    "generator_fuel": ["generator", "diesel", "fuel shortage", "fuel queue", "fuel rationing"],
+    "informal_fx": ["parallel market", "black market", "parallel exchange", "informal dollar", "exchange bureau",
+                    "parallel rate", "currency premium"],
+    "food_prices": ["food price", "bread", "wheat", "grain price", "staple price", "food inflation"],
+    "youth_unemployment": ["youth unemploy", "unemployed youth", "jobless youth", "neet"],
+    "education_job_gap": ["graduate unemploy", "university graduate", "graduates", "skills mismatch"],
+    "social_media": ["social media", "online mobili", "vpn", "messaging app"],
+    "microfinance_defaults": ["microfinance", "microloan", "microcredit", "informal lend"],
+    "security_recruitment": ["security force", "police recruit", "army recruit", "military recruit", "defection"],
+    "subnational_payment_delays": ["salary arrear", "wage arrear", "payment delay", "provincial payment",
+                                   "municipal payment", "unpaid salar", "pension arrear", "arrears"],
+    "bond_spreads": ["bond spread", "municipal bond", "eurobond", "sovereign spread", "yield spread", "cds"],
+    "remittances": ["remittanc"],
+    "export_preselling": ["pre-sell", "presell", "forward sale", "export hoard", "export pre", "withholding export"],
+    "migration": ["migration", "migrant", "outmigration", "border crossing"],
+    "pharmacy_stockouts": ["pharmac", "medicine shortage", "drug shortage", "stockout", "stock-out", "insulin"],
+    "infrastructure_maintenance": ["maintenance", "blackout", "power cut", "outage", "load shedding",
+                                   "water rationing"],
+    "food_imports": ["food import", "grain import", "import bill", "wheat import"],
+    "construction_overextension": ["construction", "housing start", "developer", "building permit"],
+    "current_account": ["current account", "trade deficit", "import compression"],
+    "corporate_fx_debt": ["corporate fx debt", "dollar-denominated", "foreign currency debt", "fx debt",
+                          "external debt", "fx loan"],
+}
+
+FINGERPRINTS = [
+    {"id": "sri_lanka_2020", "case": "Sri Lanka Pre-Default", "period": "2020-2021", "crisis": "sovereign default",
+     "lead_months": 18, "markers": {
+         "agricultural_inputs": 1.0, "tourism_dependency": 1.0, "fx_reserves": 1.0, "regional_divergence": 0.5,
+         "professional_emigration": 0.75, "government_communication": 0.5}},
+    {"id": "lebanon_2018", "case": "Lebanon Pre-Collapse", "period": "2018-2019", "crisis": "banking collapse",
+     "lead_months": 15, "markers": {
+         "real_estate_volume": 1.0, "deposit_rates": 1.0, "generator_fuel": 0.75, "professional_emigration": 0.75,
+         "informal_fx": 1.0}},
+    {"id": "arab_spring_2010", "case": "Arab Spring Pre-Revolution", "period": "2010", "crisis": "political revolt",
+     "lead_months": 12, "markers": {
+         "food_prices": 1.0, "youth_unemployment": 1.0, "education_job_gap": 0.75, "social_media": 0.5,
+         "microfinance_defaults": 0.75, "security_recruitment": 0.5}},
+    {"id": "argentina_2017", "case": "Argentina Pre-Currency Crisis", "period": "2017-2018",
+     "crisis": "currency crisis", "lead_months": 12, "markers": {
+         "subnational_payment_delays": 1.0, "bond_spreads": 1.0, "remittances": 0.5, "export_preselling": 0.75,
+         "migration": 0.5}},
+    {"id": "venezuela_2013", "case": "Venezuela Pre-Collapse", "period": "2013-2015", "crisis": "economic collapse",
+     "lead_months": 24, "markers": {
+         "pharmacy_stockouts": 1.0, "informal_fx": 1.0, "professional_emigration": 0.75,
+         "infrastructure_maintenance": 0.75, "food_imports": 0.75}},
+    {"id": "turkey_2017", "case": "Turkey Pre-Lira Crisis", "period": "2017-2018", "crisis": "currency crisis",
+     "lead_months": 12, "markers": {
+         "construction_overextension": 1.0, "current_account": 1.0, "corporate_fx_debt": 1.0,
+         "tourism_dependency": 0.5}},
+]
+
+# How much of a signal's strength counts, by Devil's Advocate verdict
+VERDICT_WEIGHTS = {"survives": 1.0, "partially_debunked": 0.6, "debunked": 0.0}
+SIGNAL_TEXT_FIELDS = ("name", "description", "why_actually_meaningful", "evidence", "data_source")
+
+
+class FingerprintLibrary:
+    """Fingerprints compiled to a weight matrix over their features."""
+
+    def __init__(self, features: dict[str, list[str]], fingerprints: list[dict]):
+        self.features = list(features)
+        self.fingerprints = fingerprints
+        self._patterns = [re.compile(r"\b(?:" + "|".join(re.escape(stem) for stem in features[f]) + ")")
+                          for f in self.features]
+        self._column = {f: i for i, f in enumerate(self.features)}
+        self.weights = np.zeros((len(fingerprints), len(self.features)))
+        for row, fp in enumerate(fingerprints):
+            for feature, weight in fp["markers"].items():
+                self.weights[row, self._column[feature]] = weight
+        self._totals = self.weights.sum(axis=1)
+
+    @classmethod
+    def load(cls, path: str = FINGERPRINT_LIBRARY_PATH) -> "FingerprintLibrary":
+        """The built-in library, extended (or overridden by id) from the JSON file at `path` if set."""
+        features = dict(FEATURES)
+        fingerprints = {fp["id"]: fp for fp in FINGERPRINTS}
+        if path:
+            with open(path) as f:
+                extra = json.load(f)
+            features.update(extra.get("features") or {})
+            fingerprints.update({fp["id"]: fp for fp in extra.get("fingerprints") or []})
+            logger.info("[Fingerprints] Loaded %s: %d fingerprints over %d features",
+                        path, len(fingerprints), len(features))
+        return cls(features, list(fingerprints.values()))
+
+    def signal_features(self, signal: dict) -> np.ndarray:
+        """0/1 vector of the features a signal's text shows."""
+        text = " ".join(str(signal.get(k) or "") for k in SIGNAL_TEXT_FIELDS).lower()
+        return np.array([1.0 if p.search(text) else 0.0 for p in self._patterns])
+
+    def match(self, signals: list[dict], min_score: float = 0.0) -> list[dict]:
+        """Score every fingerprint against a run's signals, best first.
+
+        Signals are dicts with name/description/... text, "scores" (impact,
+        reliability; 0-100) and optionally "verdict". Fingerprints scoring
+        below min_score are left out.
+        """
+        if not signals:
+            return []
+        hits = np.array([self.signal_features(s) for s in signals])  # signals x features
+        strength = np.array([_strength(s) for s in signals])
+        weighted = hits * strength[:, None]
+        run_vector = weighted.max(axis=0)
+        scores = self.weights @ run_vector / self._totals
+
+        matches = []
+        for row in np.argsort(-scores, kind="stable"):
+            if scores[row] <= 0 or scores[row] < min_score:
+                continue
+            fp = self.fingerprints[row]
+            matched, missing = [], []
+            for feature in fp["markers"]:
+                ids = list(dict.fromkeys(str(signals[i].get("id") or signals[i].get("signal_id") or i)
+                                         for i in np.flatnonzero(weighted[:, self._column[feature]])))
+                if ids:
+                    matched.append({"feature": feature, "signals": ids})
+                else:
+                    missing.append(feature)
+            matches.append({
+                "id": fp["id"],
+                "historical_case": f"{fp['case']} ({fp['period']})",
+                "crisis": fp.get("crisis"),
+                "lead_months": fp.get("lead_months"),
+                "score": round(float(scores[row]), 3),
+                "match_strength": _strength_label(scores[row]),
+                "matched_markers": matched,
+                "missing_markers": missing,
+            })
+        return matches
+
+
+def _strength(signal: dict) -> float:
+    scores = signal.get("scores") or signal.get("adjusted_scores") or signal.get("preliminary_scores") or {}
+    impact = scores.get("impact", 50)
+    reliability = scores.get("reliability", 50)
+    base = (0.6 * impact + 0.4 * reliability) / 100 if isinstance(impact, (int, float)) and isinstance(
+        reliability, (int, float)) else 0.5
+    return max(0.0, min(1.0, base)) * VERDICT_WEIGHTS.get(signal.get("verdict"), 1.0)
+
+
+def _strength_label(score: float) -> str:
+    return "strong" if score >= 0.5 else "moderate" if score >= 0.3 else "weak"
+
+
+def surviving_signals(hunted: list | None, debunking_results: list | None) -> list[dict]:
+    """Hunted signals joined with their Devil's Advocate verdict and adjusted scores."""
+    verdicts = {r.get("signal_id"): r for r in debunking_results or [] if isinstance(r, dict)}
+    signals = []
+    for signal in hunted or []:
+        if not isinstance(signal, dict):
+            continue
+        result = verdicts.get(signal.get("id")) or {}
+        merged = {**signal, "verdict": result.get("verdict")}
+        if isinstance(result.get("adjusted_scores"), dict):
+            merged["scores"] = result["adjusted_scores"]
+        signals.append(merged)
+    return signals
+
+
+def hints_section(matches: list[dict], limit: int = HINT_LIMIT) -> str:
+    """Prompt section handing the top local matches to Synthesis."""
+    lines = ["PRECOMPUTED FINGERPRINT MATCHES (local keyword matcher; a starting point — confirm or reject "
+             "each against the evidence, and report divergences):"]
+    for m in matches[:limit]:
+        markers = "; ".join(f"{mk['feature']}: {', '.join(mk['signals'])}" for mk in m["matched_markers"])
+        lines.append(f"- {m['historical_case']} — score {m['score']:.2f} ({m['match_strength']}), "
+                     f"typical lead ~{m['lead_months']} months. Matched: {markers}. "
+                     f"Not seen: {', '.join(m['missing_markers']) or 'none'}")
+    if len(lines) == 1:
+        lines.append("- none above threshold")
+    return "\n".join(lines)
+
+
+def stored_run_matches(analysis: dict | None, min_score: float = MIN_SCORE) -> list[dict] | None:
+    """Match a stored analysis's scored signals against the current library (None if it has none)."""
+    synthesis = (((analysis or {}).get("final_data") or {}).get("agents") or {}).get("synthesis") or {}
+    signals = synthesis.get("scored_signals") if isinstance(synthesis, dict) else None
+    if not isinstance(signals, list) or not signals:
+        return None
+    return fingerprint_library.match([s for s in signals if isinstance(s, dict)], min_score)
+
+
+fingerprint_library = FingerprintLibrary.load()
+
+
+async def _rematch(ids: list[str]):
+    from backend.services.persistence import persistence
+
+    if not ids:
+        cursor = None
+        while True:
+            page, cursor = await persistence.list_run_summaries(200, cursor, status="completed")
+            ids += [run["id"] for run in page]
+            if cursor is None:
+                break
+    for analysis_id in ids:
+        analysis = await persistence.get_synthesis(analysis_id)
+        start = time.perf_counter()
+        matches = stored_run_matches(analysis)
+        elapsed = (time.perf_counter() - start) * 1000
+        if matches is None:
+            print(f"{analysis_id}: no scored signals")
+            continue
+        top = ", ".join(f"{m['historical_case']} {m['score']:.2f}" for m in matches[:HINT_LIMIT]) or "none"
+        print(f"{analysis_id}: {top}  ({elapsed:.1f}ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(_rematch(sys.argv[1:]))
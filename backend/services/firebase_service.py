@@ -1,10 +1,14 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
-from datetime import datetime, timezone
+from google.cloud.firestore_v1.base_query import FieldFilter
 import json
 import logging
 import os
 
+from backend.models.analysis import RunSummary
+from backend.services import final_codec
+from backend.services.storage import SUMMARIES, FINAL_CHUNKS, CHECKPOINTS, Cursor, checkpoints_of
+
 logger = logging.getLogger("ewa.firebase")
 
 # Lazy Firebase initialization
@@ -45,91 +49,184 @@ def _get_db():
     return _db
 
 
-def save_analysis(analysis_id: str, config: dict, status: str = "running"):
-    db = _get_db()
-    doc_ref = db.collection("analyses").document(analysis_id)
-    doc_ref.set(
-        {
-            "config": config,
-            "status": status,
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc),
-        },
-        merge=True,
-    )
-    return analysis_id
-
-
-def update_analysis_status(analysis_id: str, status: str):
-    db = _get_db()
-    doc_ref = db.collection("analyses").document(analysis_id)
-    doc_ref.update({"status": status, "updated_at": datetime.now(timezone.utc)})
-
-
-def save_agent_output(analysis_id: str, agent_name: str, output: dict):
-    db = _get_db()
-    doc_ref = db.collection("analyses").document(analysis_id)
-    doc_ref.update(
-        {
-            f"agents.{agent_name}": output,
-            "updated_at": datetime.now(timezone.utc),
-        }
-    )
+def _doc_ref(path: tuple):
+    """Document reference for a path of alternating collection/document ids."""
+    ref = _get_db()
+    for i in range(0, len(path), 2):
+        ref = ref.collection(path[i]).document(path[i + 1])
+    return ref
+
+
+def _pack_final_data(kind: str, path: tuple, fields: dict) -> list[tuple]:
+    """Store a final_data field compressed: first chunks within the inline budget
+    on the document (final_inline.<part>), the rest in the final_chunks
+    subcollection (see final_codec.place). Returns the extra chunk writes."""
+    manifest, chunks = final_codec.pack(fields.pop("final_data"))
+    inline, apart = final_codec.place(manifest, chunks)
+    fields["final_manifest"] = manifest
+    fields["final_inline"] = inline
+    if kind != "set":
+        fields["final_data"] = firestore.DELETE_FIELD  # drop an uncompressed copy from older writes
+        fields["agents"] = firestore.DELETE_FIELD  # and checkpoints older runs kept on the document
+    return [("set", (*path, FINAL_CHUNKS, f"{part}-{i}"), {"data": blob}) for part, i, blob in apart]
+
+
+def _unpack_final_data(doc_ref, data: dict, parts=final_codec.PARTS) -> dict:
+    """Replace the stored manifest and chunks of `parts` with a final_data dict."""
+    manifest = data.pop("final_manifest", None)
+    inline = data.pop("final_inline", None) or {}
+    if not manifest:
+        return data
+    apart = {part: final_codec.stored_apart(manifest, part) for part in parts}
+    chunks = {part: [] if apart[part].start == 0 else [inline.get(part, b"")] for part in parts}
+    refs = [doc_ref.collection(FINAL_CHUNKS).document(f"{part}-{i}") for part in parts for i in apart[part]]
+    if refs:
+        fetched = {doc.id: doc.get("data") for doc in _get_db().get_all(refs)}
+        for part in parts:
+            chunks[part] += [fetched[f"{part}-{i}"] for i in apart[part]]
+    data["final_data"] = final_codec.unpack(manifest, chunks)
+    return data
+
+
+def commit_writes(ops: list[tuple]):
+    """Commit (kind, path, fields) writes in one batch, in order.
+
+    kind is "set", "merge" (set with merge=True), "update" (fields may use
+    dotted paths) or "delete". A batch holds at most 500 writes. A final_data field is
+    stored compressed and chunked (see final_codec).
+    """
+    expanded = []
+    for kind, path, fields in ops:
+        if len(path) == 2 and path[0] == "analyses" and "final_data" in fields:
+            fields = dict(fields)
+            extra = _pack_final_data(kind, path, fields)
+            expanded += [(kind, path, fields), *extra]
+        else:
+            expanded.append((kind, path, fields))
+
+    batch = _get_db().batch()
+    for kind, path, fields in expanded:
+        ref = _doc_ref(path)
+        if kind == "update":
+            batch.update(ref, fields)
+        elif kind == "delete":
+            batch.delete(ref)
+        else:
+            batch.set(ref, fields, merge=kind == "merge")
+    batch.commit()
 
 
-def save_final_analysis(analysis_id: str, final_data: dict):
+def get_analysis(analysis_id: str):
     db = _get_db()
     doc_ref = db.collection("analyses").document(analysis_id)
-    doc_ref.update(
-        {
-            "status": "completed",
-            "final_data": final_data,
-            "updated_at": datetime.now(timezone.utc),
-        }
-    )
+    doc = doc_ref.get()
+    if doc.exists:
+        return _unpack_final_data(doc_ref, doc.to_dict())
+    return None
 
 
-def get_analysis(analysis_id: str):
+def get_synthesis(analysis_id: str):
+    """Like get_analysis, but final_data holds only the synthesis part and
+    no raw agent output is downloaded."""
     db = _get_db()
     doc_ref = db.collection("analyses").document(analysis_id)
-    doc = doc_ref.get()
+    doc = doc_ref.get(field_paths=[
+        "config", "status", "created_at", "updated_at", "final_manifest", "final_inline.synthesis",
+        # analyses saved before final_data was compressed
+        "final_data.config", "final_data.agents.synthesis", "final_data.token_usage",
+    ])
     if doc.exists:
-        return doc.to_dict()
+        return _unpack_final_data(doc_ref, doc.to_dict(), parts=("synthesis",))
     return None
 
 
+def get_checkpoints(analysis_id: str) -> dict:
+    doc_ref = _get_db().collection("analyses").document(analysis_id)
+    checkpoints = {doc.id: final_codec.decode(doc.get("blob")) for doc in doc_ref.collection(CHECKPOINTS).stream()}
+    if not checkpoints:
+        # runs checkpointed before the subcollection existed
+        doc = doc_ref.get(field_paths=["agents"])
+        checkpoints = checkpoints_of(doc.to_dict()) if doc.exists else {}
+    return checkpoints
+
+
 def list_analyses():
     """List all analyses from Firestore (most recent first)."""
     db = _get_db()
     docs = db.collection("analyses").order_by("created_at", direction=firestore.Query.DESCENDING).limit(50).stream()
     results = []
     for doc in docs:
-        data = doc.to_dict()
+        data = _unpack_final_data(doc.reference, doc.to_dict())
         data["id"] = doc.id
         results.append(data)
     return results
 
 
+def list_what_ifs(analysis_id: str):
+    db = _get_db()
+    docs = (
+        db.collection("analyses")
+        .document(analysis_id)
+        .collection("what_if_scenarios")
+        .order_by("created_at", direction=firestore.Query.DESCENDING)
+        .stream()
+    )
+    return [{"id": doc.id, **doc.to_dict()} for doc in docs]
+
+
+def list_run_summaries(limit: int = 50, cursor: Cursor | None = None, country: str | None = None,
+                       status: str | None = None, risk_level: str | None = None):
+    """Page through run summaries, newest first (ties broken by id).
+
+    Returns (summaries, next_cursor); pass next_cursor back to get the
+    following page. The ordering needs a composite index on run_summaries
+    (filter fields + created_at desc + id desc); Firestore's error message
+    links to create it.
+    """
+    query = _get_db().collection(SUMMARIES)
+    for field, value in (("country", country), ("status", status), ("risk_level", risk_level)):
+        if value:
+            query = query.where(filter=FieldFilter(field, "==", value))
+    query = (query.order_by("created_at", direction=firestore.Query.DESCENDING)
+             .order_by("id", direction=firestore.Query.DESCENDING))
+    if cursor is not None:
+        query = query.start_after({"created_at": cursor[0], "id": cursor[1]})
+    results = [doc.to_dict() for doc in query.limit(limit + 1).stream()]
+    next_cursor = (results[limit - 1]["created_at"], results[limit - 1]["id"]) if len(results) > limit else None
+    return results[:limit], next_cursor
+
+
+def backfill_run_summaries() -> int:
+    """Write summaries for analyses stored before summaries existed."""
+    db = _get_db()
+    written = 0
+    for doc in db.collection("analyses").stream():
+        if db.collection(SUMMARIES).document(doc.id).get().exists:
+            continue
+        data = doc.to_dict()
+        created = data.get("created_at")
+        summary = RunSummary.from_run(doc.id, data.get("config") or {}, data.get("status", "unknown"),
+                                      created.timestamp() if hasattr(created, "timestamp") else 0,
+                                      data.get("final_data") if isinstance(data.get("final_data"), dict) else None)
+        db.collection(SUMMARIES).document(doc.id).set(summary.model_dump())
+        written += 1
+    return written
+
+
 def delete_analysis(analysis_id: str):
     db = _get_db()
     doc_ref = db.collection("analyses").document(analysis_id)
     # Delete subcollections (what_if_scenarios)
     for sub_doc in doc_ref.collection("what_if_scenarios").stream():
         sub_doc.reference.delete()
+    for sub_doc in doc_ref.collection(FINAL_CHUNKS).stream():
+        sub_doc.reference.delete()
+    for sub_doc in doc_ref.collection(CHECKPOINTS).stream():
+        sub_doc.reference.delete()
     doc_ref.delete()
+    db.collection(SUMMARIES).document(analysis_id).delete()
 
 
-def save_what_if(analysis_id: str, scenario_id: str, result: dict):
-    db = _get_db()
-    doc_ref = (
-        db.collection("analyses")
-        .document(analysis_id)
-        .collection("what_if_scenarios")
-        .document(scenario_id)
-    )
-    doc_ref.set(
-        {
-            "result": result,
-            "created_at": datetime.now(timezone.utc),
-        }
-    )
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Backfilled %d run summaries", backfill_run_summaries())
@@ -0,0 +1,117 @@
+import json
+import logging
+from bisect import bisect_right
+
+logger = logging.getLogger("ewa.json_stream")
+
+
+class IncrementalJSONExtractor:
+    """Single-pass scanner that finds JSON values in a streamed LLM response.
+
+    Feed response chunks as they arrive. Prose and markdown outside the JSON
+    are skipped. Every character is scanned exactly once, so a whole response
+    costs linear time however it is chunked. Each object that completes
+    inside one of the `watch` arrays of the top-level object (for example
+    `signals`) is returned by `feed` as soon as its closing brace arrives.
+    """
+
+    def __init__(self, watch: tuple[str, ...] = (), opener: str = "{"):
+        self.watch = set(watch)
+        self.opener = opener
+        self.values = []  # complete, parseable top-level values in order
+
+        # Chunks of the current top-level value and their offsets in the
+        # response; earlier text is dropped once no value spans it.
+        self._chunks = []
+        self._starts = []
+        self._pos = 0  # offset of the next character to scan
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._key = None  # key of the top-level member being read
+        self._root_start = 0
+        self._watched_depth = None  # stack depth of the watched array currently open
+        self._watched_key = None
+        self._element_start = None
+        self._element_counts = {}
+
+    def feed(self, chunk: str) -> list[tuple[str, int, dict]]:
+        """Consume a chunk; return (array key, element index, element) for each element completed."""
+        base, completed = self._pos, []
+        self._chunks.append(chunk)
+        self._starts.append(base)
+        for i, ch in enumerate(chunk, start=base):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = self._span(self._string_start, i)
+                continue
+
+            if not self._stack:
+                if ch == self.opener:
+                    self._stack.append(ch)
+                    self._root_start = i
+                    self._key = None
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch == ":":
+                if len(self._stack) == 1:
+                    self._key = self._last_string
+            elif ch in "{[":
+                if ch == "[" and len(self._stack) == 1 and self._key in self.watch:
+                    self._watched_depth, self._watched_key = len(self._stack) + 1, self._key
+                elif ch == "{" and len(self._stack) == self._watched_depth:
+                    self._element_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                self._stack.pop()
+                depth = len(self._stack)
+                if ch == "}" and depth == self._watched_depth and self._element_start is not None:
+                    element = self._parse(self._span(self._element_start, i + 1))
+                    self._element_start = None
+                    if isinstance(element, dict):
+                        index = self._element_counts.get(self._watched_key, 0)
+                        self._element_counts[self._watched_key] = index + 1
+                        completed.append((self._watched_key, index, element))
+                elif ch == "]" and depth + 1 == self._watched_depth:
+                    self._watched_depth = self._watched_key = None
+                elif depth == 0:
+                    value = self._parse(self._span(self._root_start, i + 1))
+                    if value is not None:
+                        self.values.append(value)
+        self._pos = base + len(chunk)
+        if not self._stack:
+            self._chunks.clear()
+            self._starts.clear()
+        return completed
+
+    def _span(self, start: int, end: int) -> str:
+        """Response text between two offsets, joined from the chunks that hold it."""
+        first = max(0, bisect_right(self._starts, start) - 1)
+        last = bisect_right(self._starts, end - 1, lo=first)
+        text = "".join(self._chunks[first:last])
+        offset = self._starts[first]
+        return text[start - offset:end - offset]
+
+    @staticmethod
+    def _parse(span: str):
+        try:
+            return json.loads(span)
+        except json.JSONDecodeError:
+            return None
+
+    def result(self):
+        """The first complete top-level value, preferring objects, or None."""
+        for value in self.values:
+            if isinstance(value, dict):
+                return value
+        return self.values[0] if self.values else None
@@ -0,0 +1,290 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+from backend.services import storage
+from backend.services.storage import StorageEngine, Cursor, create_engine
+from backend.services.analysis_cache import AnalysisCache, analysis_cache
+from backend.services.signal_index import SignalIndex, signal_index
+
+logger = logging.getLogger("ewa.persistence")
+
+# Writes queued within this window go out in one batched commit.
+FLUSH_INTERVAL = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL_MS", "50")) / 1000
+MAX_BATCH_WRITES = 500  # Firestore limit per batch
+LATENCY_SAMPLES = 512
+
+
+class OpStats:
+    """Latency of one kind of operation, over its most recent samples."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds: float, ok: bool = True):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.samples.append(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2) if ordered else 0.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+        }
+
+
+class AsyncPersistence:
+    """Non-blocking access to the analysis store (a StorageEngine).
+
+    Reads run in a worker thread. Status, checkpoint, what-if and final writes
+    are queued and committed in batches by a background flusher; queued
+    updates to the same document are merged into a single write. Write methods
+    return immediately unless `wait=True`, in which case they return once the
+    write is committed (and raise if it failed).
+
+    Completed analyses and what-if lists are read through `cache`; any write
+    to a run invalidates its entries. Saving a final analysis also (re)indexes
+    its scored signals in `index`, and deleting a run removes them.
+    """
+
+    def __init__(self, engine: StorageEngine, cache: AnalysisCache | None = None,
+                 index: SignalIndex | None = None, flush_interval: float = FLUSH_INTERVAL):
+        self.engine = engine
+        self.cache = cache or AnalysisCache(max_bytes=0, enabled=False)
+        self.index = index or SignalIndex(enabled=False)
+        self.flush_interval = flush_interval
+        self._pending = []  # type: list[list]  # [kind, path, fields, [(op, enqueued_at, future)]]
+        self._committing = []  # type: list[list]  # the batch being committed
+        self._wakeup = None
+        self._flusher = None
+        self._stats = {}  # type: dict[str, OpStats]
+        self.batches = 0
+        self.coalesced_writes = 0
+
+    def _stat(self, op: str) -> OpStats:
+        return self._stats.setdefault(op, OpStats())
+
+    async def _read(self, op: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(fn, *args)
+        except Exception:
+            self._stat(op).record(time.perf_counter() - start, ok=False)
+            raise
+        self._stat(op).record(time.perf_counter() - start)
+        return result
+
+    # ── Write queue ──
+
+    def _enqueue(self, op: str, kind: str, path: tuple, fields: dict) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Nobody has to await a fire-and-forget write; failures are logged by the flusher.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        # A what-if write leaves the analysis itself untouched.
+        self.cache.invalidate(path[1], ("what_ifs",) if len(path) > 2 else ("analysis", "synthesis", "what_ifs"))
+
+        now = time.perf_counter()
+        last = next((write for write in reversed(self._pending) if write[1] == path), None)
+        if kind == "update" and last and last[0] == "update":
+            last[2].update(fields)
+            last[3].append((op, now, future))
+            self.coalesced_writes += 1
+        else:
+            self._pending.append([kind, path, dict(fields), [(op, now, future)]])
+
+        if self._flusher is None or self._flusher.done():
+            self._wakeup = asyncio.Event()
+            self._flusher = loop.create_task(self._run_flusher())
+        self._wakeup.set()
+        return future
+
+    async def _write(self, wait: bool, *writes: tuple):
+        """Queue (op, kind, path, fields) writes; with wait, return once all are committed."""
+        futures = [self._enqueue(*write) for write in writes]
+        if wait:
+            await asyncio.gather(*futures)
+
+    async def _run_flusher(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(self.flush_interval)
+            while self._pending:
+                await self._commit(self._pending[:MAX_BATCH_WRITES])
+
+    async def _commit(self, writes: list[list]):
+        del self._pending[:len(writes)]
+        self._committing = writes
+        start = time.perf_counter()
+        errors = [None] * len(writes)
+        try:
+            await asyncio.to_thread(self.engine.commit_writes, [(w[0], w[1], w[2]) for w in writes])
+        except Exception as e:
+            logger.warning("[Persistence] Batch of %d writes failed: %s: %s", len(writes), type(e).__name__, e)
+            errors = [e] * len(writes)
+            if len(writes) > 1:
+                # One bad write (e.g. an update to a deleted run) fails the whole
+                # batch; retry individually so the others still land.
+                for i, w in enumerate(writes):
+                    try:
+                        await asyncio.to_thread(self.engine.commit_writes, [(w[0], w[1], w[2])])
+                        errors[i] = None
+                    except Exception as e:
+                        logger.warning("[Persistence] %s on %s failed: %s: %s",
+                                       w[0], "/".join(w[1]), type(e).__name__, e)
+        done = time.perf_counter()
+        self._committing = []
+        self.batches += 1
+        self._stat("batch_commit").record(done - start, ok=not any(errors))
+        for write, error in zip(writes, errors):
+            for op, enqueued_at, future in write[3]:
+                self._stat(op).record(done - enqueued_at, ok=error is None)
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    async def flush(self):
+        """Wait until every write queued so far is committed."""
+        futures = [f for write in self._committing + self._pending for _, _, f in write[3]]
+        if futures:
+            self._wakeup.set()
+            await asyncio.gather(*futures, return_exceptions=True)
+
+    async def close(self):
+        """Stop the flusher and commit every queued write now, without waiting
+        out the batching interval (on shutdown)."""
+        # Outside a commit the flusher is only ever parked in its wait or sleep.
+        while self._committing:
+            await asyncio.gather(*(f for write in self._committing for _, _, f in write[3]), return_exceptions=True)
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        while self._pending:
+            await self._commit(self._pending[:MAX_BATCH_WRITES])
+
+    def _has_pending(self, analysis_id: str) -> bool:
+        return any(write[1][1] == analysis_id for write in self._committing + self._pending)
+
+    # ── Analyses ──
+
+    async def save_analysis(self, analysis_id: str, config: dict, status: str = "running", wait: bool = False):
+        await self._write(wait, *storage.save_analysis_writes(analysis_id, config, status))
+
+    async def update_analysis_status(self, analysis_id: str, status: str, wait: bool = False):
+        await self._write(wait, *storage.update_status_writes(analysis_id, status))
+
+    async def save_agent_output(self, analysis_id: str, agent_name: str, output: dict, wait: bool = False):
+        await self._write(wait, *storage.agent_output_writes(analysis_id, agent_name, output))
+
+    async def save_final_analysis(self, analysis_id: str, final_data: dict, wait: bool = True):
+        await self._write(wait, *storage.final_analysis_writes(analysis_id, final_data))
+        if self.index.enabled:
+            try:
+                await self._read("index_run", self.index.add_run, analysis_id, final_data)
+            except Exception as e:
+                logger.warning("[SignalIndex] Failed to index %s: %s", analysis_id, e)
+
+    async def save_what_if(self, analysis_id: str, scenario_id: str, result: dict, wait: bool = False):
+        await self._write(wait, *storage.what_if_writes(analysis_id, scenario_id, result))
+
+    async def _cached_read(self, kind: str, op: str, fn, analysis_id: str, cacheable=lambda value: True):
+        cached = self.cache.get(kind, analysis_id)
+        if cached is not None:
+            return cached
+        # Read-your-writes: queued writes for this run land before it is read.
+        if self._has_pending(analysis_id):
+            await self.flush()
+        token = self.cache.begin_read()
+        try:
+            value, size = await self._read(op, self.cache.sized, fn, analysis_id)
+            if cacheable(value):
+                self.cache.put(kind, analysis_id, value, size, token)
+        finally:
+            self.cache.release(token)
+        return value
+
+    @staticmethod
+    def _completed(analysis) -> bool:
+        return bool(analysis) and analysis.get("status") == "completed"
+
+    async def get_analysis(self, analysis_id: str):
+        return await self._cached_read("analysis", "get_analysis", self.engine.get_analysis, analysis_id,
+                                       self._completed)
+
+    async def get_synthesis(self, analysis_id: str):
+        """The analysis with only the synthesis part of final_data (no raw agent outputs)."""
+        return await self._cached_read("synthesis", "get_synthesis", self.engine.get_synthesis, analysis_id,
+                                       self._completed)
+
+    async def get_checkpoints(self, analysis_id: str) -> dict:
+        if self._has_pending(analysis_id):
+            await self.flush()
+        return await self._read("get_checkpoints", self.engine.get_checkpoints, analysis_id)
+
+    async def list_analyses(self, limit: int = 50):
+        return await self._read("list_analyses", self.engine.list_analyses, limit)
+
+    async def list_run_summaries(self, limit: int = 50, cursor: Cursor | None = None, country: str | None = None,
+                                 status: str | None = None, risk_level: str | None = None):
+        return await self._read("list_run_summaries", lambda: self.engine.list_run_summaries(
+            limit, cursor, country=country, status=status, risk_level=risk_level))
+
+    async def list_what_ifs(self, analysis_id: str):
+        return await self._cached_read("what_ifs", "list_what_ifs", self.engine.list_what_ifs, analysis_id)
+
+    async def delete_analysis(self, analysis_id: str):
+        self.cache.invalidate(analysis_id)
+        if self._has_pending(analysis_id):
+            await self.flush()
+        try:
+            await self._read("delete_analysis", self.engine.delete_analysis, analysis_id)
+        finally:
+            self.cache.invalidate(analysis_id)
+        if self.index.enabled:
+            await self._read("unindex_run", self.index.remove_run, analysis_id)
+
+    async def sync_index(self, page_size: int = 200) -> list[dict]:
+        """Index completed runs the signal index lacks (saved before it existed,
+        or by another worker); returns every completed run's summary, newest first."""
+        summaries, cursor = [], None
+        while True:
+            page, cursor = await self.list_run_summaries(page_size, cursor, status="completed")
+            summaries += page
+            if cursor is None:
+                break
+        if self.index.enabled:
+            indexed = await self._read("index_run_ids", self.index.run_ids)
+            missing = [s for s in summaries if s["id"] not in indexed]
+            if missing:
+                count = await self._read("index_backfill", self.index.backfill, self.engine, missing)
+                logger.info("[SignalIndex] Backfilled %d of %d completed runs missing from the index",
+                            count, len(missing))
+        return summaries
+
+    def stats(self) -> dict:
+        return {
+            "engine": self.engine.name,
+            "pending_writes": sum(len(write[3]) for write in self._pending),
+            "batches": self.batches,
+            "coalesced_writes": self.coalesced_writes,
+            "operations": {op: stat.snapshot() for op, stat in sorted(self._stats.items())},
+        }
+
+
+persistence = AsyncPersistence(create_engine(), analysis_cache, signal_index)
@@ -1,16 +1,27 @@
-from backend.models.analysis import SignalScores, RiskBand
+import numpy as np
 
+from backend.models.analysis import SignalScores, RiskBand, ScoringConfig
 
-def compute_scores(impact: float, lead_time: float, reliability: float) -> SignalScores:
-    near_term = 0.35 * impact + 0.45 * lead_time + 0.20 * reliability
-    structural = 0.55 * impact + 0.20 * lead_time + 0.25 * reliability
-    overall = 0.25 * near_term + 0.50 * impact + 0.25 * structural
+DEFAULT_SCORING = ScoringConfig()
 
-    if overall >= 75:
+# Band of each index returned by score_batch()["band"]
+BANDS = (RiskBand.GREEN, RiskBand.AMBER, RiskBand.RED_WATCH, RiskBand.RED_ACTION)
+SCORE_INPUTS = ("impact", "lead_time", "reliability")
+
+
+def compute_scores(impact: float, lead_time: float, reliability: float,
+                   config: ScoringConfig = DEFAULT_SCORING) -> SignalScores:
+    w = config.weights
+    t = config.thresholds
+    near_term = w.near_term[0] * impact + w.near_term[1] * lead_time + w.near_term[2] * reliability
+    structural = w.structural[0] * impact + w.structural[1] * lead_time + w.structural[2] * reliability
+    overall = w.overall[0] * near_term + w.overall[1] * impact + w.overall[2] * structural
+
+    if overall >= t.red_action:
         risk_band = RiskBand.RED_ACTION
-    elif overall >= 60:
+    elif overall >= t.red_watch:
         risk_band = RiskBand.RED_WATCH
-    elif overall >= 40:
+    elif overall >= t.amber:
         risk_band = RiskBand.AMBER
     else:
         risk_band = RiskBand.GREEN
@@ -24,3 +35,61 @@ def compute_scores(impact: float, lead_time: float, reliability: float) -> Signa
         overall=round(overall, 1),
         risk_band=risk_band,
     )
+
+
+def _round1(x: np.ndarray) -> np.ndarray:
+    """Python's round(x, 1) elementwise.
+
+    np.round(x, 1) rounds the float product x * 10, which is off by one in
+    the last decimal whenever that product lands exactly on .5 while x does
+    not. x * 10 is formed as x * 8 + x * 2 so its rounding error is known
+    exactly, and such ties are broken by the sign of that error.
+    """
+    a, b = x * 8, x * 2
+    y = a + b
+    err = b - (y - a)
+    r = np.rint(y)
+    tie = (np.abs(y - r) == 0.5) & (err != 0)
+    return np.where(tie, np.where(err > 0, y + 0.5, y - 0.5), r) / 10
+
+
+def score_batch(impact, lead_time, reliability, config: ScoringConfig = DEFAULT_SCORING) -> dict[str, np.ndarray]:
+    """compute_scores() over equal-length arrays of inputs.
+
+    Returns float arrays "near_term", "structural" and "overall" (rounded to
+    one decimal, like compute_scores) and "band", an index into BANDS taken
+    from the unrounded overall score.
+    """
+    impact = np.asarray(impact, dtype=np.float64)
+    lead_time = np.asarray(lead_time, dtype=np.float64)
+    reliability = np.asarray(reliability, dtype=np.float64)
+    w = config.weights
+    t = config.thresholds
+    # Same operation order as compute_scores so results agree to the last bit
+    near_term = w.near_term[0] * impact + w.near_term[1] * lead_time + w.near_term[2] * reliability
+    structural = w.structural[0] * impact + w.structural[1] * lead_time + w.structural[2] * reliability
+    overall = w.overall[0] * near_term + w.overall[1] * impact + w.overall[2] * structural
+    band = np.searchsorted(np.array([t.amber, t.red_watch, t.red_action]), overall, side="right")
+    return {
+        "near_term": _round1(near_term),
+        "structural": _round1(structural),
+        "overall": _round1(overall),
+        "band": band,
+    }
+
+
+def signal_inputs(signals: list[dict]) -> np.ndarray:
+    """(3, n) array of impact, lead_time and reliability of scored signals; missing scores count as 50."""
+    inputs = np.full((3, len(signals)), 50.0)
+    for i, signal in enumerate(signals):
+        scores = signal.get("scores") or {}
+        for row, key in enumerate(SCORE_INPUTS):
+            value = scores.get(key)
+            if isinstance(value, (int, float)):
+                inputs[row, i] = value
+    return inputs
+
+
+def band_counts(band: np.ndarray) -> dict[str, int]:
+    counts = np.bincount(band, minlength=len(BANDS))
+    return {b.value: int(n) for b, n in zip(BANDS, counts)}
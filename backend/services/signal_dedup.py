@@ -0,0 +1,111 @@
+import os
+import re
+import logging
+
+logger = logging.getLogger("ewa.dedup")
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"the", "and", "for", "with", "from", "that", "this", "are", "was", "has", "into", "over", "its"}
+
+# Hunted signals whose shingle sets overlap at least this much are one signal.
+DEDUP_THRESHOLD = float(os.getenv("SIGNAL_DEDUP_THRESHOLD", "0.5"))
+SHINGLE_SIZE = 2
+
+
+def _words(signal: dict) -> list[str]:
+    text = f"{signal.get('name', '')} {signal.get('description', '')}".lower()
+    return [w for w in _WORD.findall(text) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def signal_tokens(signal: dict) -> set[str]:
+    """Normalized word set of a signal's name and description."""
+    return set(_words(signal))
+
+
+def signal_shingles(signal: dict, size: int = SHINGLE_SIZE) -> set[str]:
+    """Word n-grams (n = 1..size) of a signal's normalized name and description.
+
+    The longer shingles make the overlap sensitive to phrasing as well as
+    vocabulary, so two signals citing the same indicators in different
+    contexts score lower than two rewordings of one anomaly.
+    """
+    words = _words(signal)
+    shingles = set(words)
+    for n in range(2, size + 1):
+        shingles.update(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+    return shingles
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class LeaderClusters:
+    """Leader clustering of signals added one at a time, e.g. as they stream in.
+
+    Each signal joins the first cluster whose representative (its first
+    member) it overlaps by at least `threshold`, otherwise starts a new one.
+    `clusters` lists them in order of their representatives, each a list of
+    (index in arrival order, similarity to the representative).
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.clusters: list[list[tuple[int, float]]] = []
+        self._leaders: list[set[str]] = []
+        self._count = 0
+
+    def add(self, signal: dict) -> bool:
+        """Cluster one signal; True if it starts a new cluster (is a representative)."""
+        i, self._count = self._count, self._count + 1
+        shingles = signal_shingles(signal)
+        for cluster, leader in zip(self.clusters, self._leaders):
+            similarity = jaccard(shingles, leader)
+            if similarity >= self.threshold:
+                cluster.append((i, round(similarity, 3)))
+                return False
+        self.clusters.append([(i, 1.0)])
+        self._leaders.append(shingles)
+        return True
+
+
+def cluster_signals(signals: list[dict], threshold: float = DEDUP_THRESHOLD) -> list[list[tuple[int, float]]]:
+    """Group near-identical signals (see LeaderClusters).
+
+    Returns clusters in order of their representatives, each a list of
+    (index into signals, similarity to the representative).
+    """
+    clusters = LeaderClusters(threshold)
+    for signal in signals:
+        clusters.add(signal)
+    return clusters.clusters
+
+
+def deduplicate_signals(signals: list[dict], threshold: float = DEDUP_THRESHOLD,
+                        renumber: bool = False) -> tuple[list[dict], list[dict]]:
+    """Keep one representative per cluster of near-identical signals.
+
+    Returns (kept, merges). A representative that absorbed others lists them
+    under "merged_signals"; each merge is {"kept": {id, name}, "merged":
+    [{id, name, similarity}, ...]}. With `renumber`, representatives get the
+    gapless ids signal_1..n (merged signals keep the ids they were hunted with).
+    """
+    kept, merges = [], []
+    for cluster in cluster_signals(signals, threshold):
+        representative = signals[cluster[0][0]]
+        if renumber:
+            representative = {**representative, "id": f"signal_{len(kept) + 1}"}
+        if len(cluster) == 1:
+            kept.append(representative)
+            continue
+        merged = [{"id": signals[i].get("id"), "name": signals[i].get("name"), "similarity": similarity}
+                  for i, similarity in cluster[1:]]
+        for m in merged:
+            logger.info("[Dedup] Merging '%s' into '%s' (similarity %.2f)",
+                        m["name"] or "?", representative.get("name", "?"), m["similarity"])
+        kept.append({**representative, "merged_signals": (representative.get("merged_signals") or []) + merged})
+        merges.append({"kept": {"id": representative.get("id"), "name": representative.get("name")},
+                       "merged": merged})
+    return kept, merges
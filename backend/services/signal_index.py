@@ -0,0 +1,316 @@
+"""Cross-run index of scored signals, with MinHash/LSH near-duplicate lookup.
+
+Every completed run's synthesis.scored_signals are flattened into one SQLite
+table (name, domain, country, input and overall scores, risk band, and when
+the run completed), so "has this signal appeared before, and where?" is an
+index lookup instead of a scan over every final_data blob.
+
+Near-duplicates are found with MinHash signatures of each signal's word set
+(signal_dedup.signal_tokens) split into LSH bands: signals sharing any band
+bucket are candidates, and only candidates are compared. With 16 bands of 4
+rows, pairs at Jaccard 0.5 become candidates ~65% of the time and pairs at
+0.7 ~98%, while a lookup reads a handful of buckets whatever the index size.
+
+The index is updated by AsyncPersistence whenever a final analysis is saved
+or a run deleted, and every indexed run is listed in `runs` (with or without
+signals), so it can be checked against storage for runs it lacks: those saved
+before the index existed or by another worker. AsyncPersistence.sync_index
+backfills them at startup and before whole-history queries. To rebuild it
+from every run in storage:
+
+    python -m backend.services.signal_index --rebuild
+"""
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from backend.services.signal_dedup import signal_tokens
+from backend.services.storage import LOCAL_STORAGE_PATH, StorageEngine, create_engine
+
+logger = logging.getLogger("ewa.signal_index")
+
+SIGNAL_INDEX_PATH = os.getenv("SIGNAL_INDEX_PATH", str(Path(LOCAL_STORAGE_PATH) / "signal_index.sqlite3"))
+SIGNAL_INDEX_ENABLED = os.getenv("SIGNAL_INDEX_ENABLED", "1") == "1"
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+DEFAULT_THRESHOLD = 0.5
+
+_PRIME = (1 << 31) - 1
+_perm = np.random.default_rng(0x5EED).integers(1, _PRIME, size=(2, NUM_PERM), dtype=np.uint64)
+_A, _B = _perm[0], _perm[1]
+
+COLUMNS = ("analysis_id", "signal_id", "name", "domain", "country", "impact", "lead_time", "reliability",
+           "overall", "risk_band", "completed_at")
+
+
+def minhash(tokens: set[str]) -> np.ndarray | None:
+    """NUM_PERM-value MinHash signature of a token set (None for an empty set)."""
+    if not tokens:
+        return None
+    x = np.fromiter((zlib.crc32(t.encode()) % _PRIME for t in tokens), dtype=np.uint64, count=len(tokens))
+    return ((x[:, None] * _A + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def lsh_buckets(signature: np.ndarray) -> list[int]:
+    """One signed 64-bit bucket key per LSH band."""
+    return [int.from_bytes(hashlib.blake2b(signature[b * LSH_ROWS:(b + 1) * LSH_ROWS].tobytes(),
+                                           digest_size=8).digest(), "big", signed=True)
+            for b in range(LSH_BANDS)]
+
+
+def _number(value) -> float | None:
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+class SignalIndex:
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS signals ("
+        "analysis_id TEXT NOT NULL, signal_id TEXT NOT NULL, name TEXT, domain TEXT, country TEXT, "
+        "impact REAL, lead_time REAL, reliability REAL, overall REAL, risk_band TEXT, completed_at REAL, "
+        "minhash BLOB, PRIMARY KEY (analysis_id, signal_id))",
+        "CREATE INDEX IF NOT EXISTS signals_completed ON signals (completed_at DESC)",
+        "CREATE INDEX IF NOT EXISTS signals_country ON signals (country, completed_at DESC)",
+        "CREATE INDEX IF NOT EXISTS signals_domain ON signals (domain, completed_at DESC)",
+        "CREATE INDEX IF NOT EXISTS signals_band ON signals (risk_band, completed_at DESC)",
+        "CREATE TABLE IF NOT EXISTS lsh ("
+        "band INTEGER NOT NULL, bucket INTEGER NOT NULL, analysis_id TEXT NOT NULL, signal_id TEXT NOT NULL, "
+        "PRIMARY KEY (band, bucket, analysis_id, signal_id)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS lsh_run ON lsh (analysis_id)",
+        "CREATE TABLE IF NOT EXISTS runs (analysis_id TEXT PRIMARY KEY, signals INTEGER, completed_at REAL)",
+    ]
+
+    def __init__(self, path: str = SIGNAL_INDEX_PATH, enabled: bool = True):
+        self.path = Path(path)
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            has_runs = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'runs'").fetchone()
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            if not has_runs:
+                # Indexes written before runs were tracked
+                self._conn.execute("INSERT OR IGNORE INTO runs SELECT analysis_id, COUNT(*), MAX(completed_at) "
+                                   "FROM signals GROUP BY analysis_id")
+            self._conn.commit()
+        return self._conn
+
+    # ── Updates ──
+
+    def add_run(self, analysis_id: str, final_data: dict, completed_at: float | None = None) -> int:
+        """(Re)index a run's scored signals; returns how many were indexed."""
+        if not self.enabled:
+            return 0
+        synthesis = ((final_data or {}).get("agents") or {}).get("synthesis") or {}
+        signals = synthesis.get("scored_signals") if isinstance(synthesis, dict) else None
+        signals = [s for s in signals if isinstance(s, dict)] if isinstance(signals, list) else []
+        country = ((final_data or {}).get("config") or {}).get("country")
+        completed_at = completed_at if completed_at is not None else time.time()
+
+        rows, buckets = [], []
+        for i, signal in enumerate(signals):
+            signal_id = str(signal.get("signal_id") or signal.get("id") or f"#{i}")
+            scores = signal.get("scores") or {}
+            signature = minhash(signal_tokens(signal))
+            rows.append((analysis_id, signal_id, signal.get("name"), signal.get("domain"), country,
+                         _number(scores.get("impact")), _number(scores.get("lead_time")),
+                         _number(scores.get("reliability")), _number(scores.get("overall")),
+                         signal.get("risk_band"), completed_at,
+                         signature.tobytes() if signature is not None else None))
+            if signature is not None:
+                buckets += [(band, bucket, analysis_id, signal_id) for band, bucket in enumerate(lsh_buckets(signature))]
+
+        with self._lock:
+            db = self._db()
+            try:
+                self._delete(db, analysis_id)
+                db.executemany(f"INSERT OR REPLACE INTO signals VALUES ({', '.join('?' * 12)})", rows)
+                db.executemany("INSERT OR IGNORE INTO lsh VALUES (?, ?, ?, ?)", buckets)
+                db.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?)", (analysis_id, len(rows), completed_at))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        logger.info("[SignalIndex] Indexed %d signals of %s", len(rows), analysis_id)
+        return len(rows)
+
+    @staticmethod
+    def _delete(db: sqlite3.Connection, analysis_id: str):
+        db.execute("DELETE FROM signals WHERE analysis_id = ?", (analysis_id,))
+        db.execute("DELETE FROM lsh WHERE analysis_id = ?", (analysis_id,))
+        db.execute("DELETE FROM runs WHERE analysis_id = ?", (analysis_id,))
+
+    def remove_run(self, analysis_id: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            db = self._db()
+            self._delete(db, analysis_id)
+            db.commit()
+
+    # ── Queries ──
+
+    def run_ids(self) -> set[str]:
+        """Ids of every indexed run, including runs without scored signals."""
+        with self._lock:
+            return {row[0] for row in self._db().execute("SELECT analysis_id FROM runs")}
+
+    def search(self, country: str | None = None, domain: str | None = None, risk_band: str | None = None,
+               since: float | None = None, limit: int = 50) -> list[dict]:
+        """Indexed signals matching every given filter, most recent first."""
+        clauses, params = [], []
+        for column, value in (("country", country), ("domain", domain), ("risk_band", risk_band)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("completed_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM signals {where} ORDER BY completed_at DESC LIMIT ?",
+                (*params, limit)).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def similar(self, signal: dict, threshold: float = DEFAULT_THRESHOLD, limit: int = 20,
+                exclude_run: str | None = None) -> list[dict]:
+        """Indexed signals whose estimated Jaccard similarity to `signal` (name + description) is >= threshold."""
+        signature = minhash(signal_tokens(signal))
+        if signature is None:
+            return []
+        return self._matches(signature, threshold, limit, exclude_run)
+
+    def _matches(self, signature: np.ndarray, threshold: float, limit: int | None, exclude_run: str | None,
+                 db: sqlite3.Connection | None = None) -> list[dict]:
+        keys = list(enumerate(lsh_buckets(signature)))
+        where = " OR ".join("(l.band = ? AND l.bucket = ?)" for _ in keys)
+        params = [v for key in keys for v in key]
+        query = (f"SELECT DISTINCT {', '.join('s.' + c for c in COLUMNS)}, s.minhash FROM lsh l "
+                 f"JOIN signals s ON s.analysis_id = l.analysis_id AND s.signal_id = l.signal_id WHERE ({where})")
+        if exclude_run:
+            query += " AND l.analysis_id != ?"
+            params.append(exclude_run)
+        if db is None:
+            with self._lock:
+                rows = self._db().execute(query, params).fetchall()
+        else:
+            rows = db.execute(query, params).fetchall()
+
+        if not rows:
+            return []
+        signatures = np.frombuffer(b"".join(row[-1] for row in rows), dtype=np.uint32).reshape(len(rows), NUM_PERM)
+        similarities = np.count_nonzero(signatures == signature, axis=1) / NUM_PERM
+        matches = [{**dict(zip(COLUMNS, row[:-1])), "similarity": round(float(similarity), 3)}
+                   for row, similarity in zip(rows, similarities) if similarity >= threshold]
+        matches.sort(key=lambda m: (-m["similarity"], -(m["completed_at"] or 0)))
+        return matches[:limit]
+
+    def recurrences(self, analysis_id: str, threshold: float = DEFAULT_THRESHOLD, limit: int = 10) -> list[dict]:
+        """For each signal of a run, the runs where it appeared before (or since) and their countries.
+
+        Matches keep the most similar signal of each other run, up to `limit`
+        runs; `run_count` and `countries` cover all of them.
+        """
+        with self._lock:
+            db = self._db()
+            signals = db.execute("SELECT signal_id, name, domain, minhash FROM signals WHERE analysis_id = ? "
+                                 "ORDER BY overall DESC", (analysis_id,)).fetchall()
+            result = []
+            for signal_id, name, domain, blob in signals:
+                matches = [] if blob is None else self._matches(
+                    np.frombuffer(blob, dtype=np.uint32), threshold, None, analysis_id, db)
+                per_run = {}
+                for match in matches:
+                    per_run.setdefault(match["analysis_id"], match)
+                result.append({
+                    "signal_id": signal_id,
+                    "name": name,
+                    "domain": domain,
+                    "run_count": len(per_run),
+                    "countries": sorted({m["country"] for m in per_run.values() if m["country"]}),
+                    "matches": list(per_run.values())[:limit],
+                })
+        return result
+
+    def score_inputs(self) -> tuple[list[tuple], np.ndarray]:
+        """Every indexed signal as ((analysis_id, signal_id, name, country, completed_at, risk_band), ...)
+        plus a (3, n) array of impact, lead_time and reliability (missing scores count as 50), grouped by run."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT analysis_id, signal_id, name, country, completed_at, risk_band, impact, lead_time, reliability "
+                "FROM signals ORDER BY completed_at DESC, analysis_id").fetchall()
+        inputs = np.array([row[6:] for row in rows], dtype=np.float64).reshape(-1, 3).T
+        return [row[:6] for row in rows], np.where(np.isnan(inputs), 50.0, inputs)
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            db = self._db()
+            signals = db.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+            runs = db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return {"enabled": True, "signals": signals, "runs": runs}
+
+    # ── Backfill ──
+
+    def backfill(self, engine: StorageEngine, summaries: list[dict]) -> int:
+        """Index the given completed runs from `engine`; returns how many were indexed.
+
+        A run whose final analysis is gone is recorded without signals; one
+        that fails to load is skipped and stays missing.
+        """
+        runs = 0
+        for summary in summaries:
+            try:
+                analysis = engine.get_synthesis(summary["id"])
+            except Exception as e:
+                logger.warning("[SignalIndex] Failed to load %s: %s", summary["id"], e)
+                continue
+            updated_at = (analysis or {}).get("updated_at")
+            completed_at = updated_at.timestamp() if hasattr(updated_at, "timestamp") else summary.get("created_at")
+            self.add_run(summary["id"], (analysis or {}).get("final_data") or {}, completed_at)
+            runs += 1
+        return runs
+
+    def rebuild(self, engine: StorageEngine, page_size: int = 200) -> int:
+        """Index every completed run in `engine`; returns the number of runs indexed."""
+        runs, cursor = 0, None
+        while True:
+            summaries, cursor = engine.list_run_summaries(page_size, cursor, status="completed")
+            runs += self.backfill(engine, summaries)
+            if cursor is None:
+                return runs
+
+
+signal_index = SignalIndex(enabled=SIGNAL_INDEX_ENABLED)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Cross-run signal index")
+    parser.add_argument("--rebuild", action="store_true", help="index every completed run in the storage engine")
+    args = parser.parse_args()
+    if not args.rebuild:
+        print(signal_index.stats())
+        sys.exit(0)
+    start = time.perf_counter()
+    count = signal_index.rebuild(create_engine())
+    print(f"Indexed {count} runs in {time.perf_counter() - start:.1f}s: {signal_index.stats()}")
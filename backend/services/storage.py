@@ -0,0 +1,407 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+
+from backend.models.analysis import RunSummary
+from backend.services import final_codec
+
+logger = logging.getLogger("ewa.storage")
+
+# Which engine stores analyses: "firestore" (default) or "local", a SQLite +
+# filesystem store for running without a cloud project and for load tests.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore")
+LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", str(Path(__file__).resolve().parent.parent / ".data"))
+
+ANALYSES = "analyses"
+SUMMARIES = "run_summaries"  # small per-run records for listing (see RunSummary)
+WHAT_IFS = "what_if_scenarios"  # subcollection of an analysis
+FINAL_CHUNKS = "final_chunks"  # subcollection of an analysis (see final_codec)
+CHECKPOINTS = "checkpoints"  # subcollection of an analysis: one compressed document per finished agent
+AGENTS = ("context", "signal_hunter", "corroboration", "devils_advocate", "synthesis")
+
+
+# ── Writes ──
+# A write is (op, kind, path, fields): op names it for metrics; kind is "set",
+# "merge" (set with merge), "update" (the document must exist; fields may
+# use dotted paths) or "delete" (fields are ignored); path alternates
+# collection and document ids.
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def save_analysis_writes(analysis_id: str, config: dict, status: str = "running") -> list[tuple]:
+    now = _now()
+    summary = RunSummary.from_run(analysis_id, config, status, now.timestamp())
+    return [
+        ("save_analysis", "merge", (ANALYSES, analysis_id),
+         {"config": config, "status": status, "created_at": now, "updated_at": now}),
+        ("save_summary", "merge", (SUMMARIES, analysis_id), summary.model_dump()),
+    ]
+
+
+def update_status_writes(analysis_id: str, status: str) -> list[tuple]:
+    return [
+        ("update_status", "update", (ANALYSES, analysis_id), {"status": status, "updated_at": _now()}),
+        ("save_summary", "merge", (SUMMARIES, analysis_id), {"status": status}),
+    ]
+
+
+def agent_output_writes(analysis_id: str, agent_name: str, output: dict) -> list[tuple]:
+    return [
+        ("save_checkpoint", "set", (ANALYSES, analysis_id, CHECKPOINTS, agent_name),
+         {"blob": final_codec.encode(output)}),
+        ("save_checkpoint", "update", (ANALYSES, analysis_id), {"updated_at": _now()}),
+    ]
+
+
+def final_analysis_writes(analysis_id: str, final_data: dict) -> list[tuple]:
+    """Store the final analysis and drop the run's checkpoints, which it supersedes."""
+    summary = RunSummary.from_run(analysis_id, final_data.get("config") or {}, "completed", 0, final_data)
+    return [
+        ("save_final", "update", (ANALYSES, analysis_id),
+         {"status": "completed", "final_data": final_data, "updated_at": _now()}),
+        # created_at was set when the run started; merge everything else.
+        ("save_summary", "merge", (SUMMARIES, analysis_id), summary.model_dump(exclude={"created_at"})),
+        *(("drop_checkpoint", "delete", (ANALYSES, analysis_id, CHECKPOINTS, agent), {}) for agent in AGENTS),
+    ]
+
+
+def what_if_writes(analysis_id: str, scenario_id: str, result: dict) -> list[tuple]:
+    return [("save_what_if", "set", (ANALYSES, analysis_id, WHAT_IFS, scenario_id),
+             {"result": result, "created_at": _now()})]
+
+
+# Run summary pages are ordered by (created_at, id), newest first; a page
+# cursor is the (created_at, id) of the last summary on the previous page.
+Cursor = tuple[float, str]
+
+
+def checkpoints_of(analysis: dict | None) -> dict:
+    """Agent checkpoints (agent -> {raw, data, usage, completed_at}) stored on the
+    analysis document itself, as runs saved before the checkpoints subcollection did."""
+    agents = (analysis or {}).get("agents") or {}
+    return {name: cp for name, cp in agents.items() if isinstance(cp, dict) and "raw" in cp}
+
+
+class StorageEngine(ABC):
+    """Where analyses, their agent checkpoints, run summaries and what-ifs are kept.
+
+    Engines are synchronous; AsyncPersistence runs them off the event loop.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def commit_writes(self, writes: list[tuple]):
+        """Apply (kind, path, fields) writes atomically, in order."""
+
+    @abstractmethod
+    def get_analysis(self, analysis_id: str) -> dict | None:
+        ...
+
+    @abstractmethod
+    def list_analyses(self, limit: int = 50) -> list[dict]:
+        """Full analysis documents, newest first, each with its "id"."""
+
+    @abstractmethod
+    def list_run_summaries(self, limit: int = 50, cursor: Cursor | None = None, country: str | None = None,
+                           status: str | None = None, risk_level: str | None = None) -> tuple[list[dict], Cursor | None]:
+        """A page of run summaries, newest first, and the cursor of the next page (or None)."""
+
+    @abstractmethod
+    def get_checkpoints(self, analysis_id: str) -> dict:
+        """Checkpoints of the run's finished agents (agent -> {raw, data, usage, completed_at})."""
+
+    @abstractmethod
+    def delete_analysis(self, analysis_id: str):
+        ...
+
+    @abstractmethod
+    def list_what_ifs(self, analysis_id: str) -> list[dict]:
+        """What-if results of an analysis as {id, result, created_at}, newest first."""
+
+    def _commit(self, writes: list[tuple]):
+        self.commit_writes([write[1:] for write in writes])
+
+    def save_analysis(self, analysis_id: str, config: dict, status: str = "running"):
+        self._commit(save_analysis_writes(analysis_id, config, status))
+
+    def update_analysis_status(self, analysis_id: str, status: str):
+        self._commit(update_status_writes(analysis_id, status))
+
+    def save_agent_output(self, analysis_id: str, agent_name: str, output: dict):
+        self._commit(agent_output_writes(analysis_id, agent_name, output))
+
+    def save_final_analysis(self, analysis_id: str, final_data: dict):
+        self._commit(final_analysis_writes(analysis_id, final_data))
+
+    def save_what_if(self, analysis_id: str, scenario_id: str, result: dict):
+        self._commit(what_if_writes(analysis_id, scenario_id, result))
+
+    def get_synthesis(self, analysis_id: str) -> dict | None:
+        """The analysis with its final_data holding only the synthesis part.
+        Engines override this to avoid reading the rest."""
+        analysis = self.get_analysis(analysis_id)
+        if not analysis:
+            return None
+        if isinstance(analysis.get("final_data"), dict):
+            analysis["final_data"] = final_codec.join({"synthesis": final_codec.split(analysis["final_data"])["synthesis"]})
+        return analysis
+
+
+class FirestoreEngine(StorageEngine):
+    name = "firestore"
+
+    def __init__(self):
+        from backend.services import firebase_service
+        self.fb = firebase_service
+
+    def commit_writes(self, writes: list[tuple]):
+        self.fb.commit_writes(writes)
+
+    def get_analysis(self, analysis_id: str) -> dict | None:
+        return self.fb.get_analysis(analysis_id)
+
+    def get_synthesis(self, analysis_id: str) -> dict | None:
+        return self.fb.get_synthesis(analysis_id)
+
+    def get_checkpoints(self, analysis_id: str) -> dict:
+        return self.fb.get_checkpoints(analysis_id)
+
+    def list_analyses(self, limit: int = 50) -> list[dict]:
+        return self.fb.list_analyses()[:limit]
+
+    def list_run_summaries(self, limit: int = 50, cursor: Cursor | None = None, country: str | None = None,
+                           status: str | None = None, risk_level: str | None = None):
+        return self.fb.list_run_summaries(limit, cursor, country=country, status=status, risk_level=risk_level)
+
+    def delete_analysis(self, analysis_id: str):
+        self.fb.delete_analysis(analysis_id)
+
+    def list_what_ifs(self, analysis_id: str) -> list[dict]:
+        return self.fb.list_what_ifs(analysis_id)
+
+
+def _ts(value) -> float | None:
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+def _dt(value: float | None) -> datetime | None:
+    return datetime.fromtimestamp(value, timezone.utc) if value is not None else None
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class LocalEngine(StorageEngine):
+    """SQLite for documents and indexed run summaries, files for final analyses.
+
+    Layout under `root`: storage.sqlite3 (with the compressed agent checkpoints)
+    plus final/<analysis_id>.<part>.json.z, the compressed parts of final_data
+    (see final_codec).
+    Summary queries are served by (filter, created_at, id) indexes, so listing
+    and filtering cost the same at 10 or 10k runs.
+    """
+
+    name = "local"
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS analyses ("
+        "id TEXT PRIMARY KEY, config TEXT, status TEXT, created_at REAL, updated_at REAL, has_final INTEGER DEFAULT 0)",
+        "CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created_at DESC)",
+        "CREATE TABLE IF NOT EXISTS agent_outputs ("
+        "analysis_id TEXT NOT NULL, agent TEXT NOT NULL, output BLOB NOT NULL, PRIMARY KEY (analysis_id, agent))",
+        "CREATE TABLE IF NOT EXISTS run_summaries ("
+        "id TEXT PRIMARY KEY, country TEXT, status TEXT, risk_level TEXT, created_at REAL, data TEXT NOT NULL)",
+        *(f"DROP INDEX IF EXISTS {name}" for name in ("summaries_created", "summaries_country", "summaries_status",
+                                                      "summaries_risk")),  # without the id tiebreak
+        "CREATE INDEX IF NOT EXISTS summaries_created_id ON run_summaries (created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS summaries_country_id ON run_summaries (country, created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS summaries_status_id ON run_summaries (status, created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS summaries_risk_id ON run_summaries (risk_level, created_at DESC, id DESC)",
+        "CREATE TABLE IF NOT EXISTS what_ifs ("
+        "analysis_id TEXT NOT NULL, scenario_id TEXT NOT NULL, result TEXT NOT NULL, created_at REAL, "
+        "PRIMARY KEY (analysis_id, scenario_id))",
+    ]
+
+    def __init__(self, root: str = LOCAL_STORAGE_PATH):
+        self.root = Path(root)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            (self.root / "final").mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.root / "storage.sqlite3", check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+            self._conn.commit()
+        return self._conn
+
+    def _final_path(self, analysis_id: str, part: str) -> Path:
+        return self.root / "final" / f"{analysis_id}.{part}.json.z"
+
+    def _write_final(self, analysis_id: str, final_data: dict):
+        _, chunks = final_codec.pack(final_data)
+        for part, blobs in chunks.items():
+            path = self._final_path(analysis_id, part)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(b"".join(blobs))
+            tmp.replace(path)
+
+    def _read_final(self, analysis_id: str, parts=final_codec.PARTS) -> dict:
+        return final_codec.join({part: final_codec.decode(self._final_path(analysis_id, part).read_bytes())
+                                 for part in parts})
+
+    # ── Writes ──
+
+    def commit_writes(self, writes: list[tuple]):
+        with self._lock:
+            db = self._db()
+            try:
+                for kind, path, fields in writes:
+                    if len(path) == 2 and path[0] == ANALYSES:
+                        self._write_analysis(db, kind, path[1], fields)
+                    elif len(path) == 2 and path[0] == SUMMARIES:
+                        self._write_summary(db, kind, path[1], fields)
+                    elif len(path) == 4 and path[0] == ANALYSES and path[2] == CHECKPOINTS:
+                        if kind == "delete":
+                            db.execute("DELETE FROM agent_outputs WHERE analysis_id = ? AND agent = ?", (path[1], path[3]))
+                        else:
+                            db.execute("INSERT OR REPLACE INTO agent_outputs VALUES (?, ?, ?)",
+                                       (path[1], path[3], fields["blob"]))
+                    elif len(path) == 4 and path[0] == ANALYSES and path[2] == WHAT_IFS:
+                        db.execute("INSERT OR REPLACE INTO what_ifs VALUES (?, ?, ?, ?)",
+                                   (path[1], path[3], _dumps(fields.get("result")), _ts(fields.get("created_at"))))
+                    else:
+                        raise ValueError(f"Unsupported document path: {'/'.join(path)}")
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+    def _write_analysis(self, db: sqlite3.Connection, kind: str, analysis_id: str, fields: dict):
+        exists = db.execute("SELECT 1 FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        if kind == "update" and not exists:
+            raise KeyError(f"{ANALYSES}/{analysis_id} not found")
+        if kind == "set" and exists:
+            self._delete(db, analysis_id, keep_what_ifs=True)
+            exists = None
+        if not exists:
+            db.execute("INSERT INTO analyses (id) VALUES (?)", (analysis_id,))
+
+        for key, value in fields.items():
+            if key == "final_data":
+                self._write_final(analysis_id, value)
+                db.execute("UPDATE analyses SET has_final = 1 WHERE id = ?", (analysis_id,))
+            elif key == "config":
+                db.execute("UPDATE analyses SET config = ? WHERE id = ?", (_dumps(value), analysis_id))
+            elif key in ("status", "created_at", "updated_at"):
+                db.execute(f"UPDATE analyses SET {key} = ? WHERE id = ?", (_ts(value), analysis_id))
+            else:
+                raise ValueError(f"Unsupported analysis field: {key}")
+
+    def _write_summary(self, db: sqlite3.Connection, kind: str, analysis_id: str, fields: dict):
+        row = db.execute("SELECT data FROM run_summaries WHERE id = ?", (analysis_id,)).fetchone()
+        if kind == "update" and not row:
+            raise KeyError(f"{SUMMARIES}/{analysis_id} not found")
+        data = {**json.loads(row[0]), **fields} if row and kind != "set" else dict(fields)
+        db.execute("INSERT OR REPLACE INTO run_summaries VALUES (?, ?, ?, ?, ?, ?)",
+                   (analysis_id, data.get("country"), data.get("status"), data.get("risk_level"),
+                    data.get("created_at"), _dumps(data)))
+
+    # ── Reads ──
+
+    def get_analysis(self, analysis_id: str, synthesis_only: bool = False) -> dict | None:
+        with self._lock:
+            row = self._db().execute("SELECT config, status, created_at, updated_at, has_final FROM analyses WHERE id = ?",
+                                     (analysis_id,)).fetchone()
+        if not row:
+            return None
+        analysis = {
+            "config": json.loads(row[0]) if row[0] else None,
+            "status": row[1],
+            "created_at": _dt(row[2]),
+            "updated_at": _dt(row[3]),
+        }
+        if row[4]:
+            analysis["final_data"] = self._read_final(analysis_id, ("synthesis",) if synthesis_only else final_codec.PARTS)
+        return analysis
+
+    def get_synthesis(self, analysis_id: str) -> dict | None:
+        return self.get_analysis(analysis_id, synthesis_only=True)
+
+    def get_checkpoints(self, analysis_id: str) -> dict:
+        with self._lock:
+            rows = self._db().execute("SELECT agent, output FROM agent_outputs WHERE analysis_id = ?",
+                                      (analysis_id,)).fetchall()
+        # Rows written before checkpoints were compressed hold JSON text.
+        return {agent: final_codec.decode(output) if isinstance(output, bytes) else json.loads(output)
+                for agent, output in rows}
+
+    def list_analyses(self, limit: int = 50) -> list[dict]:
+        with self._lock:
+            ids = [r[0] for r in self._db().execute(
+                "SELECT id FROM analyses ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()]
+        return [{**self.get_analysis(rid), "id": rid} for rid in ids]
+
+    def list_run_summaries(self, limit: int = 50, cursor: Cursor | None = None, country: str | None = None,
+                           status: str | None = None, risk_level: str | None = None):
+        clauses, params = [], []
+        for column, value in (("country", country), ("status", status), ("risk_level", risk_level)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if cursor is not None:
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params += [cursor[0], cursor[0], cursor[1]]
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT data FROM run_summaries {where}ORDER BY created_at DESC, id DESC LIMIT ?", (*params, limit + 1)
+            ).fetchall()
+        results = [json.loads(r[0]) for r in rows]
+        next_cursor = (results[limit - 1]["created_at"], results[limit - 1]["id"]) if len(results) > limit else None
+        return results[:limit], next_cursor
+
+    def list_what_ifs(self, analysis_id: str) -> list[dict]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT scenario_id, result, created_at FROM what_ifs WHERE analysis_id = ? ORDER BY created_at DESC",
+                (analysis_id,)).fetchall()
+        return [{"id": sid, "result": json.loads(result), "created_at": _dt(created)} for sid, result, created in rows]
+
+    # ── Deletes ──
+
+    def _delete(self, db: sqlite3.Connection, analysis_id: str, keep_what_ifs: bool = False):
+        db.execute("DELETE FROM analyses WHERE id = ?", (analysis_id,))
+        db.execute("DELETE FROM agent_outputs WHERE analysis_id = ?", (analysis_id,))
+        if not keep_what_ifs:
+            db.execute("DELETE FROM what_ifs WHERE analysis_id = ?", (analysis_id,))
+            db.execute("DELETE FROM run_summaries WHERE id = ?", (analysis_id,))
+        for part in final_codec.PARTS:
+            self._final_path(analysis_id, part).unlink(missing_ok=True)
+
+    def delete_analysis(self, analysis_id: str):
+        with self._lock:
+            db = self._db()
+            self._delete(db, analysis_id)
+            db.commit()
+
+
+ENGINES = {"firestore": FirestoreEngine, "local": LocalEngine}
+
+
+def create_engine(name: str = STORAGE_BACKEND) -> StorageEngine:
+    if name not in ENGINES:
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}; expected one of {', '.join(ENGINES)}")
+    logger.info("[Storage] Using %s engine", name)
+    return ENGINES[name]()
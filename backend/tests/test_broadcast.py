@@ -0,0 +1,83 @@
+import asyncio
+
+from backend.services.broadcast import BroadcastHub, RunBroadcast, parse_last_event_id
+
+
+async def published(count: int, **kwargs) -> RunBroadcast:
+    broadcast = RunBroadcast("run", **kwargs)
+    for i in range(1, count + 1):
+        await broadcast.publish(f"event {i}")
+    await broadcast.close()
+    return broadcast
+
+
+async def drain(broadcast: RunBroadcast, last_event_id: int = 0) -> list[int]:
+    return [seq async for seq, _ in broadcast.subscribe(last_event_id)]
+
+
+def test_resume_inside_the_buffer_replays_only_later_events():
+    async def scenario():
+        broadcast = await published(5)
+        return await drain(broadcast, 2), await drain(broadcast, 5)
+
+    assert asyncio.run(scenario()) == ([3, 4, 5], [])
+
+
+def test_resume_past_the_buffer_skips_to_the_oldest_kept_event():
+    async def scenario():
+        broadcast = await published(6, max_events=3)
+        return broadcast, await drain(broadcast, 1), await drain(broadcast)
+
+    broadcast, resumed, fresh = asyncio.run(scenario())
+    assert [seq for seq, _ in broadcast.events] == [4, 5, 6]
+    assert broadcast.evicted == 3
+    assert resumed == fresh == [4, 5, 6]
+
+
+def test_byte_bound_always_keeps_the_newest_event():
+    async def scenario():
+        broadcast = RunBroadcast("run", max_bytes=10)
+        await broadcast.publish("x" * 8)
+        await broadcast.publish("y" * 20)
+        return broadcast
+
+    broadcast = asyncio.run(scenario())
+    assert [data for _, data in broadcast.events] == ["y" * 20]
+
+
+def test_live_subscriber_follows_until_close():
+    async def scenario():
+        broadcast = RunBroadcast("run")
+        await broadcast.publish("before")
+        subscriber = asyncio.create_task(drain(broadcast, 1))
+        await asyncio.sleep(0)
+        assert broadcast.subscribers == 1
+        for data in ("a", "b"):
+            await broadcast.publish(data)
+        await broadcast.close()
+        return broadcast, await subscriber
+
+    broadcast, seqs = asyncio.run(scenario())
+    assert seqs == [2, 3]
+    assert broadcast.subscribers == 0
+
+
+def test_hub_collects_finished_and_idle_runs():
+    async def scenario():
+        hub = BroadcastHub(retention_seconds=10, idle_timeout_seconds=100)
+        finished, idle, live = hub.create("finished"), hub.create("idle"), hub.create("live")
+        await finished.publish("x")
+        await hub.finish("finished")
+        now = finished.updated_at
+        idle.updated_at = now - 200
+        collected = await hub.collect(now + 20)
+        return hub, idle, collected
+
+    hub, idle, collected = asyncio.run(scenario())
+    assert collected == 2
+    assert list(hub.runs) == ["live"] and idle.closed
+
+
+def test_parse_last_event_id():
+    assert parse_last_event_id("42") == 42
+    assert parse_last_event_id(None) == parse_last_event_id("junk") == parse_last_event_id("-3") == 0
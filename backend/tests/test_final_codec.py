@@ -0,0 +1,62 @@
+import base64
+import random
+
+from backend.services import final_codec
+
+FIRESTORE_DOC_LIMIT = 1024 * 1024
+
+
+def incompressible(n: int, seed: int) -> str:
+    return base64.b64encode(random.Random(seed).randbytes(n)).decode()
+
+
+def final_data(synthesis_bytes: int, sources_bytes: int) -> dict:
+    return {
+        "config": {"country": "Fakeland"},
+        "agents": {
+            "synthesis": {"overall_assessment": {"headline": incompressible(synthesis_bytes, 1)}},
+            "signal_hunter": {"signals": [{"id": "signal_1", "evidence": incompressible(sources_bytes, 2)}]},
+        },
+    }
+
+
+def stored(data: dict) -> tuple[dict, dict, list]:
+    manifest, chunks = final_codec.pack(data)
+    inline, apart = final_codec.place(manifest, chunks)
+    return manifest, inline, apart
+
+
+def reassemble(manifest: dict, inline: dict, apart: list) -> dict:
+    by_index = {(part, i): blob for part, i, blob in apart}
+    chunks = {}
+    for part in final_codec.PARTS:
+        indexes = final_codec.stored_apart(manifest, part)
+        chunks[part] = ([] if indexes.start == 0 else [inline[part]]) + [by_index[(part, i)] for i in indexes]
+    return final_codec.unpack(manifest, chunks)
+
+
+def test_incompressible_parts_at_chunk_size_stay_under_document_limit():
+    # Both parts compress to about one full chunk each.
+    data = final_data(final_codec.CHUNK_BYTES * 3 // 4, final_codec.CHUNK_BYTES * 3 // 4)
+    manifest, inline, apart = stored(data)
+
+    assert sum(len(blob) for blob in inline.values()) <= final_codec.INLINE_BYTES
+    assert final_codec.INLINE_BYTES < FIRESTORE_DOC_LIMIT // 2
+    assert all(len(blob) <= final_codec.CHUNK_BYTES for _, _, blob in apart)
+    assert not any(manifest["parts"][part]["inline"] for part in final_codec.PARTS)
+    assert reassemble(manifest, inline, apart) == data
+
+
+def test_small_synthesis_is_inlined_before_sources():
+    data = final_data(1000, final_codec.INLINE_BYTES)
+    manifest, inline, apart = stored(data)
+
+    assert list(inline) == ["synthesis"]
+    assert manifest["parts"]["synthesis"]["inline"] and not manifest["parts"]["sources"]["inline"]
+    assert {part for part, _, _ in apart} == {"sources"}
+    assert reassemble(manifest, inline, apart) == data
+
+
+def test_manifests_without_inline_flag_read_first_chunk_inline():
+    manifest = {"codec": final_codec.CODEC, "parts": {"synthesis": {"chunks": 3}}}
+    assert final_codec.stored_apart(manifest, "synthesis") == range(1, 3)
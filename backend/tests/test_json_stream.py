@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from backend.services.json_stream import IncrementalJSONExtractor
+
+PAYLOAD = {
+    "signals": [
+        {"id": "signal_1", "name": 'Quoted "diesel" queue', "evidence": "path C:\\ports\\} and a { brace"},
+        {"id": "signal_2", "name": "Escaped \\\" end", "nested": {"scores": [1, {"x": "]"}]}},
+        {"id": "signal_3", "name": "Unicode \u00e9 and \\n newline"},
+    ],
+    "summary": "ends with a backslash \\",
+}
+RESPONSE = "Here is the analysis {not json} with ```json\n" + json.dumps(PAYLOAD, indent=2) + "\n```\nDone."
+
+
+def feed_in_chunks(extractor: IncrementalJSONExtractor, text: str, size: int) -> list[tuple[str, int, dict]]:
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(extractor.feed(text[i:i + size]))
+    return completed
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(RESPONSE)])
+def test_elements_and_result_survive_any_chunking(size):
+    extractor = IncrementalJSONExtractor(watch=("signals",))
+    completed = feed_in_chunks(extractor, RESPONSE, size)
+
+    assert completed == [("signals", i, signal) for i, signal in enumerate(PAYLOAD["signals"])]
+    assert extractor.result() == PAYLOAD
+
+
+def test_escape_split_at_chunk_boundary():
+    text = json.dumps({"signals": [{"id": "a", "name": 'say \\"hi\\" }'}]})
+    cut = text.index("\\") + 1  # first chunk ends on the backslash
+    extractor = IncrementalJSONExtractor(watch=("signals",))
+
+    assert extractor.feed(text[:cut]) == []
+    assert extractor.feed(text[cut:]) == [("signals", 0, json.loads(text)["signals"][0])]
+
+
+def test_partial_response_yields_completed_elements_only():
+    text = json.dumps(PAYLOAD)
+    cut = text.index('{"id": "signal_3"') + 10
+    extractor = IncrementalJSONExtractor(watch=("signals",))
+
+    completed = extractor.feed(text[:cut])
+    assert [element["id"] for _, _, element in completed] == ["signal_1", "signal_2"]
+    assert extractor.result() is None
+
+    assert [element["id"] for _, _, element in extractor.feed(text[cut:])] == ["signal_3"]
+    assert extractor.result() == PAYLOAD
+
+
+def test_unparseable_value_is_skipped_for_the_next_one():
+    extractor = IncrementalJSONExtractor()
+    feed_in_chunks(extractor, "{draft: 1} then {\"final\": true}", 4)
+    assert extractor.result() == {"final": True}
+
+
+def test_array_opener():
+    extractor = IncrementalJSONExtractor(opener="[")
+    feed_in_chunks(extractor, 'Result: ["a", "b]", {"c": 1}]', 5)
+    assert extractor.result() == ["a", "b]", {"c": 1}]
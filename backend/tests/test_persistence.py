@@ -0,0 +1,64 @@
+import asyncio
+
+from backend.bench.fake_anthropic import fake_agent_output
+from backend.services.persistence import AsyncPersistence
+from backend.services.signal_index import SignalIndex
+from backend.services.storage import LocalEngine
+
+
+def fake_run(country: str, signal_ids: list[str]) -> dict:
+    synthesis = fake_agent_output("You are the Synthesis Agent", " ".join(signal_ids))
+    return {"config": {"country": country}, "agents": {"synthesis": synthesis}}
+
+
+def test_close_commits_queued_writes_and_stops_the_flusher(tmp_path):
+    engine = LocalEngine(str(tmp_path))
+
+    async def scenario():
+        # A flush interval far longer than the test: only close() can commit.
+        persistence = AsyncPersistence(engine, flush_interval=60)
+        await persistence.save_analysis("run1", {"country": "Fakeland"})
+        await persistence.save_agent_output("run1", "context", {"raw": "", "parsed": {"country": "Fakeland"}})
+        await persistence.update_analysis_status("run1", "error")
+        flusher = persistence._flusher
+        await persistence.close()
+        return flusher
+
+    flusher = asyncio.run(scenario())
+    assert flusher.done()
+    assert engine.get_analysis("run1")["status"] == "error"
+    assert set(engine.get_checkpoints("run1")) == {"context"}
+
+
+def test_sync_index_backfills_runs_saved_without_it(tmp_path):
+    engine = LocalEngine(str(tmp_path))
+    index = SignalIndex(str(tmp_path / "index.sqlite3"))
+    runs = {
+        "old": fake_run("Fakeland", ["signal_1", "signal_2"]),
+        "empty": {"config": {"country": "Emptyland"}, "agents": {"synthesis": {}}},
+        "new": fake_run("Otherland", ["signal_1"]),
+    }
+
+    async def save(persistence: AsyncPersistence, analysis_id: str):
+        await persistence.save_analysis(analysis_id, runs[analysis_id]["config"])
+        await persistence.save_final_analysis(analysis_id, runs[analysis_id])
+
+    async def scenario():
+        # Runs saved before the index existed (or by a worker with its own index)
+        unindexed = AsyncPersistence(engine, flush_interval=0)
+        await save(unindexed, "old")
+        await save(unindexed, "empty")
+        await unindexed.close()
+
+        persistence = AsyncPersistence(engine, index=index, flush_interval=0)
+        await save(persistence, "new")
+        assert index.run_ids() == {"new"}
+        summaries = await persistence.sync_index()
+        await persistence.close()
+        return summaries
+
+    summaries = asyncio.run(scenario())
+    assert {s["id"] for s in summaries} == {"old", "empty", "new"}
+    assert index.run_ids() == {"old", "empty", "new"}
+    assert sorted((row[0], row[1]) for row in index.score_inputs()[0]) == [
+        ("new", "signal_1"), ("old", "signal_1"), ("old", "signal_2")]
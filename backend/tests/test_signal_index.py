@@ -0,0 +1,52 @@
+import sqlite3
+
+from backend.bench.fake_anthropic import fake_agent_output
+from backend.services.signal_index import SignalIndex
+
+SYNTHESIS_SYSTEM = "You are the Synthesis Agent"
+
+
+def fake_run(country: str, signal_ids: list[str]) -> dict:
+    synthesis = fake_agent_output(SYNTHESIS_SYSTEM, " ".join(signal_ids))
+    return {"config": {"country": country}, "agents": {"synthesis": synthesis}}
+
+
+def test_indexes_fake_synthesis_output_under_its_signal_ids(tmp_path):
+    index = SignalIndex(str(tmp_path / "index.sqlite3"))
+    run = fake_run("Fakeland", ["signal_1", "signal_2", "signal_3"])
+
+    assert index.add_run("run1", run) == 3
+    rows = index.search(country="Fakeland")
+    assert sorted(row["signal_id"] for row in rows) == ["signal_1", "signal_2", "signal_3"]
+    assert {row["signal_id"]: row["name"] for row in rows} == {
+        s["signal_id"]: s["name"] for s in run["agents"]["synthesis"]["scored_signals"]}
+
+    matches = index.similar(run["agents"]["synthesis"]["scored_signals"][0], threshold=0.5)
+    assert {m["signal_id"] for m in matches} >= {"signal_1"}
+
+
+def test_reindexing_a_reordered_run_keeps_signal_ids(tmp_path):
+    index = SignalIndex(str(tmp_path / "index.sqlite3"))
+    run = fake_run("Fakeland", ["signal_1", "signal_2", "signal_3"])
+    index.add_run("run1", run)
+
+    synthesis = run["agents"]["synthesis"]
+    reordered = {**run, "agents": {"synthesis": {**synthesis, "scored_signals": synthesis["scored_signals"][::-1]}}}
+    assert index.add_run("run1", reordered) == 3
+    assert {row["signal_id"]: row["name"] for row in index.search()} == {
+        s["signal_id"]: s["name"] for s in synthesis["scored_signals"]}
+
+
+def test_runs_written_before_run_tracking_are_listed(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    SignalIndex(path).add_run("run1", fake_run("Fakeland", ["signal_1", "signal_2"]))
+    legacy = sqlite3.connect(path)
+    legacy.execute("DROP TABLE runs")
+    legacy.commit()
+    legacy.close()
+
+    index = SignalIndex(path)
+    assert index.run_ids() == {"run1"}
+    assert index.stats() == {"enabled": True, "signals": 2, "runs": 1}
+    index.remove_run("run1")
+    assert index.run_ids() == set()
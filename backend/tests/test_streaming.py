@@ -0,0 +1,72 @@
+import asyncio
+
+from backend.agents.schemas import SSEEvent
+from backend.agents.streaming import coalesce_chunks
+
+
+def chunk(content: str, agent: str = "signal_hunter", shard: int | None = None) -> SSEEvent:
+    return SSEEvent(type="agent_chunk", agent=agent, shard=shard, content=content)
+
+
+async def source(items):
+    """Yield events; a float item sleeps that many seconds instead."""
+    for item in items:
+        if isinstance(item, float):
+            await asyncio.sleep(item)
+        else:
+            yield item
+
+
+def coalesced(items, **kwargs) -> list[tuple]:
+    async def collect():
+        return [(e.type, e.agent, e.shard, e.content) async for e in coalesce_chunks(source(items), **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_chunks_flush_before_the_next_event_in_order():
+    events = coalesced([
+        SSEEvent(type="agent_start", agent="signal_hunter"),
+        chunk("a"), chunk("b"), chunk("c"),
+        SSEEvent(type="agent_complete", agent="signal_hunter", data={"signals": []}),
+        chunk("d", agent="synthesis"),
+        SSEEvent(type="analysis_complete", data={}),
+    ], flush_interval=10.0)
+
+    assert events == [
+        ("agent_start", "signal_hunter", None, None),
+        ("agent_chunk", "signal_hunter", None, "abc"),
+        ("agent_complete", "signal_hunter", None, None),
+        ("agent_chunk", "synthesis", None, "d"),
+        ("analysis_complete", None, None, None),
+    ]
+
+
+def test_trailing_chunks_flush_when_the_stream_ends():
+    assert coalesced([chunk("a"), chunk("b")], flush_interval=10.0) == [("agent_chunk", "signal_hunter", None, "ab")]
+
+
+def test_error_terminates_after_buffered_chunks():
+    events = coalesced([chunk("partial"), SSEEvent(type="error", message="boom")], flush_interval=10.0)
+    assert [e[0] for e in events] == ["agent_chunk", "error"]
+    assert events[0][3] == "partial"
+
+
+def test_shards_are_not_merged():
+    events = coalesced([chunk("a", shard=0), chunk("b", shard=0), chunk("c", shard=1), chunk("d", shard=0)],
+                       flush_interval=10.0)
+    assert [(e[2], e[3]) for e in events] == [(0, "ab"), (1, "c"), (0, "d")]
+
+
+def test_size_limit_flushes():
+    events = coalesced([chunk("abc"), chunk("def"), chunk("g")], flush_interval=10.0, max_chars=5)
+    assert [e[3] for e in events] == ["abcdef", "g"]
+
+
+def test_interval_flushes_while_the_source_is_quiet():
+    events = coalesced([chunk("a"), chunk("b"), 0.2, chunk("c")], flush_interval=0.02)
+    assert [e[3] for e in events] == ["ab", "c"]
+
+
+def test_zero_interval_passes_events_through():
+    events = coalesced([chunk("a"), chunk("b")], flush_interval=0)
+    assert [e[3] for e in events] == ["a", "b"]
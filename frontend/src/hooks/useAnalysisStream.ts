@@ -20,6 +20,8 @@ export function useAnalysisStream(analysisId: string | null) {
   const [error, setError] = useState<string | null>(null);
   const [fullData, setFullData] = useState<Record<string, unknown> | null>(null);
   const esRef = useRef<EventSource | null>(null);
+  // Sharded agents stream several calls at once; keep each shard's text apart
+  const shardContentRef = useRef<Record<string, string[]>>({});
 
   const connect = useCallback(() => {
     if (!analysisId) return;
@@ -35,6 +37,7 @@ export function useAnalysisStream(analysisId: string | null) {
 
         switch (data.type) {
           case "agent_start":
+            if (data.agent) delete shardContentRef.current[data.agent];
             setAgents((prev) =>
               prev.map((a) =>
                 a.id === data.agent
@@ -44,7 +47,17 @@ export function useAnalysisStream(analysisId: string | null) {
             );
             break;
 
-          case "agent_chunk":
+          case "agent_chunk": {
+            if (data.shard !== undefined && data.agent) {
+              const shards = (shardContentRef.current[data.agent] ??= []);
+              shards[data.shard] = (shards[data.shard] || "") + (data.content || "");
+              const content = shards
+                .map((text, i) => (text ? `── shard ${i + 1} ──\n${text}` : ""))
+                .filter(Boolean)
+                .join("\n\n");
+              setAgents((prev) => prev.map((a) => (a.id === data.agent ? { ...a, content } : a)));
+              break;
+            }
             setAgents((prev) =>
               prev.map((a) =>
                 a.id === data.agent
@@ -53,6 +66,21 @@ export function useAnalysisStream(analysisId: string | null) {
               )
             );
             break;
+          }
+
+          case "agent_partial": {
+            // Fill the signal table while Synthesis is still writing
+            const partial = data.data as { key?: string; index?: number; item?: Signal } | undefined;
+            if (partial?.key === "scored_signals" && partial.item && partial.index !== undefined) {
+              const { index, item } = partial;
+              setSignals((prev) => {
+                const next = [...prev];
+                next[index] = item;
+                return next;
+              });
+            }
+            break;
+          }
 
           case "agent_complete":
             setAgents((prev) =>
@@ -121,6 +149,8 @@ export function useAnalysisStream(analysisId: string | null) {
     };
 
     es.onerror = () => {
+      // While the browser is reconnecting it resumes from Last-Event-ID on its own
+      if (es.readyState === EventSource.CONNECTING) return;
       if (status !== "complete") {
         setStatus("error");
         setError("Connection lost");
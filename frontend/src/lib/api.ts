@@ -32,6 +32,19 @@ export async function startWhatIf(
   return res.json();
 }
 
+export async function startWhatIfBatch(
+  analysisId: string,
+  scenarios: string[]
+): Promise<{ scenarios: { scenario_id: string; stream_key: string; scenario: string }[] }> {
+  const res = await fetch(`${API_URL}/api/analyze/${analysisId}/what-if/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ scenarios }),
+  });
+  if (!res.ok) throw new Error(`Failed to start what-if batch: ${res.statusText}`);
+  return res.json();
+}
+
 export function createWhatIfStream(analysisId: string, streamKey: string): EventSource {
   return new EventSource(`${API_URL}/api/analyze/${analysisId}/what-if/${streamKey}/stream`);
 }
@@ -52,8 +65,23 @@ export interface AnalysisRun {
   } | null;
 }
 
-export async function listRuns(): Promise<{ runs: AnalysisRun[] }> {
-  const res = await fetch(`${API_URL}/api/runs`);
+export interface ListRunsParams {
+  limit?: number;
+  cursor?: string;
+  country?: string;
+  status?: AnalysisRun["status"];
+  risk_level?: string;
+}
+
+export async function listRuns(
+  params: ListRunsParams = {}
+): Promise<{ runs: AnalysisRun[]; next_cursor: string | null }> {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value !== undefined && value !== "") query.set(key, String(value));
+  }
+  const qs = query.toString();
+  const res = await fetch(`${API_URL}/api/runs${qs ? `?${qs}` : ""}`);
   if (!res.ok) throw new Error(`Failed to list runs: ${res.statusText}`);
   return res.json();
 }
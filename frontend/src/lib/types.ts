@@ -7,6 +7,7 @@ export interface AnalysisConfig {
   signal_count: number;
   domains: string[];
   custom_indicators: string[];
+  refresh_context?: boolean;
 }
 
 export interface AgentState {
@@ -81,8 +82,9 @@ export interface SynthesisData {
 }
 
 export interface SSEEvent {
-  type: "agent_start" | "agent_chunk" | "agent_complete" | "analysis_complete" | "error";
+  type: "agent_start" | "agent_chunk" | "agent_partial" | "agent_progress" | "agent_complete" | "analysis_complete" | "error";
   agent?: string;
+  shard?: number;
   content?: string;
   data?: Record<string, unknown>;
   status?: string;